@@ -3,237 +3,365 @@
 Advanced script to check Jupyter notebooks for common issues with pandas and file paths.
 """
 
-import json
+import argparse
+import contextlib
+import functools
 import os
-import re
 import sys
-from pathlib import Path
-import pandas as pd
+import time
 
-def check_notebook_for_issues(notebook_path):
-    """Check a notebook for common issues and suggest fixes."""
+import notebook_profile
+from notebook_cache import CellResultLRU, open_cache, source_hash
+from notebook_engine import ANALYSES, CellContext, LoadedNotebook, pandas_version, run_cell_rules, run_rules
+from notebook_git import add_git_arguments, describe_changes, git_notebooks
+from notebook_paths import PathIndex, get_path_index
+from notebook_pipeline import (DEFAULT_INCLUDE, add_discovery_arguments, add_early_exit_arguments,
+                               discover_notebooks, early_exit, filters_applied, iter_notebooks, record)
+from notebook_pool import add_pool_arguments, iter_notebook_results
+from notebook_profile import RunProfile, add_profile_arguments, profile_call, profiling_enabled
+from notebook_reader import CODE_CELLS, iter_cells
+from notebook_rules import rules_fingerprint
+
+def scan_cell(i, source, analysis='regex'):
+    """Run the rules over the joined source of code cell i.
+    
+    File path issues are returned as candidates carrying a 'file_path' key;
+    whether the file exists is left to resolve_file_paths, so that the
+    result depends only on the cell's contents and can be cached.
+    """
+    return run_cell_rules(ANALYSES[analysis], CellContext(i, source))
+
+def scan_notebook(notebook_path, notebook=None, analysis='regex'):
+    """Run the rules over every code cell of a notebook."""
+    if notebook is None:
+        notebook = LoadedNotebook(notebook_path)
+    return run_rules(ANALYSES[analysis], notebook)
+
+def resolve_file_paths(issues, notebook_path, path_index=None):
+    """Keep only the file path candidates that do not exist relative to the notebook."""
+    if path_index is None:
+        path_index = get_path_index()
+    profile = notebook_profile.active
+    if profile is not None:
+        start = time.perf_counter()
+        lookups, syscalls = path_index.lookups, path_index.syscalls
+    resolved = []
+    missing = 0
+    notebook_dir = os.path.dirname(notebook_path)
+    path_index.prepare(notebook_dir)
+    for issue in issues:
+        if 'file_path' in issue:
+            issue = dict(issue)
+            file_path = issue.pop('file_path')
+            if file_path.startswith('/'):
+                continue
+            full_path = os.path.join(notebook_dir, file_path)
+            if path_index.exists(full_path):
+                continue
+            missing += 1
+        resolved.append(issue)
+    if profile is not None:
+        profile.phase('paths', time.perf_counter() - start, calls=path_index.lookups - lookups,
+                      matches=missing, syscalls=path_index.syscalls - syscalls)
+    return resolved
+
+def rules_version(analysis='regex'):
+    """Return the fingerprint of the rules this checker applies."""
+    return rules_fingerprint(pandas_version(), analysis)
+
+def check_notebook_for_issues(notebook_path, cache_directory=None, notebook=None, analysis='regex'):
+    """Check a notebook for common issues and suggest fixes.
+    
+    With a cache_directory, results are looked up in and saved to the
+    ResultCache of that directory instead of always rescanning. A
+    LoadedNotebook shared with the other tools can be passed in to avoid
+    reading the file again. analysis picks the regex or the AST rule set.
+    """
     print(f"\nChecking notebook: {notebook_path}")
     
-    with open(notebook_path, 'r', encoding='utf-8') as f:
-        notebook = json.load(f)
+    if cache_directory is None:
+        issues = scan_notebook(notebook_path, notebook, analysis)
+    else:
+        cache = open_cache(cache_directory, rules_version(analysis))
+        with notebook_profile.timed_phase('cache'):
+            issues = cache.get(notebook_path)
+        if issues is None:
+            with notebook_profile.timed_phase('cache'):
+                state = cache.file_state(notebook_path)
+            issues = scan_notebook(notebook_path, notebook, analysis)
+            # A notebook passed in may have been read before the state was taken
+            if notebook is None or notebook.file_stat == state[:2]:
+                with notebook_profile.timed_phase('cache'):
+                    cache.put(notebook_path, issues, state)
     
+    return resolve_file_paths(issues, notebook_path)
+
+def check_cells(notebook_path, cell_results, path_index=None, analysis='regex'):
+    """Check a notebook cell by cell, reusing results for unchanged cell sources.
+    
+    Returns the issues (without the 'code' copy of each cell), the number of
+    cells whose rules had to be run and the number of code cells.
+    """
     issues = []
+    rechecked = 0
+    code_cells = 0
+    for i, cell_type, source in iter_cells(notebook_path, CODE_CELLS):
+        if cell_type == 'code':
+            code_cells += 1
+            key = source_hash(source)
+            cell_issues = cell_results.get(key)
+            if cell_issues is None:
+                rechecked += 1
+                cell_issues = []
+                for issue in scan_cell(i, source, analysis):
+                    issue = dict(issue)
+                    del issue['cell_index'], issue['code']
+                    cell_issues.append(issue)
+                cell_results.put(key, cell_issues)
+            issues.extend(dict(issue, cell_index=i) for issue in cell_issues)
+    
+    return resolve_file_paths(issues, notebook_path, path_index), rechecked, code_cells
+
+def print_watch_summary(summary, last_change):
+    """Redraw the watch summary: totals, per-notebook counts and the latest change."""
+    if sys.stdout.isatty():
+        sys.stdout.write('\033[H\033[2J')
+    totals = {'high': 0, 'medium': 0, 'low': 0}
+    for counts in summary.values():
+        for severity in totals:
+            totals[severity] += counts.get(severity, 0)
+    print(f"===== WATCHING {len(summary)} NOTEBOOKS ({time.strftime('%H:%M:%S')}) =====")
+    print(f"Total issues: {sum(totals.values())}")
+    print(f"High severity issues: {totals['high']}")
+    print(f"Medium severity issues: {totals['medium']}")
+    print(f"Low severity issues: {totals['low']}")
+    for notebook, counts in sorted(summary.items()):
+        if 'error' in counts:
+            print(f"  {notebook}: could not be checked: {counts['error']}")
+        elif sum(counts.values()):
+            print(f"  {notebook}: {counts['high']} high, {counts['medium']} medium, {counts['low']} low")
+    if last_change:
+        notebook, issues, rechecked, cells = last_change
+        print(f"\nLast change: {notebook} (rechecked {rechecked} of {cells} code cells)")
+        for issue in issues:
+            print(f"  [{issue['severity']}] Cell {issue['cell_index']}: {issue['issue']}")
+            print(f"     Fix: {issue['fix']}")
+    sys.stdout.flush()
+
+def watch_notebooks(directory, interval=1.0, max_cache_mb=64, analysis='regex', include=DEFAULT_INCLUDE,
+                    exclude=(), recursive=True):
+    """Poll a directory for notebook changes and recheck only the edited cells.
+    
+    Only per-notebook severity counts are kept between polls; the issues of
+    each cell live in a CellResultLRU keyed by the hash of the cell source,
+    bounded to max_cache_mb, so memory stays flat however many notebooks are
+    watched. Runs until interrupted.
+    """
+    cell_results = CellResultLRU(int(max_cache_mb * 1024 * 1024))
+    stats = {}
+    summary = {}
+    last_change = None
+    first = True
+    try:
+        while True:
+            changed = False
+            current = set()
+            path_index = PathIndex()
+            for notebook in iter_notebooks(directory, include, exclude, recursive):
+                current.add(notebook)
+                try:
+                    stat = os.stat(notebook)
+                except FileNotFoundError:
+                    continue
+                if stats.get(notebook) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                stats[notebook] = (stat.st_size, stat.st_mtime_ns)
+                changed = True
+                try:
+                    issues, rechecked, code_cells = check_cells(notebook, cell_results, path_index, analysis)
+                except (OSError, ValueError, KeyError) as e:
+                    summary[notebook] = {'error': f'{type(e).__name__}: {e}'}
+                    continue
+                counts = {'high': 0, 'medium': 0, 'low': 0}
+                for issue in issues:
+                    counts[issue['severity']] += 1
+                summary[notebook] = counts
+                if not first:
+                    last_change = (notebook, issues, rechecked, code_cells)
+            for notebook in set(stats) - current:
+                del stats[notebook]
+                summary.pop(notebook, None)
+                changed = True
+            if changed:
+                print_watch_summary(summary, last_change)
+            first = False
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+def print_advanced_summary(all_issues):
+    """Print the severity totals and the issues of every notebook that has any."""
+    by_notebook = {}
+    totals = {'high': 0, 'medium': 0, 'low': 0}
+    for notebook, issues in all_issues.items():
+        by_severity = {'high': [], 'medium': [], 'low': []}
+        for issue in issues:
+            by_severity[issue['severity']].append(issue)
+        for severity in totals:
+            totals[severity] += len(by_severity[severity])
+        by_notebook[notebook] = by_severity
+    
+    if all_issues:
+        print("\n\n===== SUMMARY OF ISSUES =====")
+        print(f"Total issues: {sum(totals.values())}")
+        print(f"High severity issues: {totals['high']}")
+        print(f"Medium severity issues: {totals['medium']}")
+        print(f"Low severity issues: {totals['low']}")
+        
+        for notebook, issues in all_issues.items():
+            print(f"\n{notebook}: {len(issues)} issues found")
+            for severity, issues_of_severity in by_notebook[notebook].items():
+                if issues_of_severity:
+                    print(f"  {severity.upper()} SEVERITY ISSUES:")
+                    for i, issue in enumerate(issues_of_severity):
+                        print(f"    {i+1}. Cell {issue['cell_index']}: {issue['issue']}")
+                        print(f"       Fix: {issue['fix']}")
+    else:
+        print("\nNo issues found in any notebooks!")
+
+def report_notebooks(results, report):
+    """Stream each notebook's issues to a JSONL or SARIF report as results arrive.
     
-    # Check for cells with code
-    for i, cell in enumerate(notebook['cells']):
-        if cell['cell_type'] == 'code':
-            source = ''.join(cell['source'])
-            
-            # Check for deprecated pandas methods
-            deprecated_methods = [
-                ('get_dtype_counts()', 'dtypes.value_counts()'),
-                ('append(', 'concat([df1, df2], ignore_index=True)'),
-                ('ix[', 'loc[ or iloc['),
-                ('as_matrix()', 'to_numpy()'),
-                ('read_table(', 'read_csv('),
-                ('convert_objects(', 'astype()'),
-                ('pd.TimeGrouper(', 'pd.Grouper(freq='),
-                ('pd.SparseDataFrame(', 'pd.DataFrame(...).sparse.from_spmatrix('),
-                ('pd.SparseSeries(', 'pd.Series(..., dtype="Sparse")'),
-                ('pd.Panel(', 'Use MultiIndex DataFrame instead'),
-                ('pd.scatter_matrix(', 'pd.plotting.scatter_matrix('),
-                ('pd.tools.plotting.', 'pd.plotting.'),
-                ('pd.tseries.plotting.', 'pd.plotting.'),
-                ('pd.stats.', 'Use statsmodels instead'),
-                ('pd.rolling_', 'df.rolling().'),
-                ('pd.expanding_', 'df.expanding().'),
-                ('pd.ewma(', 'df.ewm().mean()'),
-                ('pd.ewmstd(', 'df.ewm().std()'),
-                ('pd.ewmvar(', 'df.ewm().var()'),
-                ('pd.ewmcorr(', 'df.ewm().corr()'),
-                ('pd.ewmcov(', 'df.ewm().cov()'),
-                ('isnull()', 'isna()'),
-                ('notnull()', 'notna()'),
-                ('pd.TimeGrouper(', 'pd.Grouper(freq='),
-                ('sort(', 'sort_values('),
-                ('sort_index(inplace=True)', 'sort_index()'),
-                ('sort_values(inplace=True)', 'sort_values()'),
-                ('reset_index(inplace=True)', 'reset_index()'),
-                ('set_index(inplace=True)', 'set_index()'),
-                ('fillna(inplace=True)', 'fillna()'),
-                ('dropna(inplace=True)', 'dropna()'),
-                ('drop(inplace=True)', 'drop()'),
-                ('rename(inplace=True)', 'rename()'),
-                ('replace(inplace=True)', 'replace()'),
-            ]
-            
-            for old, new in deprecated_methods:
-                if old in source:
-                    issues.append({
-                        'cell_index': i,
-                        'issue': f'Deprecated method: {old}',
-                        'fix': f'Replace with: {new}',
-                        'code': source,
-                        'severity': 'high'
-                    })
-            
-            # Check for file path issues
-            file_path_patterns = [
-                r"pd\.read_csv\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_excel\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_parquet\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_hdf\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_pickle\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_json\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_html\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_sas\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_stata\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_feather\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_spss\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_orc\(['\"]([^'\"]+)['\"]",
-                r"pd\.read_sql\(['\"]([^'\"]+)['\"]",
-                r"open\(['\"]([^'\"]+)['\"]",
-                r"with open\(['\"]([^'\"]+)['\"]",
-                r"os\.path\.join\(['\"]([^'\"]+)['\"]",
-                r"Path\(['\"]([^'\"]+)['\"]",
-            ]
-            
-            for pattern in file_path_patterns:
-                matches = re.finditer(pattern, source)
-                for match in matches:
-                    file_path = match.group(1)
-                    # Skip URLs and variable references
-                    if file_path.startswith(('http://', 'https://', 'ftp://', '{', '$')):
-                        continue
-                    
-                    # Skip paths that are clearly variables
-                    if not any(char in file_path for char in ['/', '\\', '.']):
-                        continue
-                    
-                    # Check if the file path exists relative to the notebook
-                    notebook_dir = os.path.dirname(notebook_path)
-                    full_path = os.path.join(notebook_dir, file_path)
-                    if not os.path.exists(full_path) and not file_path.startswith('/'):
-                        issues.append({
-                            'cell_index': i,
-                            'issue': f'File path may not exist: {file_path}',
-                            'fix': 'Update path or create the file',
-                            'code': source,
-                            'severity': 'medium'
-                        })
-            
-            # Check for pandas set_option issues
-            set_option_match = re.search(r"pd\.set_option\(['\"]([^'\"]+)['\"]", source)
-            if set_option_match:
-                option = set_option_match.group(1)
-                if not option.startswith('display.'):
-                    issues.append({
-                        'cell_index': i,
-                        'issue': f"Missing 'display.' prefix in option: {option}",
-                        'fix': f"Add 'display.' prefix: 'display.{option}'",
-                        'code': source,
-                        'severity': 'medium'
-                    })
-            
-            # Check for multiple options in pd.set_option
-            set_option_multiple = re.search(r"pd\.set_option\([^,]+,[^,]+,[^,]+", source)
-            if set_option_multiple:
-                issues.append({
-                    'cell_index': i,
-                    'issue': 'Multiple options in pd.set_option()',
-                    'fix': 'Split into separate calls',
-                    'code': source,
-                    'severity': 'high'
-                })
-            
-            # Check for unsupported operations
-            list_subtraction = re.search(r'\[[^\]]*\]\s*-\s*\d+', source)
-            if list_subtraction:
-                match = list_subtraction.group(0)
-                issues.append({
-                    'cell_index': i,
-                    'issue': f'Unsupported operation: {match}',
-                    'fix': 'Use list comprehension or numpy array',
-                    'code': source,
-                    'severity': 'high'
-                })
-            
-            # Check for pandas version-specific code
-            if 'pd.__version__' in source or 'pandas.__version__' in source:
-                issues.append({
-                    'cell_index': i,
-                    'issue': 'Version-specific code detected',
-                    'fix': f'Current pandas version: {pd.__version__}. May need updates.',
-                    'code': source,
-                    'severity': 'low'
-                })
-    
-    return issues
+    Nothing is accumulated across notebooks: the report keeps only the
+    severity counters, and cells are referred to by index and source hash
+    instead of carrying a copy of their code.
+    """
+    report.begin()
+    try:
+        for notebook, issues, error in results:
+            if error:
+                report.error(str(notebook), error)
+            else:
+                report.add(str(notebook), issues)
+    finally:
+        # Closed even if the run is cut short, so the document stays valid
+        report.end()
+
+def finish_run(args, directory, seen, stop, run_profile, git_mode, log):
+    """Report how the run ended, tidy the cache and exit with status 1 if it stopped early."""
+    if not seen:
+        print(f"No notebooks found in {directory}{describe_changes(args)}", file=log)
+    if run_profile is not None:
+        run_profile.finish(args.profile_output, file=log)
+    if stop is not None and stop.reason:
+        print(f"\nStopped early ({stop.reason})", file=log)
+        sys.exit(1)
+    # Only a complete, unfiltered run knows which notebooks are gone
+    if not args.no_cache and not git_mode and not filters_applied(args):
+        open_cache(directory, rules_version(args.analysis)).evict_missing(seen)
 
 def main():
     """Main function to check all notebooks in a directory."""
-    if len(sys.argv) < 2:
-        print("Usage: python advanced_notebook_checker.py <directory>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Check Jupyter notebooks for common pandas and file path issues.')
+    parser.add_argument('directory', help='Directory containing .ipynb files')
+    add_pool_arguments(parser)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Rescan every notebook instead of using the result cache')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and recheck edited cells as notebooks change')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Seconds between polls in --watch mode (default: 1)')
+    parser.add_argument('--cell-cache-mb', type=float, default=64,
+                        help='Memory limit for per-cell results in --watch mode (default: 64)')
+    parser.add_argument('--analysis', choices=sorted(ANALYSES), default='regex',
+                        help='Find issues with substring/regex rules or by parsing each cell (default: regex)')
+    parser.add_argument('--format', choices=('text', 'jsonl', 'sarif'), default='text',
+                        help='Report format; jsonl and sarif are streamed as notebooks are checked (default: text)')
+    parser.add_argument('--output', '-o',
+                        help='Write the jsonl or sarif report to this file instead of stdout')
+    add_discovery_arguments(parser)
+    add_early_exit_arguments(parser, 'a high severity issue')
+    add_profile_arguments(parser)
+    add_git_arguments(parser)
+    args = parser.parse_args()
     
-    directory = sys.argv[1]
+    directory = args.directory
     
     if not os.path.isdir(directory):
         print(f"Error: {directory} is not a directory")
         sys.exit(1)
     
-    notebooks = list(Path(directory).glob('*.ipynb'))
+    if args.watch and (args.since or args.staged):
+        parser.error('--watch cannot be combined with --since or --staged')
+    if args.watch and (args.fail_fast or args.max_issues is not None):
+        parser.error('--watch cannot be combined with --fail-fast or --max-issues')
     
-    if not notebooks:
-        print(f"No notebooks found in {directory}")
-        sys.exit(0)
+    if args.watch:
+        watch_notebooks(directory, args.interval, args.cell_cache_mb, args.analysis,
+                        args.include or DEFAULT_INCLUDE, args.exclude, not args.no_recursive)
+        return
     
-    print(f"Found {len(notebooks)} notebooks in {directory}")
-    print(f"Current pandas version: {pd.__version__}")
+    # Results for a subset of cells are not cached
+    check = functools.partial(check_notebook_for_issues, analysis=args.analysis)
+    notebooks, check = git_notebooks(parser, args, check)
+    git_mode = notebooks is not None
+    if not git_mode:
+        notebooks = discover_notebooks(args)
+    
+    # With a jsonl or sarif report, stdout carries only the report
+    log = sys.stdout if args.format == 'text' else sys.stderr
+    
+    print(f"Checking notebooks in {directory}{describe_changes(args)}", file=log)
+    print(f"Current pandas version: {pandas_version()}", file=log)
     
     all_issues = {}
-    total_high_severity = 0
-    total_medium_severity = 0
-    total_low_severity = 0
+    failed_notebooks = {}
+    seen = []
+    
+    if not args.no_cache and not git_mode:
+        check = functools.partial(check_notebook_for_issues, cache_directory=directory, analysis=args.analysis)
+    
+    run_profile = None
+    if profiling_enabled(args):
+        run_profile = RunProfile()
+        check = functools.partial(profile_call, check)
+    
+    # discover -> check -> report, one notebook at a time
+    results = iter_notebook_results(check, record(notebooks, seen), args.jobs, args.timeout)
+    if run_profile is not None:
+        results = run_profile.collect(results)
+    stop = early_exit(args, lambda issue: issue['severity'] == 'high')
+    if stop is not None:
+        results = stop.apply(results)
     
-    for notebook in notebooks:
-        issues = check_notebook_for_issues(str(notebook))
+    if args.format != 'text':
+        from notebook_report import make_report
+        with contextlib.ExitStack() as stack:
+            out = sys.stdout
+            if args.output:
+                out = stack.enter_context(open(args.output, 'w', encoding='utf-8'))
+            stack.enter_context(contextlib.redirect_stdout(log))
+            report_notebooks(results, make_report(args.format, out, 'advanced_notebook_checker'))
+        finish_run(args, directory, seen, stop, run_profile, git_mode, log)
+        return
+    
+    for notebook, issues, error in results:
+        if error:
+            print(f"\nError checking notebook {notebook}: {error}")
+            failed_notebooks[notebook] = error
+            continue
         if issues:
-            all_issues[str(notebook)] = issues
-            high_severity = sum(1 for issue in issues if issue['severity'] == 'high')
-            medium_severity = sum(1 for issue in issues if issue['severity'] == 'medium')
-            low_severity = sum(1 for issue in issues if issue['severity'] == 'low')
-            total_high_severity += high_severity
-            total_medium_severity += medium_severity
-            total_low_severity += low_severity
+            all_issues[notebook] = issues
     
-    if all_issues:
-        print("\n\n===== SUMMARY OF ISSUES =====")
-        print(f"Total issues: {total_high_severity + total_medium_severity + total_low_severity}")
-        print(f"High severity issues: {total_high_severity}")
-        print(f"Medium severity issues: {total_medium_severity}")
-        print(f"Low severity issues: {total_low_severity}")
-        
-        for notebook, issues in all_issues.items():
-            print(f"\n{notebook}: {len(issues)} issues found")
-            high_severity = [issue for issue in issues if issue['severity'] == 'high']
-            medium_severity = [issue for issue in issues if issue['severity'] == 'medium']
-            low_severity = [issue for issue in issues if issue['severity'] == 'low']
-            
-            if high_severity:
-                print("  HIGH SEVERITY ISSUES:")
-                for i, issue in enumerate(high_severity):
-                    print(f"    {i+1}. Cell {issue['cell_index']}: {issue['issue']}")
-                    print(f"       Fix: {issue['fix']}")
-            
-            if medium_severity:
-                print("  MEDIUM SEVERITY ISSUES:")
-                for i, issue in enumerate(medium_severity):
-                    print(f"    {i+1}. Cell {issue['cell_index']}: {issue['issue']}")
-                    print(f"       Fix: {issue['fix']}")
-            
-            if low_severity:
-                print("  LOW SEVERITY ISSUES:")
-                for i, issue in enumerate(low_severity):
-                    print(f"    {i+1}. Cell {issue['cell_index']}: {issue['issue']}")
-                    print(f"       Fix: {issue['fix']}")
-    else:
-        print("\nNo issues found in any notebooks!")
+    if seen:
+        print_advanced_summary(all_issues)
+    
+    if failed_notebooks:
+        print(f"\n{len(failed_notebooks)} notebooks could not be checked:")
+        for notebook, error in failed_notebooks.items():
+            print(f"  {notebook}: {error}")
+    
+    finish_run(args, directory, seen, stop, run_profile, git_mode, sys.stdout)
 
 if __name__ == "__main__":
     main()
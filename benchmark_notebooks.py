@@ -0,0 +1,509 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the notebook checkers.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from notebook_rules import DEPRECATED_METHODS, FILE_PATH_PATTERNS, RuleMatcher
+
+HISTORY_FILENAME = 'benchmark_history.jsonl'
+
+# Bump when write_corpus makes different notebooks from the same arguments,
+# so the history does not compare runs on different corpora
+CORPUS_VERSION = 2
+
+# Lines the fixer rewrites, so the fix phases have notebooks to change and write
+FIXABLE_SNIPPETS = (
+    "values = [1, 2, 3] - 1",
+    "pd.set_option('max_rows', 10, 'max_columns', 5)",
+    "pd.set_option('max_colwidth', 40)",
+    "summary = df.get_dtype_counts()",
+)
+
+def load_code_cells(directory):
+    """Return the joined source of every code cell in the notebooks of a directory."""
+    sources = []
+    for notebook_path in sorted(Path(directory).glob('*.ipynb')):
+        with open(notebook_path, 'r', encoding='utf-8') as f:
+            notebook = json.load(f)
+        for cell in notebook['cells']:
+            if cell['cell_type'] == 'code':
+                sources.append(''.join(cell['source']))
+    return sources
+
+def grow_rules(extra):
+    """Return the default rule tables padded with extra synthetic rules."""
+    deprecated_methods = list(DEPRECATED_METHODS)
+    file_path_patterns = list(FILE_PATH_PATTERNS)
+    for n in range(extra):
+        deprecated_methods.append((f'pd.legacy_{n}(', f'pd.modern_{n}('))
+        file_path_patterns.append(rf"pd\.read_format{n}\(['\"]([^'\"]+)['\"]")
+    return deprecated_methods, file_path_patterns
+
+def scan_serial(sources, deprecated_methods, file_path_patterns):
+    """Scan the sources the way the checkers did before the compiled matcher."""
+    hits = []
+    for source in sources:
+        hits.append((
+            [(old, new) for old, new in deprecated_methods if old in source],
+            [match.group(1) for pattern in file_path_patterns for match in re.finditer(pattern, source)],
+        ))
+    return hits
+
+def scan_compiled(sources, matcher):
+    """Scan the sources with a compiled RuleMatcher."""
+    return [(matcher.deprecated(source), matcher.file_paths(source)) for source in sources]
+
+def best_of(func, *args, repeat=3):
+    """Return the fastest wall time of several calls and the last result."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench_matcher(directory, extras=(0, 50, 150, 400)):
+    """Compare serial scans with the compiled matcher as the rule tables grow."""
+    sources = load_code_cells(directory)
+    size = sum(len(source) for source in sources)
+    print(f"Rule matcher: {len(sources)} code cells, {size} characters")
+    print(f"{'rules':>7} {'serial (s)':>12} {'compiled (s)':>13} {'speedup':>8}")
+    for extra in extras:
+        deprecated_methods, file_path_patterns = grow_rules(extra)
+        matcher = RuleMatcher(deprecated_methods, file_path_patterns)
+        serial_time, serial_hits = best_of(scan_serial, sources, deprecated_methods, file_path_patterns)
+        compiled_time, compiled_hits = best_of(scan_compiled, sources, matcher)
+        if serial_hits != compiled_hits:
+            raise AssertionError(f"Compiled matcher disagrees with serial scan at {extra} extra rules")
+        rules = len(deprecated_methods) + len(file_path_patterns)
+        print(f"{rules:>7} {serial_time:>12.4f} {compiled_time:>13.4f} {serial_time / compiled_time:>7.1f}x")
+
+def write_output_heavy_notebook(path, output_mb=100, cells=200):
+    """Write a notebook whose bytes are almost all base64 image outputs."""
+    payload = 'iVBORw0KGgo' * (output_mb * 1024 * 1024 // cells // 11)
+    notebook = {'cells': [], 'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5}
+    for i in range(cells):
+        source = ['df = pd.read_csv("data/flights.csv")\n', 'df.isnull().sum()\n'] if i == 1 else ['df.head()\n']
+        notebook['cells'].append({
+            'cell_type': 'code',
+            'execution_count': i,
+            'metadata': {},
+            'outputs': [{'data': {'image/png': payload, 'text/plain': ['<Figure>']},
+                         'metadata': {}, 'output_type': 'display_data'}],
+            'source': source,
+        })
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(notebook, f, indent=1)
+
+_READER_PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from notebook_rules import get_rule_matcher
+from notebook_reader import CODE_CELLS, iter_cells
+matcher = get_rule_matcher()
+start = time.perf_counter()
+first_issue = None
+if {mode!r} == 'json.load':
+    with open({path!r}, 'r', encoding='utf-8') as f:
+        notebook = json.load(f)
+    cells = ((i, cell['cell_type'], ''.join(cell['source'])) for i, cell in enumerate(notebook['cells']))
+else:
+    cells = iter_cells({path!r}, CODE_CELLS)
+for i, cell_type, source in cells:
+    if cell_type == 'code' and matcher.deprecated(source) and first_issue is None:
+        first_issue = time.perf_counter() - start
+total = time.perf_counter() - start
+print(first_issue, total, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+def bench_reader(output_mb=100):
+    """Compare peak RSS and time to first issue of json.load and the streaming reader."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'heavy.ipynb')
+        write_output_heavy_notebook(path, output_mb)
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"\nNotebook reader: {size:.0f} MB notebook, almost all outputs")
+        print(f"{'reader':>10} {'first issue (s)':>16} {'total (s)':>10} {'peak RSS (MB)':>14}")
+        for mode in ('json.load', 'streaming'):
+            probe = _READER_PROBE.format(root=root, mode=mode, path=path)
+            result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+            first_issue, total, max_rss_kb = result.stdout.split()
+            print(f"{mode:>10} {float(first_issue):>16.4f} {float(total):>10.4f} {int(max_rss_kb) / 1024:>14.1f}")
+
+def bench_path_index(directory):
+    """Count the filesystem calls made by the file path rule with and without PathIndex."""
+    from advanced_notebook_checker import scan_notebook
+    from notebook_paths import PathIndex
+    
+    checks = []
+    for notebook_path in sorted(Path(directory).glob('*.ipynb')):
+        notebook_dir = os.path.dirname(str(notebook_path))
+        for issue in scan_notebook(str(notebook_path)):
+            if 'file_path' in issue and not issue['file_path'].startswith('/'):
+                checks.append((notebook_dir, os.path.join(notebook_dir, issue['file_path'])))
+    
+    start = time.perf_counter()
+    expected = [os.path.exists(full_path) for _, full_path in checks]
+    stat_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    index = PathIndex()
+    found = []
+    for notebook_dir, full_path in checks:
+        index.prepare(notebook_dir)
+        found.append(index.exists(full_path))
+    index_time = time.perf_counter() - start
+    if found != expected:
+        raise AssertionError("PathIndex disagrees with os.path.exists")
+    
+    print(f"\nFile path rule: {len(checks)} existence checks")
+    print(f"{'resolver':>14} {'syscalls':>9} {'time (s)':>9}")
+    print(f"{'os.path.exists':>14} {len(checks):>9} {stat_time:>9.4f}")
+    print(f"{'PathIndex':>14} {index.syscalls:>9} {index_time:>9.4f}")
+
+def bench_analysis(directory):
+    """Compare the per-cell cost and issue count of the regex and AST rule sets."""
+    from notebook_ast import analyze_source
+    from notebook_engine import ANALYSES, CellContext, run_cell_rules
+    
+    sources = load_code_cells(directory)
+    
+    def run(tool):
+        return sum(len(run_cell_rules(tool, CellContext(i, source))) for i, source in enumerate(sources))
+    
+    def run_cold_ast():
+        analyze_source.cache_clear()
+        return run(ANALYSES['ast'])
+    
+    regex_time, regex_issues = best_of(run, ANALYSES['regex'])
+    cold_time, ast_issues = best_of(run_cold_ast)
+    warm_time, _ = best_of(run, ANALYSES['ast'])
+    
+    print(f"\nAnalysis mode: {len(sources)} code cells")
+    print(f"{'mode':>16} {'per cell (us)':>14} {'issues':>7}")
+    print(f"{'regex':>16} {regex_time / len(sources) * 1e6:>14.1f} {regex_issues:>7}")
+    print(f"{'ast (parse)':>16} {cold_time / len(sources) * 1e6:>14.1f} {ast_issues:>7}")
+    print(f"{'ast (cached)':>16} {warm_time / len(sources) * 1e6:>14.1f} {ast_issues:>7}")
+
+def bench_cold_start(repeat=7, budget=0.1):
+    """Time fresh interpreter runs of the advanced checker on one small notebook.
+    
+    This is the cost a pre-commit hook pays per invocation. Returns True if
+    the best run without the cache is within budget seconds.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(root, 'advanced_notebook_checker.py')
+    commands = [
+        ('python -c pass', [sys.executable, '-c', 'pass']),
+        ('checker --no-cache', [sys.executable, script, None, '--no-cache']),
+        ('checker (cached)', [sys.executable, script, None]),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(tmp, notebooks=1, cells=10, output_kb=1)
+        times = {}
+        for name, command in commands:
+            command = [tmp if arg is None else arg for arg in command]
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+                runs.append(time.perf_counter() - start)
+            runs.sort()
+            times[name] = (runs[0], runs[len(runs) // 2])
+    
+    print(f"\nCold start: one notebook, {repeat} runs each")
+    print(f"{'command':>20} {'best (ms)':>10} {'median (ms)':>12}")
+    for name, (best, median) in times.items():
+        print(f"{name:>20} {best * 1000:>10.1f} {median * 1000:>12.1f}")
+    within = times['checker --no-cache'][0] <= budget
+    print(f"Budget {budget * 1000:.0f} ms: {'ok' if within else 'EXCEEDED'}")
+    return within
+
+def deprecated_snippet(old):
+    """Return a line of code that uses a deprecated-method literal."""
+    if old.startswith('pd.') and old.endswith('('):
+        return f"result = {old}df)"
+    if old.endswith('.'):
+        return f"result = {old}ols(df)"
+    if old.endswith('_'):
+        return f"result = {old}mean(df['value'], 3)"
+    if old.endswith(('()', '(inplace=True)')):
+        return f"df.{old}"
+    if old.endswith('['):
+        return f"row = df.{old}0]"
+    return f"result = df.{old}other)"
+
+def read_snippets():
+    """Return a line of code per file-reading call the file path rule knows about."""
+    from notebook_ast import file_path_call_names
+    return [f"data_{n} = {name}('data/input_{{}}.csv')" for n, name in enumerate(file_path_call_names(FILE_PATH_PATTERNS))]
+
+def write_corpus(directory, notebooks=20, cells=30, cell_lines=6, output_kb=4, density=0.2, seed=0):
+    """Write a synthetic notebook corpus and return the notebook paths.
+    
+    Each code cell has cell_lines lines of filler code; with probability
+    density a line is replaced, in equal shares, by a deprecated call drawn
+    from DEPRECATED_METHODS, a file read drawn from FILE_PATH_PATTERNS (half
+    of them name a file that exists under data/) or a line the fixer
+    rewrites. Every cell carries a text output of output_kb kilobytes. The
+    corpus depends only on the arguments and CORPUS_VERSION.
+    """
+    rng = random.Random(seed)
+    readers = read_snippets()
+    os.makedirs(os.path.join(directory, 'data'), exist_ok=True)
+    for n in range(0, 10, 2):
+        with open(os.path.join(directory, 'data', f'input_{n}.csv'), 'w', encoding='utf-8') as f:
+            f.write('a,b\n1,2\n')
+    output = ['x' * 1023 + '\n'] * output_kb
+    paths = []
+    for n in range(notebooks):
+        notebook = {'cells': [], 'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5}
+        notebook['cells'].append({'cell_type': 'markdown', 'metadata': {}, 'source': [f'# Notebook {n}\n']})
+        for i in range(cells):
+            lines = []
+            for j in range(cell_lines):
+                if rng.random() < density:
+                    kind = rng.randrange(3)
+                    if kind == 0:
+                        lines.append(deprecated_snippet(rng.choice(DEPRECATED_METHODS)[0]))
+                    elif kind == 1:
+                        lines.append(rng.choice(readers).format(rng.randrange(10)))
+                    else:
+                        lines.append(rng.choice(FIXABLE_SNIPPETS))
+                else:
+                    lines.append(f"df['col_{j}'] = df['col_{j}'].fillna(0) * {i + 1}")
+            notebook['cells'].append({
+                'cell_type': 'code',
+                'execution_count': i + 1,
+                'metadata': {},
+                'outputs': [{'name': 'stdout', 'output_type': 'stream', 'text': output}] if output_kb else [],
+                'source': [line + '\n' for line in lines[:-1]] + lines[-1:],
+            })
+        path = os.path.join(directory, f'synthetic_{n:04d}.ipynb')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(notebook, f, indent=1)
+        paths.append(path)
+    return paths
+
+def time_phases(paths):
+    """Time each tool on a corpus, split into load, scan, path check and write phases.
+    
+    The phases call the same pieces the tools are built from; the fixer's
+    write phase serializes in the file's own layout and writes the .bak
+    copy and the notebook atomically, as fix_notebook does. It writes into
+    the corpus, so pass a copy.
+    """
+    from advanced_notebook_checker import resolve_file_paths, scan_notebook
+    from fix_notebooks import json_format, write_atomic
+    from notebook_engine import LoadedNotebook, apply_fixes, run_rules
+    from notebook_paths import PathIndex
+    
+    timings = {
+        'advanced': {'load': 0.0, 'scan': 0.0, 'paths': 0.0},
+        'check': {'load': 0.0, 'scan': 0.0},
+        'fix': {'load': 0.0, 'scan': 0.0, 'write': 0.0},
+    }
+    path_index = PathIndex()
+    clock = time.perf_counter
+    for path in paths:
+        start = clock()
+        notebook = LoadedNotebook(path)
+        notebook.cells
+        loaded = clock()
+        issues = scan_notebook(path, notebook)
+        scanned = clock()
+        resolve_file_paths(issues, path, path_index)
+        resolved = clock()
+        timings['advanced']['load'] += loaded - start
+        timings['advanced']['scan'] += scanned - loaded
+        timings['advanced']['paths'] += resolved - scanned
+        
+        start = clock()
+        notebook = LoadedNotebook(path)
+        notebook.cells
+        loaded = clock()
+        run_rules('check', notebook)
+        timings['check']['load'] += loaded - start
+        timings['check']['scan'] += clock() - loaded
+        
+        start = clock()
+        notebook = LoadedNotebook(path, need_document=True)
+        notebook.cells
+        loaded = clock()
+        document = notebook.document
+        changed = False
+        for cell in notebook.cells:
+            source, messages = apply_fixes(cell)
+            if source != cell.source:
+                document['cells'][cell.index]['source'] = source.splitlines(keepends=True)
+                changed = True
+        fixed = clock()
+        if changed:
+            options, trailing_newline = json_format(notebook.text)
+            text = json.dumps(document, **options) + ('\n' if trailing_newline else '')
+            write_atomic(f"{path}.bak", notebook.text)
+            shutil.copystat(path, f"{path}.bak")
+            write_atomic(path, text)
+        timings['fix']['load'] += loaded - start
+        timings['fix']['scan'] += fixed - loaded
+        timings['fix']['write'] += clock() - fixed
+    return timings
+
+def time_tools(paths):
+    """Time the three tools' entry points end to end, with their output discarded."""
+    from advanced_notebook_checker import check_notebook_for_issues
+    from check_notebooks import check_notebook
+    from fix_notebooks import fix_notebook
+    
+    timings = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for tool, func in (('advanced', check_notebook_for_issues), ('check', check_notebook),
+                           ('fix', fix_notebook)):
+            start = time.perf_counter()
+            for path in paths:
+                func(path)
+            timings[tool] = time.perf_counter() - start
+    for path in paths:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(f"{path}.bak")
+    return timings
+
+def bench_tools(corpus, repeat=3):
+    """Time the tools per phase on a fresh copy of a synthetic corpus; keep the best run."""
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_corpus(tmp, **corpus)
+            size = sum(os.path.getsize(path) for path in paths)
+            phases = time_phases(paths)
+            paths = write_corpus(tmp, **corpus)
+            totals = time_tools(paths)
+        run = {tool: dict(phases[tool], total=totals[tool]) for tool in phases}
+        if best is None:
+            best = run
+        else:
+            for tool, tool_phases in run.items():
+                for phase, seconds in tool_phases.items():
+                    best[tool][phase] = min(best[tool][phase], seconds)
+    
+    print(f"Synthetic corpus: {corpus['notebooks']} notebooks, {size / (1024 * 1024):.1f} MB")
+    print(f"{'tool':>9} {'load (s)':>9} {'scan (s)':>9} {'paths (s)':>10} {'write (s)':>10} {'total (s)':>10}")
+    for tool, tool_phases in best.items():
+        cells = [f"{tool_phases[phase]:.4f}" if phase in tool_phases else '-'
+                 for phase in ('load', 'scan', 'paths', 'write', 'total')]
+        print(f"{tool:>9} {cells[0]:>9} {cells[1]:>9} {cells[2]:>10} {cells[3]:>10} {cells[4]:>10}")
+    return best
+
+def git_revision():
+    """Return the current git commit, or None outside a git checkout."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+def compare_history(history_path, entry, threshold=1.25):
+    """Print phases that got slower than the last run on the same corpus; return them."""
+    previous = None
+    if os.path.exists(history_path):
+        with open(history_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get('corpus') == entry['corpus']:
+                    previous = record
+    if previous is None:
+        print("\nNo earlier run on this corpus to compare with")
+        return []
+    regressions = []
+    for tool, tool_phases in entry['timings'].items():
+        for phase, seconds in tool_phases.items():
+            before = previous['timings'].get(tool, {}).get(phase)
+            # Ignore phases too short to time reliably
+            if before and seconds > before * threshold and seconds - before > 0.005:
+                regressions.append((tool, phase, before, seconds))
+    print(f"\nCompared with {previous.get('revision') or 'previous run'} ({previous['date']}):")
+    for tool, phase, before, seconds in regressions:
+        print(f"  REGRESSION {tool} {phase}: {before:.4f}s -> {seconds:.4f}s ({seconds / before:.2f}x)")
+    if not regressions:
+        print("  no phase is more than {:.0%} slower".format(threshold - 1))
+    return regressions
+
+def record_history(history_path, corpus, timings):
+    """Append a benchmark run to the history file and report regressions."""
+    entry = {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'corpus': dict(corpus, version=CORPUS_VERSION),
+        'timings': timings,
+    }
+    regressions = compare_history(history_path, entry)
+    with open(history_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+    return regressions
+
+def main():
+    """Run the benchmarks against a directory of notebooks or a synthetic corpus."""
+    parser = argparse.ArgumentParser(description='Benchmark the notebook checkers.')
+    parser.add_argument('directory', nargs='?', default='notebooks',
+                        help='Directory of notebooks for the component benchmarks (default: notebooks)')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='Time the three tools per phase on a generated corpus instead')
+    parser.add_argument('--notebooks', type=int, default=20, help='Synthetic notebooks (default: 20)')
+    parser.add_argument('--cells', type=int, default=30, help='Code cells per notebook (default: 30)')
+    parser.add_argument('--cell-lines', type=int, default=6, help='Lines per code cell (default: 6)')
+    parser.add_argument('--output-kb', type=int, default=4, help='Output size per cell in KB (default: 4)')
+    parser.add_argument('--density', type=float, default=0.2,
+                        help='Share of lines that are deprecated calls or file reads (default: 0.2)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the corpus generator (default: 0)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs to keep the best of (default: 3)')
+    parser.add_argument('--history', default=HISTORY_FILENAME,
+                        help=f'File the synthetic results are appended to (default: {HISTORY_FILENAME})')
+    parser.add_argument('--no-history', action='store_true', help='Do not record or compare the results')
+    parser.add_argument('--cold-start', action='store_true',
+                        help='Only time interpreter start-up plus one small notebook; fail above 100 ms')
+    args = parser.parse_args()
+    
+    if args.cold_start:
+        if not bench_cold_start():
+            sys.exit(1)
+        return
+    
+    if args.synthetic:
+        corpus = {
+            'notebooks': args.notebooks,
+            'cells': args.cells,
+            'cell_lines': args.cell_lines,
+            'output_kb': args.output_kb,
+            'density': args.density,
+            'seed': args.seed,
+        }
+        timings = bench_tools(corpus, args.repeat)
+        if not args.no_history and record_history(args.history, corpus, timings):
+            sys.exit(1)
+        return
+    
+    bench_matcher(args.directory)
+    bench_reader()
+    bench_path_index(args.directory)
+    bench_analysis(args.directory)
+    bench_cold_start()
+
+if __name__ == "__main__":
+    main()
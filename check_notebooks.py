@@ -3,126 +3,108 @@
 Script to check Jupyter notebooks for common errors and provide fixes.
 """
 
-import json
+import argparse
+import functools
 import os
-import re
 import sys
-from pathlib import Path
 
-def check_notebook(notebook_path):
-    """Check a notebook for common issues and suggest fixes."""
-    print(f"\nChecking notebook: {notebook_path}")
-    
-    with open(notebook_path, 'r', encoding='utf-8') as f:
-        notebook = json.load(f)
-    
-    issues = []
+from notebook_engine import LoadedNotebook, run_rules
+from notebook_git import add_git_arguments, describe_changes, git_notebooks
+from notebook_pipeline import add_discovery_arguments, add_early_exit_arguments, discover_notebooks, early_exit, record
+from notebook_pool import add_pool_arguments, iter_notebook_results
+from notebook_profile import RunProfile, add_profile_arguments, profile_call, profiling_enabled
+
+def check_notebook(notebook_path, notebook=None):
+    """Check a notebook for common issues and suggest fixes.
     
-    # Check for cells with code
-    for i, cell in enumerate(notebook['cells']):
-        if cell['cell_type'] == 'code':
-            source = ''.join(cell['source'])
-            
-            # Check for deprecated pandas methods
-            if 'get_dtype_counts()' in source:
-                issues.append({
-                    'cell_index': i,
-                    'issue': 'Deprecated method: get_dtype_counts()',
-                    'fix': 'Replace with: dtypes.value_counts()',
-                    'code': source,
-                    'fixed_code': source.replace('get_dtype_counts()', 'dtypes.value_counts()')
-                })
-            
-            # Check for list subtraction
-            list_subtraction = re.search(r'\[[^\]]*\]\s*-\s*\d+', source)
-            if list_subtraction:
-                match = list_subtraction.group(0)
-                list_part = re.search(r'\[[^\]]*\]', match).group(0)
-                num_part = re.search(r'\d+', match.split('-')[1]).group(0)
-                issues.append({
-                    'cell_index': i,
-                    'issue': f'Unsupported operation: {match}',
-                    'fix': f'Replace with: [x - {num_part} for x in {list_part}] or np.array({list_part}) - {num_part}',
-                    'code': source,
-                    'fixed_code': source.replace(match, f'[x - {num_part} for x in {list_part}]')
-                })
-            
-            # Check for pd.set_option with multiple options
-            set_option_match = re.search(r"pd\.set_option\(['\"]([^'\"]+)['\"],\s*[^,]+,\s*['\"]([^'\"]+)['\"]", source)
-            if set_option_match:
-                opt1 = set_option_match.group(1)
-                opt2 = re.search(r"pd\.set_option\([^,]+,\s*[^,]+,\s*['\"]([^'\"]+)['\"]", source).group(1)
-                val1 = re.search(r"pd\.set_option\([^,]+,\s*([^,]+),", source).group(1)
-                val2 = re.search(r"pd\.set_option\([^,]+,\s*[^,]+,\s*[^,]+,\s*([^)]+)", source).group(1)
-                
-                # Check if display. prefix is missing
-                if not opt1.startswith('display.'):
-                    opt1 = f'display.{opt1}'
-                if not opt2.startswith('display.'):
-                    opt2 = f'display.{opt2}'
-                
-                fix = f"pd.set_option('{opt1}', {val1})\npd.set_option('{opt2}', {val2})"
-                issues.append({
-                    'cell_index': i,
-                    'issue': 'Multiple options in pd.set_option()',
-                    'fix': 'Split into separate calls',
-                    'code': source,
-                    'fixed_code': source.replace(set_option_match.group(0), fix)
-                })
-            
-            # Check for missing display. prefix in pd.set_option
-            set_option_single = re.search(r"pd\.set_option\(['\"](?!display\.)([^'\"]+)['\"]", source)
-            if set_option_single and not set_option_match:
-                opt = set_option_single.group(1)
-                fixed = source.replace(f"'{opt}'", f"'display.{opt}'")
-                issues.append({
-                    'cell_index': i,
-                    'issue': f"Missing 'display.' prefix in option: {opt}",
-                    'fix': f"Add 'display.' prefix: 'display.{opt}'",
-                    'code': source,
-                    'fixed_code': fixed
-                })
+    A LoadedNotebook shared with the other tools can be passed in to avoid
+    reading the file again.
+    """
+    print(f"\nChecking notebook: {notebook_path}")
     
-    return issues
+    if notebook is None:
+        notebook = LoadedNotebook(notebook_path)
+    return run_rules('check', notebook)
+
+def print_check_summary(all_issues):
+    """Print every issue found, with the original and fixed code."""
+    if all_issues:
+        print("\n\n===== SUMMARY OF ISSUES =====")
+        for notebook, issues in all_issues.items():
+            print(f"\n{notebook}: {len(issues)} issues found")
+            for i, issue in enumerate(issues):
+                print(f"  {i+1}. Cell {issue['cell_index']}: {issue['issue']}")
+                print(f"     Fix: {issue['fix']}")
+                print(f"     Original code: {issue['code'].strip()}")
+                print(f"     Fixed code: {issue['fixed_code'].strip()}")
+    else:
+        print("\nNo issues found in any notebooks!")
 
 def main():
     """Main function to check all notebooks in a directory."""
-    if len(sys.argv) < 2:
-        print("Usage: python check_notebooks.py <directory>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Check Jupyter notebooks for common errors and suggest fixes.')
+    parser.add_argument('directory', help='Directory containing .ipynb files')
+    add_pool_arguments(parser)
+    add_discovery_arguments(parser)
+    add_early_exit_arguments(parser)
+    add_profile_arguments(parser)
+    add_git_arguments(parser)
+    args = parser.parse_args()
     
-    directory = sys.argv[1]
+    directory = args.directory
     
     if not os.path.isdir(directory):
         print(f"Error: {directory} is not a directory")
         sys.exit(1)
     
-    notebooks = list(Path(directory).glob('*.ipynb'))
-    
-    if not notebooks:
-        print(f"No notebooks found in {directory}")
-        sys.exit(0)
+    notebooks, check = git_notebooks(parser, args, check_notebook)
+    if notebooks is None:
+        notebooks = discover_notebooks(args)
     
-    print(f"Found {len(notebooks)} notebooks in {directory}")
+    print(f"Checking notebooks in {directory}{describe_changes(args)}")
     
     all_issues = {}
+    failed_notebooks = {}
+    seen = []
     
-    for notebook in notebooks:
-        issues = check_notebook(str(notebook))
+    run_profile = None
+    if profiling_enabled(args):
+        run_profile = RunProfile()
+        check = functools.partial(profile_call, check)
+    
+    # discover -> check -> report, one notebook at a time
+    results = iter_notebook_results(check, record(notebooks, seen), args.jobs, args.timeout)
+    if run_profile is not None:
+        results = run_profile.collect(results)
+    stop = early_exit(args)
+    if stop is not None:
+        results = stop.apply(results)
+    
+    for notebook, issues, error in results:
+        if error:
+            print(f"\nError checking notebook {notebook}: {error}")
+            failed_notebooks[notebook] = error
+            continue
         if issues:
-            all_issues[str(notebook)] = issues
+            all_issues[notebook] = issues
     
-    if all_issues:
-        print("\n\n===== SUMMARY OF ISSUES =====")
-        for notebook, issues in all_issues.items():
-            print(f"\n{notebook}: {len(issues)} issues found")
-            for i, issue in enumerate(issues):
-                print(f"  {i+1}. Cell {issue['cell_index']}: {issue['issue']}")
-                print(f"     Fix: {issue['fix']}")
-                print(f"     Original code: {issue['code'].strip()}")
-                print(f"     Fixed code: {issue['fixed_code'].strip()}")
-    else:
-        print("\nNo issues found in any notebooks!")
+    if not seen:
+        print(f"No notebooks found in {directory}{describe_changes(args)}")
+        sys.exit(0)
+    
+    print_check_summary(all_issues)
+    
+    if failed_notebooks:
+        print(f"\n{len(failed_notebooks)} notebooks could not be checked:")
+        for notebook, error in failed_notebooks.items():
+            print(f"  {notebook}: {error}")
+    
+    if run_profile is not None:
+        run_profile.finish(args.profile_output)
+    
+    if stop is not None and stop.reason:
+        print(f"\nStopped early ({stop.reason})")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+Script to move large and repeated cell outputs out of Jupyter notebooks into a shared store.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from fix_notebooks import json_format, write_atomic
+from notebook_pipeline import add_discovery_arguments, discover_notebooks
+
+STORE_DIRNAME = '.notebook_outputs'
+
+# Output metadata key listing the [mime type, position in the original bundle, digest] of each payload moved out
+EXTERNAL_KEY = 'external_outputs'
+
+# Notebook metadata key keeping the original ensure_ascii when the compacted text no longer shows it
+LAYOUT_KEY = 'external_outputs_layout'
+
+DEFAULT_THRESHOLD_KB = 4
+
+class OutputStore:
+    """Content-addressed store of output payloads, shared by the notebooks of a directory tree.
+    
+    Each payload is kept once, as JSON, under the SHA-256 of that JSON, so
+    identical outputs in any number of cells and notebooks cost one file.
+    """
+    
+    def __init__(self, directory):
+        self.root = os.path.join(directory, STORE_DIRNAME)
+        self.written = 0
+        self.reused = 0
+        self.bytes_written = 0
+        self._seen = set()
+    
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:] + '.json')
+    
+    def put(self, payload, dry_run=False):
+        """Store a payload and return its digest."""
+        text = json.dumps(payload, ensure_ascii=False)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        path = self._path(digest)
+        # Remembered, so a dry run counts repeats of a payload it did not write as shared
+        if digest in self._seen or os.path.exists(path):
+            self.reused += 1
+            return digest
+        self._seen.add(digest)
+        self.written += 1
+        self.bytes_written += len(text.encode('utf-8'))
+        if not dry_run:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, text)
+        return digest
+    
+    def get(self, digest):
+        """Return the payload stored under digest; raise FileNotFoundError if it is missing."""
+        with open(self._path(digest), encoding='utf-8') as f:
+            return json.load(f)
+
+def _rich_outputs(document):
+    """Yield the outputs of every code cell that carry a MIME bundle."""
+    for cell in document.get('cells', []):
+        if cell.get('cell_type') != 'code':
+            continue
+        for output in cell.get('outputs', []):
+            if output.get('output_type') in ('display_data', 'execute_result'):
+                yield output
+
+def compact_document(document, store, threshold, dry_run=False):
+    """Move images and payloads of threshold bytes or more out of a notebook; return how many.
+    
+    text/plain stays, so every output keeps a readable fallback. The
+    output's metadata records where each payload was in the original MIME
+    bundle, so that rehydrate_document restores the notebook exactly. An
+    output compacted before keeps its moved payloads and only has the ones
+    the threshold newly catches added; one with nothing new is left alone.
+    """
+    moved = 0
+    for output in _rich_outputs(document):
+        data = output.get('data', {})
+        metadata = output.get('metadata', {})
+        # The bundle in its original key order: (mime, payload, digest if moved out already)
+        bundle = [(mime, payload, None) for mime, payload in data.items()]
+        for mime, position, digest in sorted(metadata.get(EXTERNAL_KEY, []), key=lambda entry: entry[1]):
+            bundle.insert(position, (mime, None, digest))
+        new = 0
+        external = []
+        kept = {}
+        for position, (mime, payload, digest) in enumerate(bundle):
+            if digest is None and mime != 'text/plain':
+                size = len(json.dumps(payload, ensure_ascii=False))
+                if mime.startswith('image/') or size >= threshold:
+                    digest = store.put(payload, dry_run)
+                    new += 1
+            if digest is None:
+                kept[mime] = payload
+            else:
+                external.append([mime, position, digest])
+        if new:
+            output['data'] = kept
+            output.setdefault('metadata', {})[EXTERNAL_KEY] = external
+            moved += new
+    return moved
+
+def rehydrate_document(document, store):
+    """Put every payload moved out by compact_document back in place; return how many."""
+    restored = 0
+    for output in _rich_outputs(document):
+        external = output.get('metadata', {}).pop(EXTERNAL_KEY, None)
+        if not external:
+            continue
+        items = list(output.get('data', {}).items())
+        for mime, position, digest in sorted(external, key=lambda entry: entry[1]):
+            items.insert(position, (mime, store.get(digest)))
+        output['data'] = dict(items)
+        restored += len(external)
+    return restored
+
+def compact_notebook(notebook_path, store, threshold, rehydrate=False, dry_run=False):
+    """Compact or rehydrate one notebook in place; return (bytes before, bytes after, payloads)."""
+    with open(notebook_path, encoding='utf-8') as f:
+        original = f.read()
+    document = json.loads(original)
+    options, trailing_newline = json_format(original)
+    layout = document.get('metadata', {}).pop(LAYOUT_KEY, None)
+    if layout is not None:
+        options['ensure_ascii'] = layout['ensure_ascii']
+    
+    if rehydrate:
+        count = rehydrate_document(document, store)
+    else:
+        count = compact_document(document, store, threshold, dry_run)
+    if not count:
+        return len(original.encode('utf-8')), len(original.encode('utf-8')), 0
+    
+    text = json.dumps(document, **options) + ('\n' if trailing_newline else '')
+    # Moving out every non-ASCII payload leaves text that looks written with ensure_ascii
+    if not rehydrate and json_format(text)[0]['ensure_ascii'] != options['ensure_ascii']:
+        document.setdefault('metadata', {})[LAYOUT_KEY] = {'ensure_ascii': options['ensure_ascii']}
+        text = json.dumps(document, **options) + ('\n' if trailing_newline else '')
+    if not dry_run:
+        write_atomic(notebook_path, text)
+    return len(original.encode('utf-8')), len(text.encode('utf-8')), count
+
+def main():
+    """Main function to compact or rehydrate all notebooks in a directory."""
+    parser = argparse.ArgumentParser(description='Move large and repeated cell outputs out of Jupyter notebooks '
+                                                 'into a content-addressed store next to them.')
+    parser.add_argument('directory', help='Directory containing .ipynb files')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD_KB, metavar='KB',
+                        help='Move out payloads of this many KB or more; images always move '
+                             f'(default: {DEFAULT_THRESHOLD_KB})')
+    parser.add_argument('--rehydrate', action='store_true',
+                        help='Put the moved payloads back, restoring the original notebooks')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report the size reduction without writing anything')
+    add_discovery_arguments(parser)
+    args = parser.parse_args()
+    
+    directory = args.directory
+    
+    if not os.path.isdir(directory):
+        print(f"Error: {directory} is not a directory")
+        sys.exit(1)
+    
+    notebooks = sorted(discover_notebooks(args))
+    
+    if not notebooks:
+        print(f"No notebooks found in {directory}")
+        sys.exit(0)
+    
+    print(f"Found {len(notebooks)} notebooks in {directory}")
+    
+    store = OutputStore(directory)
+    threshold = int(args.threshold * 1024)
+    total_before = total_after = total_payloads = 0
+    failed_notebooks = {}
+    start = time.perf_counter()
+    for notebook in notebooks:
+        try:
+            before, after, payloads = compact_notebook(notebook, store, threshold,
+                                                       args.rehydrate, args.dry_run)
+        except (OSError, ValueError) as e:
+            failed_notebooks[notebook] = f"{type(e).__name__}: {e}"
+            continue
+        total_before += before
+        total_after += after
+        total_payloads += payloads
+        if payloads:
+            print(f"  {notebook}: {before / 1024:.0f} KB -> {after / 1024:.0f} KB ({payloads} payloads)")
+    elapsed = time.perf_counter() - start
+    
+    if args.rehydrate:
+        print(f"\nRestored {total_payloads} payloads: {total_before / 1e6:.2f} MB -> {total_after / 1e6:.2f} MB "
+              f"in {elapsed:.1f}s")
+    else:
+        saved = total_before - total_after
+        share = saved / total_before * 100 if total_before else 0.0
+        prefix = "Would move" if args.dry_run else "Moved"
+        print(f"\n{prefix} {total_payloads} payloads out of the notebooks: {total_before / 1e6:.2f} MB -> "
+              f"{total_after / 1e6:.2f} MB ({share:.0f}% smaller) in {elapsed:.1f}s")
+        print(f"Store {store.root}: {store.written} new payloads ({store.bytes_written / 1e6:.2f} MB), "
+              f"{store.reused} duplicates shared")
+    
+    if failed_notebooks:
+        print(f"\n{len(failed_notebooks)} notebooks could not be processed:")
+        for notebook, error in failed_notebooks.items():
+            print(f"  {notebook}: {error}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Script to convert the CSV files the notebooks read into memory-mappable Feather copies.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from notebook_data import COLUMNAR_DIRNAME, compile_data_assets, manifest_path
+
+def main():
+    """Main function to compile the CSV files of a data directory."""
+    parser = argparse.ArgumentParser(description='Convert the CSV files of a data directory to Feather '
+                                                 'and write a manifest of their schema, rows and hash.')
+    parser.add_argument('directory', nargs='?', default=os.path.join('notebooks', 'data'),
+                        help='Data directory to compile (default: notebooks/data)')
+    parser.add_argument('--force', action='store_true',
+                        help='Convert every CSV again, even if it is unchanged')
+    args = parser.parse_args()
+    
+    directory = args.directory
+    
+    if not os.path.isdir(directory):
+        print(f"Error: {directory} is not a directory")
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    try:
+        manifest = compile_data_assets(directory, force=args.force, log=sys.stdout)
+    except ImportError as e:
+        print(f"Error: compiling data needs pandas and pyarrow: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    
+    columnar_dir = os.path.join(directory, COLUMNAR_DIRNAME)
+    size = sum(os.path.getsize(os.path.join(columnar_dir, asset['feather']))
+               for asset in manifest['assets'].values())
+    print(f"\n{len(manifest['assets'])} CSV files compiled ({size / 1e6:.1f} MB of Feather), "
+          f"{len(manifest['skipped'])} skipped, in {elapsed:.1f}s")
+    print(f"Manifest written to {manifest_path(directory)}")
+
+if __name__ == "__main__":
+    main()
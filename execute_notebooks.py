@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+"""
+Script to run Jupyter notebooks on a pool of warm kernels and report the cells that fail.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from advanced_notebook_checker import print_advanced_summary, report_notebooks
+from notebook_pipeline import add_discovery_arguments, discover_notebooks
+
+# Imported into every kernel once at start-up, so notebooks do not pay for them
+WARM_UP_MODULES = ('numpy', 'pandas', 'matplotlib.pyplot')
+
+WARM_UP_CODE = """
+import importlib as _importlib
+for _name in {modules!r}:
+    try:
+        _importlib.import_module(_name)
+    except ImportError:
+        pass
+del _importlib, _name
+""".format(modules=WARM_UP_MODULES)
+
+# Opt-in: serve plain pd.read_csv calls from the columnar copies made by compile_data.py
+COLUMNAR_CODE = """
+import sys as _sys
+if {root!r} not in _sys.path:
+    _sys.path.append({root!r})
+import notebook_data as _notebook_data
+_notebook_data.install()
+del _sys, _notebook_data
+""".format(root=os.path.dirname(os.path.abspath(__file__)))
+
+# Run between notebooks: a fresh namespace, default pandas options, no open
+# figures, matplotlib's own rc settings (undoing plt.style.use and rcParams
+# edits), and the notebook's directory as the working directory
+RESET_CODE = """
+get_ipython().run_line_magic('reset', '-f')
+import os as _os, sys as _sys, warnings as _warnings
+_os.chdir({directory!r})
+if 'matplotlib.pyplot' in _sys.modules:
+    _sys.modules['matplotlib.pyplot'].close('all')
+if 'matplotlib' in _sys.modules:
+    _sys.modules['matplotlib'].rc_file_defaults()
+if 'pandas' in _sys.modules:
+    with _warnings.catch_warnings():
+        _warnings.simplefilter('ignore')
+        _sys.modules['pandas'].reset_option('^(?!plotting[.])')
+        try:
+            # Validating the plotting backend imports it, which may not be installed
+            _sys.modules['pandas'].reset_option('^plotting[.]')
+        except ImportError:
+            pass
+del _os, _sys, _warnings
+"""
+
+_ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+class KernelError(RuntimeError):
+    """Raised when a kernel cannot be started or fails to run set-up code."""
+
+class WarmKernel:
+    """A kernel started once, with the heavy imports done, reused for many notebooks."""
+    
+    def __init__(self, kernel_name='python3', startup_timeout=60, socket_path=None, columnar_data=False):
+        self.kernel_name = kernel_name
+        self.columnar_data = columnar_data
+        self.startup_timeout = startup_timeout
+        self.socket_path = socket_path
+        self.km = None
+        self.kc = None
+    
+    async def start(self):
+        from jupyter_client.manager import AsyncKernelManager
+    
+        if self.socket_path is not None:
+            # Unix sockets: no TCP ports to allocate and no traffic on the network
+            self.km = AsyncKernelManager(kernel_name=self.kernel_name, transport='ipc', ip=self.socket_path)
+        else:
+            self.km = AsyncKernelManager(kernel_name=self.kernel_name)
+        await self.km.start_kernel()
+        await self._connect()
+    
+    async def _connect(self):
+        self.kc = self.km.client()
+        self.kc.allow_stdin = False
+        self.kc.start_channels()
+        await self.kc.wait_for_ready(timeout=self.startup_timeout)
+        await self.run(WARM_UP_CODE)
+        if self.columnar_data:
+            await self.run(COLUMNAR_CODE)
+    
+    async def run(self, code, timeout=None):
+        """Run set-up code silently, raising KernelError if it fails."""
+        reply = await self.kc.execute_interactive(code, silent=True, store_history=False, allow_stdin=False,
+                                                  timeout=timeout or self.startup_timeout,
+                                                  output_hook=lambda msg: None)
+        content = reply['content']
+        if content['status'] != 'ok':
+            raise KernelError(f"{content.get('ename')}: {content.get('evalue')}")
+    
+    async def restart(self):
+        """Replace a kernel that died or timed out with a freshly warmed one."""
+        self.kc.stop_channels()
+        await self.km.restart_kernel(now=True)
+        await self._connect()
+    
+    async def shutdown(self):
+        if self.kc is not None:
+            self.kc.stop_channels()
+        if self.km is not None and await self.km.is_alive():
+            await self.km.shutdown_kernel(now=True)
+
+def format_traceback(traceback, max_lines=12):
+    """Return the last lines of a kernel traceback without terminal colours."""
+    lines = _ANSI_ESCAPE.sub('', '\n'.join(traceback)).strip().splitlines()
+    if len(lines) > max_lines:
+        lines = ['...'] + lines[-max_lines:]
+    return '\n'.join(f'         {line}' for line in lines)
+
+def cell_error_issues(nb):
+    """Return an issue for every code cell with an error output, in the advanced checker's format."""
+    issues = []
+    for index, cell in enumerate(nb.cells):
+        if cell.cell_type != 'code':
+            continue
+        for output in cell.get('outputs', []):
+            if output.get('output_type') == 'error':
+                issues.append({
+                    'cell_index': index,
+                    'issue': f"Execution failed: {output.get('ename')}: {output.get('evalue')}",
+                    'fix': 'Fix the cell so it runs; traceback:\n' + format_traceback(output.get('traceback', [])),
+                    'code': cell.source,
+                    'severity': 'high'
+                })
+                break
+    return issues
+
+async def execute_notebook(kernel, notebook_path, cell_timeout=120, allow_errors=False):
+    """Run a notebook on a warm kernel and return the issues for the cells that failed.
+    
+    With allow_errors, every cell is run and every failure reported;
+    otherwise the notebook stops at its first failing cell, as
+    `jupyter nbconvert --execute` does. The notebook file is not modified.
+    """
+    import nbformat
+    from nbclient import NotebookClient
+    from nbclient.exceptions import CellExecutionError, CellTimeoutError, DeadKernelError
+    
+    nb = nbformat.read(notebook_path, as_version=4)
+    await kernel.run(RESET_CODE.format(directory=os.path.dirname(os.path.abspath(notebook_path))))
+    
+    current = {'index': None}
+    
+    def on_cell_start(cell, cell_index):
+        current['index'] = cell_index
+    
+    # Without interrupt_on_timeout nbclient raises CellTimeoutError; interrupting
+    # instead would only show up as a KeyboardInterrupt in the cell
+    client = NotebookClient(nb, km=kernel.km, timeout=cell_timeout, allow_errors=allow_errors,
+                            interrupt_on_timeout=False, kernel_name=kernel.kernel_name,
+                            on_cell_start=on_cell_start)
+    # Reuse the kernel's client instead of letting nbclient open a new one per notebook
+    client.kc = kernel.kc
+    
+    try:
+        await client.async_execute()
+    except CellTimeoutError:
+        index = current['index']
+        await kernel.restart()
+        return cell_error_issues(nb) + [{
+            'cell_index': index,
+            'issue': f'Execution timed out after {cell_timeout} seconds',
+            'fix': 'Make the cell faster or raise --cell-timeout',
+            'code': nb.cells[index].source,
+            'severity': 'high'
+        }]
+    except DeadKernelError:
+        index = current['index']
+        await kernel.restart()
+        return cell_error_issues(nb) + [{
+            'cell_index': index,
+            'issue': 'Execution failed: the kernel died',
+            'fix': 'Check the cell for crashes or excessive memory use',
+            'code': nb.cells[index].source,
+            'severity': 'high'
+        }]
+    except CellExecutionError:
+        pass
+    return cell_error_issues(nb)
+
+async def run_notebooks(notebooks, kernels=4, cell_timeout=120, allow_errors=False, kernel_name='python3',
+                        columnar_data=False):
+    """Run notebooks on a pool of warm kernels; return {notebook: (issues, seconds, error)}.
+    
+    Each kernel takes the next notebook from a shared queue as soon as it is
+    free. A notebook that cannot be run at all (it does not parse, or its
+    kernel cannot be reset) gets an error message instead of issues.
+    """
+    queue = asyncio.Queue()
+    for notebook in notebooks:
+        queue.put_nowait(notebook)
+    socket_dir = tempfile.mkdtemp(prefix='notebook-kernels-') if os.name == 'posix' else None
+    pool = [
+        WarmKernel(kernel_name, socket_path=socket_dir and os.path.join(socket_dir, f'kernel-{n}'),
+                   columnar_data=columnar_data)
+        for n in range(max(1, min(kernels, len(notebooks))))
+    ]
+    results = {}
+    
+    async def worker(kernel):
+        while not queue.empty():
+            notebook = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                issues, error = await execute_notebook(kernel, notebook, cell_timeout, allow_errors), None
+            except Exception as e:
+                issues, error = None, f'{type(e).__name__}: {e}'
+                with contextlib.suppress(Exception):
+                    await kernel.restart()
+            seconds = time.perf_counter() - start
+            results[notebook] = (issues, seconds, error)
+            status = error or (f'{len(issues)} failing cells' if issues else 'ok')
+            print(f"Executed notebook: {notebook} ({status}, {seconds:.1f}s)", file=sys.stderr)
+    
+    try:
+        await asyncio.gather(*(kernel.start() for kernel in pool))
+        await asyncio.gather(*(worker(kernel) for kernel in pool))
+    finally:
+        await asyncio.gather(*(kernel.shutdown() for kernel in pool), return_exceptions=True)
+        if socket_dir is not None:
+            shutil.rmtree(socket_dir, ignore_errors=True)
+    return results
+
+def main():
+    """Main function to execute all notebooks in a directory."""
+    parser = argparse.ArgumentParser(description='Run Jupyter notebooks on warm kernels and report failing cells.')
+    parser.add_argument('directory', help='Directory containing .ipynb files')
+    parser.add_argument('--kernels', '-k', type=int, default=min(os.cpu_count() or 1, 8),
+                        help='Number of kernels run in parallel (default: CPU count, at most 8)')
+    parser.add_argument('--cell-timeout', type=int, default=120,
+                        help='Seconds allowed per cell (default: 120)')
+    parser.add_argument('--allow-errors', action='store_true',
+                        help='Keep running after a failing cell and report every failure')
+    parser.add_argument('--columnar-data', action='store_true',
+                        help='Serve unchanged CSV files from the Feather copies made by compile_data.py')
+    parser.add_argument('--kernel-name', default='python3', help='Jupyter kernel to use (default: python3)')
+    parser.add_argument('--format', choices=('text', 'jsonl', 'sarif'), default='text',
+                        help='Report format (default: text)')
+    parser.add_argument('--output', '-o',
+                        help='Write the jsonl or sarif report to this file instead of stdout')
+    add_discovery_arguments(parser)
+    args = parser.parse_args()
+    
+    directory = args.directory
+    
+    if not os.path.isdir(directory):
+        print(f"Error: {directory} is not a directory")
+        sys.exit(1)
+    
+    notebooks = sorted(discover_notebooks(args))
+    
+    if not notebooks:
+        print(f"No notebooks found in {directory}")
+        sys.exit(0)
+    
+    log = sys.stdout if args.format == 'text' else sys.stderr
+    print(f"Found {len(notebooks)} notebooks in {directory}", file=log)
+    print(f"Running them on {min(args.kernels, len(notebooks))} warm kernels", file=log)
+    
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(run_notebooks(notebooks, args.kernels, args.cell_timeout, args.allow_errors,
+                                            args.kernel_name, args.columnar_data))
+    except (KernelError, RuntimeError, TimeoutError) as e:
+        print(f"Error: could not start the kernels: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    ordered = [(notebook, *results[notebook]) for notebook in notebooks]
+    
+    if args.format != 'text':
+        from notebook_report import make_report
+        with contextlib.ExitStack() as stack:
+            out = sys.stdout
+            if args.output:
+                out = stack.enter_context(open(args.output, 'w', encoding='utf-8'))
+            report_notebooks(((notebook, issues, error) for notebook, issues, _, error in ordered),
+                             make_report(args.format, out, 'execute_notebooks'))
+    else:
+        print_advanced_summary({notebook: issues for notebook, issues, _, error in ordered if issues})
+        failed_notebooks = {notebook: error for notebook, _, _, error in ordered if error}
+        if failed_notebooks:
+            print(f"\n{len(failed_notebooks)} notebooks could not be run:")
+            for notebook, error in failed_notebooks.items():
+                print(f"  {notebook}: {error}")
+    
+    notebook_seconds = sum(seconds for _, _, seconds, _ in ordered)
+    print(f"\nRan {len(notebooks)} notebooks in {elapsed:.1f}s "
+          f"({notebook_seconds:.1f}s of notebook time)", file=log)
+    
+    if any(issues or error for _, issues, _, error in ordered):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,125 +3,180 @@
 Script to fix common issues in Jupyter notebooks.
 """
 
+import argparse
+import contextlib
+import difflib
+import functools
 import json
 import os
 import re
-import sys
-from pathlib import Path
 import shutil
+import stat
+import sys
+import tempfile
 
-def fix_notebook(notebook_path):
-    """Fix common issues in a notebook and save the changes."""
-    print(f"\nFixing notebook: {notebook_path}")
+from notebook_engine import LoadedNotebook, apply_fixes
+from notebook_git import add_git_arguments, describe_changes, git_notebooks
+from notebook_pipeline import add_discovery_arguments, discover_notebooks, record
+from notebook_pool import add_pool_arguments, iter_notebook_results
+
+def json_format(text):
+    """Return the json.dumps arguments and trailing newline that reproduce a file's layout."""
+    indent = None
+    match = re.match(r'[\[{]\n([ \t]+)\S', text)
+    if match:
+        whitespace = match.group(1)
+        indent = whitespace if '\t' in whitespace else len(whitespace)
+    options = {'indent': indent, 'ensure_ascii': text.isascii()}
+    if indent is None and '": ' not in text:
+        options['separators'] = (',', ':')
+    return options, text.endswith('\n')
+
+def write_atomic(path, text):
+    """Replace a file's contents so that readers see either the old or the new file.
     
-    # Create a backup of the original file
-    backup_path = f"{notebook_path}.bak"
-    shutil.copy2(notebook_path, backup_path)
-    print(f"Created backup at: {backup_path}")
+    The text goes to a temporary file in the same directory, which is synced
+    and then renamed over path, keeping the original file's permissions.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        with contextlib.suppress(FileNotFoundError):
+            os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+def fix_notebook(notebook_path, notebook=None, backup=True, dry_run=False, root=None):
+    """Fix common issues in a notebook and save the changes.
+    
+    All fixes are made in memory first. Only a notebook that actually
+    changed is written, atomically, with its original JSON layout and each
+    edited cell's source split into lines as Jupyter does; with backup, its
+    original is saved to a .bak file first. With dry_run nothing is written
+    and a unified diff of the changes is printed instead, naming the file
+    relative to root (by default its own directory) as git does. A
+    LoadedNotebook shared with the other tools can be passed in to avoid
+    reading the file again.
+    """
+    print(f"\nFixing notebook: {notebook_path}")
     
-    with open(notebook_path, 'r', encoding='utf-8') as f:
-        notebook = json.load(f)
+    if notebook is None:
+        notebook = LoadedNotebook(notebook_path, need_document=True)
+    original = notebook.text
+    document = notebook.document
     
     fixes_made = 0
+    changed = False
     
     # Fix cells with code
-    for i, cell in enumerate(notebook['cells']):
-        if cell['cell_type'] == 'code':
-            source = ''.join(cell['source'])
-            original_source = source
-            
-            # Fix deprecated pandas methods
-            if 'get_dtype_counts()' in source:
-                source = source.replace('get_dtype_counts()', 'dtypes.value_counts()')
-                fixes_made += 1
-                print(f"  Fixed: Replaced 'get_dtype_counts()' with 'dtypes.value_counts()' in cell {i}")
-            
-            # Fix list subtraction
-            list_subtraction = re.search(r'\[[^\]]*\]\s*-\s*\d+', source)
-            if list_subtraction:
-                match = list_subtraction.group(0)
-                list_part = re.search(r'\[[^\]]*\]', match).group(0)
-                num_part = re.search(r'\d+', match.split('-')[1]).group(0)
-                replacement = f'np.array({list_part}) - {num_part}'
-                source = source.replace(match, replacement)
-                fixes_made += 1
-                print(f"  Fixed: Replaced '{match}' with '{replacement}' in cell {i}")
-            
-            # Fix pd.set_option with multiple options
-            set_option_match = re.search(r"pd\.set_option\(['\"]([^'\"]+)['\"],\s*([^,]+),\s*['\"]([^'\"]+)['\"],\s*([^)]+)\)", source)
-            if set_option_match:
-                opt1 = set_option_match.group(1)
-                val1 = set_option_match.group(2)
-                opt2 = set_option_match.group(3)
-                val2 = set_option_match.group(4)
-                
-                # Add display. prefix if missing
-                if not opt1.startswith('display.'):
-                    opt1 = f'display.{opt1}'
-                if not opt2.startswith('display.'):
-                    opt2 = f'display.{opt2}'
-                
-                replacement = f"pd.set_option('{opt1}', {val1})\npd.set_option('{opt2}', {val2})"
-                source = source.replace(set_option_match.group(0), replacement)
-                fixes_made += 1
-                print(f"  Fixed: Split multiple pd.set_option calls in cell {i}")
-            
-            # Fix missing display. prefix in pd.set_option
-            set_option_single = re.search(r"pd\.set_option\(['\"](?!display\.)([^'\"]+)['\"]", source)
-            if set_option_single and not set_option_match:
-                opt = set_option_single.group(1)
-                source = source.replace(f"'{opt}'", f"'display.{opt}'")
-                fixes_made += 1
-                print(f"  Fixed: Added 'display.' prefix to '{opt}' in cell {i}")
-            
-            # Update the cell source if changes were made
-            if source != original_source:
-                notebook['cells'][i]['source'] = [source]
-    
-    if fixes_made > 0:
-        # Save the updated notebook
-        with open(notebook_path, 'w', encoding='utf-8') as f:
-            json.dump(notebook, f, indent=1)
-        print(f"Made {fixes_made} fixes to {notebook_path}")
-    else:
+    for cell in notebook.cells:
+        source, messages = apply_fixes(cell)
+        for message in messages:
+            fixes_made += 1
+            print(f"  Fixed: {message}")
+        
+        # Update the cell source if changes were made
+        if source != cell.source:
+            cell_json = document['cells'][cell.index]
+            if isinstance(cell_json['source'], list):
+                cell_json['source'] = source.splitlines(keepends=True)
+            else:
+                cell_json['source'] = source
+            changed = True
+    
+    if not changed:
         print(f"No issues to fix in {notebook_path}")
-        # Remove the backup if no changes were made
-        os.remove(backup_path)
-        print(f"Removed unnecessary backup: {backup_path}")
+        return fixes_made
+    
+    options, trailing_newline = json_format(original)
+    fixed = json.dumps(document, **options) + ('\n' if trailing_newline else '')
+    
+    if dry_run:
+        label = os.path.relpath(notebook_path, root or os.path.dirname(notebook_path) or os.curdir)
+        label = label.replace(os.sep, '/')
+        sys.stdout.writelines(difflib.unified_diff(
+            original.splitlines(keepends=True), fixed.splitlines(keepends=True),
+            f"a/{label}", f"b/{label}",
+        ))
+        print(f"Would make {fixes_made} fixes to {notebook_path}")
+        return fixes_made
+    
+    if backup:
+        backup_path = f"{notebook_path}.bak"
+        write_atomic(backup_path, original)
+        shutil.copystat(notebook_path, backup_path)
+        print(f"Created backup at: {backup_path}")
+    
+    write_atomic(notebook_path, fixed)
+    print(f"Made {fixes_made} fixes to {notebook_path}")
     
     return fixes_made
 
+def print_fix_summary(fixes_by_notebook, backup=True, dry_run=False):
+    """Print how many fixes were made in how many notebooks."""
+    total_fixes = sum(fixes_by_notebook.values())
+    fixed_notebooks = sum(1 for fixes in fixes_by_notebook.values() if fixes > 0)
+    if dry_run:
+        print(f"\nSummary: Would fix {total_fixes} issues in {fixed_notebooks} notebooks (dry run, nothing written)")
+        return
+    print(f"\nSummary: Fixed {total_fixes} issues in {fixed_notebooks} notebooks")
+    if backup:
+        print("Notebooks that were fixed have backups with the .bak extension")
+
 def main():
     """Main function to fix all notebooks in a directory."""
-    if len(sys.argv) < 2:
-        print("Usage: python fix_notebooks.py <directory>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Fix common issues in Jupyter notebooks.')
+    parser.add_argument('directory', help='Directory containing .ipynb files')
+    add_pool_arguments(parser)
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print a unified diff of the fixes instead of writing them')
+    parser.add_argument('--no-backup', action='store_true',
+                        help='Do not save a .bak copy of each notebook that is changed')
+    add_discovery_arguments(parser)
+    add_git_arguments(parser)
+    args = parser.parse_args()
     
-    directory = sys.argv[1]
+    directory = args.directory
     
     if not os.path.isdir(directory):
         print(f"Error: {directory} is not a directory")
         sys.exit(1)
     
-    notebooks = list(Path(directory).glob('*.ipynb'))
+    fix = functools.partial(fix_notebook, backup=not args.no_backup, dry_run=args.dry_run, root=directory)
+    notebooks, fix = git_notebooks(parser, args, fix, need_document=True)
+    if notebooks is None:
+        notebooks = discover_notebooks(args)
     
-    if not notebooks:
-        print(f"No notebooks found in {directory}")
-        sys.exit(0)
+    print(f"Fixing notebooks in {directory}{describe_changes(args)}")
     
-    print(f"Found {len(notebooks)} notebooks in {directory}")
+    fixes_by_notebook = {}
+    failed_notebooks = {}
+    seen = []
     
-    total_fixes = 0
-    fixed_notebooks = 0
+    for notebook, fixes, error in iter_notebook_results(fix, record(notebooks, seen), args.jobs, args.timeout):
+        if error:
+            print(f"\nError fixing notebook {notebook}: {error}")
+            failed_notebooks[notebook] = error
+            continue
+        fixes_by_notebook[notebook] = fixes
     
-    for notebook in notebooks:
-        fixes = fix_notebook(str(notebook))
-        total_fixes += fixes
-        if fixes > 0:
-            fixed_notebooks += 1
+    if not seen:
+        print(f"No notebooks found in {directory}{describe_changes(args)}")
+        sys.exit(0)
     
-    print(f"\nSummary: Fixed {total_fixes} issues in {fixed_notebooks} notebooks")
-    print("Notebooks that were fixed have backups with the .bak extension")
+    print_fix_summary(fixes_by_notebook, not args.no_backup, args.dry_run)
+    
+    if failed_notebooks:
+        print(f"\n{len(failed_notebooks)} notebooks could not be fixed:")
+        for notebook, error in failed_notebooks.items():
+            print(f"  {notebook}: {error}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+"""
+AST-based analysis of notebook code cells for the --analysis ast rules.
+"""
+
+import ast
+import functools
+import re
+
+# Names a notebook may use for the pandas module without importing it in the same cell
+PANDAS_ALIASES = frozenset({'pd', 'pandas'})
+
+# A line with its ending, split as the tokenizer does (not on form feeds)
+_LINE = re.compile(r'[^\r\n]*(?:\r\n|\r|\n)?')
+_ASSIGNED_MAGIC = re.compile(r'^(\s*[\w.]+\s*=\s*)[!%]')
+# %time and %timeit (or %%time and %%timeit) with their options, before the statement they run
+_TIMING_MAGIC = re.compile(r'%%?time(?:it)?(?:\s+-(?:[nrp]\s*\d+|[tcqo]))*(?:\s+|$)')
+
+class CallInfo:
+    """What the rules need to know about one call expression."""
+
+    __slots__ = ('name', 'method', 'receiver', 'args', 'first_string', 'keywords')
+
+    def __init__(self, name, method, receiver, args, first_string, keywords):
+        self.name = name
+        self.method = method
+        self.receiver = receiver
+        self.args = args
+        self.first_string = first_string
+        self.keywords = keywords
+
+class CellSyntax:
+    """Summary of one parsed cell: real calls, pandas attributes and subscripts.
+
+    Only plain data is kept, not the tree, so cached summaries stay small.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.pandas_attributes = set()
+        self.subscripted_attributes = set()
+        self.list_names = set()
+        self.list_subtractions = []
+
+def strip_magics(source):
+    """Return source with IPython magics and shell escapes made parseable, or None.
+
+    Line magics (%matplotlib), shell escapes (!pip) and help lines (df?)
+    become `pass` at the same indentation, and `x = !ls` becomes `x = None`,
+    so line numbers are unchanged. %time and %timeit keep the statement
+    they time, and %%time and %%timeit cells their body. Other cell magics
+    (%%bash) make the whole cell something other than Python, so None is
+    returned.
+    """
+    lines = source.split('\n')
+    if lines and lines[0].lstrip().startswith('%%') and not _TIMING_MAGIC.match(lines[0].lstrip()):
+        return None
+    stripped_lines = []
+    for line in lines:
+        stripped = line.lstrip()
+        indent = line[:len(line) - len(stripped)]
+        timing = _TIMING_MAGIC.match(stripped)
+        if timing:
+            stripped_lines.append(indent + (stripped[timing.end():] or 'pass'))
+            continue
+        if stripped.startswith(('%', '!')) or (stripped.endswith('?') and not stripped.startswith('#')):
+            stripped_lines.append(indent + 'pass')
+            continue
+        assigned = _ASSIGNED_MAGIC.match(line)
+        if assigned:
+            stripped_lines.append(assigned.group(1) + 'None')
+            continue
+        stripped_lines.append(line)
+    return '\n'.join(stripped_lines)
+
+def parse_cell(source):
+    """Parse a cell, retrying without IPython syntax; return (tree, text) or (None, None)."""
+    try:
+        return ast.parse(source), source
+    except (SyntaxError, ValueError):
+        pass
+    text = strip_magics(source)
+    if text is None:
+        return None, None
+    try:
+        return ast.parse(text), text
+    except (SyntaxError, ValueError):
+        return None, None
+
+def dotted_name(node, aliases):
+    """Return 'a.b.c' for a Name/Attribute chain, with pandas aliases spelled 'pd'."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append('pd' if node.id in aliases else node.id)
+    return '.'.join(reversed(parts))
+
+class _CellVisitor(ast.NodeVisitor):
+    """Single pass over a cell's tree that fills in a CellSyntax."""
+
+    def __init__(self, text):
+        self.text = text
+        self.syntax = CellSyntax()
+        self.aliases = set(PANDAS_ALIASES)
+        self._lines = None
+
+    def _segment(self, node):
+        """Return a node's source text, as ast.get_source_segment does.
+
+        The cell is split into lines once, not on every call, which keeps
+        the analysis of long cells linear.
+        """
+        if self._lines is None:
+            self._lines = [line.encode('utf-8') for line in _LINE.findall(self.text)]
+        # Column offsets count UTF-8 bytes
+        first, last = node.lineno - 1, node.end_lineno - 1
+        if first == last:
+            return self._lines[first][node.col_offset:node.end_col_offset].decode('utf-8')
+        parts = [self._lines[first][node.col_offset:], *self._lines[first + 1:last],
+                 self._lines[last][:node.end_col_offset]]
+        return b''.join(parts).decode('utf-8')
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name == 'pandas':
+                self.aliases.add(alias.asname or 'pandas')
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        if isinstance(node.value, (ast.List, ast.ListComp)) or (
+                isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name)
+                and node.value.func.id == 'list'):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.syntax.list_names.add(target.id)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        func = node.func
+        name = dotted_name(func, self.aliases)
+        if isinstance(func, ast.Attribute):
+            method = func.attr
+            receiver = func.value
+            if isinstance(receiver, (ast.List, ast.ListComp)):
+                receiver = '[list]'
+            elif isinstance(receiver, ast.Name) and receiver.id in self.syntax.list_names:
+                receiver = '[list]'
+            else:
+                receiver = dotted_name(receiver, self.aliases)
+        elif isinstance(func, ast.Name):
+            method, receiver = func.id, None
+        else:
+            method, receiver = None, None
+        first = node.args[0] if node.args else None
+        first_string = first.value if isinstance(first, ast.Constant) and isinstance(first.value, str) else None
+        keywords = {
+            keyword.arg: keyword.value.value
+            for keyword in node.keywords
+            if keyword.arg is not None and isinstance(keyword.value, ast.Constant)
+        }
+        self.syntax.calls.append(CallInfo(
+            name, method, receiver, len(node.args) + len(node.keywords), first_string, keywords,
+        ))
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        name = dotted_name(node, self.aliases)
+        if name is not None and name.startswith('pd.'):
+            # The chain and every prefix of it, so pd.__version__.split
+            # also counts as a read of pd.__version__
+            parts = name.split('.')
+            self.syntax.pandas_attributes.update('.'.join(parts[:end]) for end in range(2, len(parts) + 1))
+            return
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node):
+        if isinstance(node.value, ast.Attribute):
+            self.syntax.subscripted_attributes.add(node.value.attr)
+        self.generic_visit(node)
+
+    def visit_BinOp(self, node):
+        if (isinstance(node.op, ast.Sub) and isinstance(node.left, ast.List)
+                and isinstance(node.right, ast.Constant) and isinstance(node.right.value, (int, float))):
+            self.syntax.list_subtractions.append(self._segment(node))
+        self.generic_visit(node)
+
+@functools.lru_cache(maxsize=8192)
+def analyze_source(source):
+    """Return the CellSyntax of a cell source, or None if it cannot be parsed.
+
+    Results are cached on the source text, so the same cell seen again (in
+    another run of the same process, another tool, or a duplicated cell)
+    is only parsed once.
+    """
+    tree, text = parse_cell(source)
+    if tree is None:
+        return None
+    visitor = _CellVisitor(text)
+    visitor.visit(tree)
+    return visitor.syntax
+
+def compile_literal(old):
+    """Translate a deprecated-method literal into a structural check on a CellSyntax.
+
+    'pd.ewma(' becomes a call to pd.ewma, 'pd.stats.' any pandas attribute
+    under pd.stats, 'isnull()' a call with no arguments, 'drop(inplace=True)'
+    a call passing inplace=True, 'sort(' any call of that name not made on
+    a list, and 'ix[' a subscripted attribute. Literals of any other shape
+    fall back to a substring test on the source.
+    """
+    match = re.fullmatch(r'pd\.([\w.]+)\(', old)
+    if match:
+        name = 'pd.' + match.group(1)
+        return lambda syntax, source: any(call.name == name for call in syntax.calls)
+    match = re.fullmatch(r'pd\.(?:[\w.]+\.|\w+_)', old)
+    if match:
+        return lambda syntax, source: any(attribute.startswith(old) for attribute in syntax.pandas_attributes)
+    match = re.fullmatch(r'(\w+)\(\)', old)
+    if match:
+        method = match.group(1)
+        return lambda syntax, source: any(call.method == method and call.args == 0 for call in syntax.calls)
+    match = re.fullmatch(r'(\w+)\(inplace=True\)', old)
+    if match:
+        method = match.group(1)
+        return lambda syntax, source: any(
+            call.method == method and call.keywords.get('inplace') is True for call in syntax.calls)
+    match = re.fullmatch(r'(\w+)\(', old)
+    if match:
+        method = match.group(1)
+        return lambda syntax, source: any(
+            call.method == method and call.receiver != '[list]' for call in syntax.calls)
+    match = re.fullmatch(r'(\w+)\[', old)
+    if match:
+        attribute = match.group(1)
+        return lambda syntax, source: attribute in syntax.subscripted_attributes
+    return lambda syntax, source: old in source
+
+def file_path_call_names(file_path_patterns):
+    """Return the dotted call names behind the file path regexes, e.g. 'pd.read_csv'."""
+    names = []
+    for pattern in file_path_patterns:
+        match = re.match(r'(?:with )?((?:\w|\\\.)+)\\\(', pattern)
+        if match:
+            name = match.group(1).replace('\\.', '.')
+            if name not in names:
+                names.append(name)
+    return names
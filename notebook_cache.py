@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Caches of check results: per notebook on disk in SQLite, per cell in memory.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+CACHE_FILENAME = '.notebook_checker_cache.sqlite'
+
+# Bump when the table layout changes; an older cache file is emptied
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    issues TEXT NOT NULL,
+    PRIMARY KEY (path, fingerprint)
+)
+"""
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """Issue lists for the notebooks of one directory, keyed by file state.
+
+    An entry is reused when the notebook's size and mtime are unchanged, in
+    which case the file is not opened at all. If only the mtime moved, the
+    content hash decides. Entries are keyed by path and rule fingerprint,
+    so changing the rules invalidates them, while runs with different rule
+    sets (--analysis regex and ast) keep an entry each.
+    """
+
+    def __init__(self, directory, fingerprint, filename=CACHE_FILENAME):
+        self.directory = os.path.abspath(directory)
+        self.fingerprint = fingerprint
+        self.path = os.path.join(self.directory, filename)
+        # Imported here so runs without the cache do not pay for sqlite3
+        import sqlite3
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.connection.execute('DROP TABLE IF EXISTS results')
+            self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.connection.execute(_SCHEMA)
+        self.connection.commit()
+
+    def _key(self, notebook_path):
+        """Return the cache key of a notebook: its path relative to the directory."""
+        return os.path.relpath(os.path.abspath(notebook_path), self.directory)
+
+    def get(self, notebook_path):
+        """Return the cached issues for a notebook, or None on a miss."""
+        row = self.connection.execute(
+            'SELECT size, mtime_ns, sha256, issues FROM results WHERE path = ? AND fingerprint = ?',
+            (self._key(notebook_path), self.fingerprint)
+        ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, sha256, issues = row
+        stat = os.stat(notebook_path)
+        if stat.st_size != size:
+            return None
+        if stat.st_mtime_ns != mtime_ns:
+            if file_sha256(notebook_path) != sha256:
+                return None
+            # Touched but not edited: remember the new mtime
+            self.connection.execute(
+                'UPDATE results SET mtime_ns = ? WHERE path = ? AND fingerprint = ?',
+                (stat.st_mtime_ns, self._key(notebook_path), self.fingerprint)
+            )
+            self.connection.commit()
+        return json.loads(issues)
+
+    def file_state(self, notebook_path):
+        """Return a notebook's (size, mtime_ns, sha256), to be taken before it is scanned."""
+        stat = os.stat(notebook_path)
+        return stat.st_size, stat.st_mtime_ns, file_sha256(notebook_path)
+
+    def put(self, notebook_path, issues, state):
+        """Store the issues found in a notebook whose file_state was state when the scan began.
+
+        Taking the state first means an edit made during the scan leaves an
+        entry that no longer matches the file, so it is rescanned next time
+        instead of the old content's issues being served for the new.
+        """
+        size, mtime_ns, sha256 = state
+        self.connection.execute(
+            'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+            (self._key(notebook_path), self.fingerprint, size, mtime_ns, sha256, json.dumps(issues))
+        )
+        self.connection.commit()
+
+    def evict_missing(self, notebook_paths):
+        """Drop entries for notebooks not in notebook_paths; return how many went."""
+        keep = {self._key(path) for path in notebook_paths}
+        stale = [path for (path,) in self.connection.execute('SELECT path FROM results') if path not in keep]
+        self.connection.executemany('DELETE FROM results WHERE path = ?', [(path,) for path in stale])
+        self.connection.commit()
+        return len(stale)
+
+    def close(self):
+        """Close the underlying database connection."""
+        self.connection.close()
+
+def source_hash(source):
+    """Return the hash used to recognise an unchanged cell source."""
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+class CellResultLRU:
+    """Least-recently-used map from cell source hash to that cell's issues.
+    
+    Memory is bounded by an estimate of the bytes held rather than by the
+    number of entries, since a few cells with many issues can outweigh
+    thousands of clean ones. The estimate counts the characters of every
+    stored string plus a fixed overhead per entry and per issue.
+    """
+    
+    ENTRY_OVERHEAD = 200
+    ISSUE_OVERHEAD = 300
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+    
+    def _sizeof(self, issues):
+        """Estimate the memory held by an issue list."""
+        size = self.ENTRY_OVERHEAD
+        for issue in issues:
+            size += self.ISSUE_OVERHEAD
+            size += sum(len(value) for value in issue.values() if isinstance(value, str))
+        return size
+    
+    def get(self, key):
+        """Return the issues stored under key, or None, marking it recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+    
+    def put(self, key, issues):
+        """Store issues under key, evicting the least recently used entries."""
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        size = self._sizeof(issues)
+        self._entries[key] = (issues, size)
+        self.size += size
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+    
+    def __len__(self):
+        return len(self._entries)
+
+_open_caches = {}
+
+def open_cache(directory, fingerprint):
+    """Return this process's ResultCache for a directory, opening it once."""
+    key = (os.path.abspath(directory), fingerprint)
+    if key not in _open_caches:
+        _open_caches[key] = ResultCache(directory, fingerprint)
+    return _open_caches[key]
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Columnar copies of the CSV files the notebooks read, and a manifest describing them.
+"""
+
+import json
+import os
+
+from notebook_cache import file_sha256
+
+COLUMNAR_DIRNAME = '.columnar'
+MANIFEST_FILENAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+def manifest_path(data_dir):
+    return os.path.join(data_dir, COLUMNAR_DIRNAME, MANIFEST_FILENAME)
+
+def load_manifest(data_dir):
+    """Return the manifest of a data directory, or None if it has none or it is unreadable."""
+    try:
+        with open(manifest_path(data_dir), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def _write_json_atomic(path, data):
+    import tempfile
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.manifest-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+            f.write('\n')
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+def _walk(data_dir):
+    """Return the listing of every directory under data_dir and the CSV files found.
+
+    Listings are {relative dir: {'mtime_ns': ..., 'entries': {name: kind}}},
+    in the form PathIndex keeps them; the columnar directory is not entered.
+    """
+    listings = {}
+    csv_files = []
+    pending = ['']
+    while pending:
+        relative = pending.pop()
+        directory = os.path.join(data_dir, relative)
+        entries = {}
+        with os.scandir(directory) as scan:
+            for entry in scan:
+                if entry.is_symlink():
+                    entries[entry.name] = 'symlink'
+                elif entry.is_dir(follow_symlinks=False):
+                    entries[entry.name] = 'dir'
+                    if not (relative == '' and entry.name == COLUMNAR_DIRNAME):
+                        pending.append(os.path.join(relative, entry.name))
+                else:
+                    entries[entry.name] = 'file'
+                    if entry.name.lower().endswith('.csv'):
+                        csv_files.append(os.path.join(relative, entry.name))
+        listings[relative] = {'mtime_ns': os.stat(directory).st_mtime_ns, 'entries': entries}
+    return listings, sorted(csv_files)
+
+def _convert(source, target):
+    """Write source as an uncompressed Feather file; return (rows, schema) or raise ValueError.
+
+    The table is what a plain pd.read_csv(source) returns, and it is read
+    back and compared, so the loader never serves a frame that differs.
+    """
+    import pandas as pd
+    import pyarrow
+    from pyarrow import feather
+
+    frame = pd.read_csv(source)
+    if not isinstance(frame.index, pd.RangeIndex):
+        raise ValueError('index is not a default range')
+    try:
+        # Uncompressed, so the file can be memory-mapped instead of decoded
+        feather.write_feather(frame, target, compression='uncompressed')
+    except (pyarrow.ArrowException, TypeError, ValueError) as e:
+        raise ValueError(f'cannot convert to Arrow: {e}') from e
+    if not frame.equals(feather.read_table(target, memory_map=True).to_pandas()):
+        os.unlink(target)
+        raise ValueError('Arrow copy does not round-trip to the same frame')
+    return len(frame), [[str(column), str(dtype)] for column, dtype in frame.dtypes.items()]
+
+def compile_data_assets(data_dir, force=False, log=None):
+    """Convert every CSV under data_dir to Feather and write the manifest; return it.
+
+    A CSV whose size and mtime match the manifest is skipped; if only the
+    mtime moved, its SHA-256 decides. Every asset records the pandas version
+    it was read with, as read_csv's type inference can change between
+    versions. CSVs that cannot be represented faithfully are listed under
+    'skipped' with the reason, and are always read from the CSV.
+    """
+    import pandas as pd
+
+    data_dir = os.path.abspath(data_dir)
+    columnar_dir = os.path.join(data_dir, COLUMNAR_DIRNAME)
+    os.makedirs(columnar_dir, exist_ok=True)
+    previous = None if force else load_manifest(data_dir)
+    if previous is not None and previous.get('pandas') != pd.__version__:
+        previous = None
+    old_assets = previous['assets'] if previous else {}
+    old_skipped = previous['skipped'] if previous else {}
+    listings, csv_files = _walk(data_dir)
+    assets = {}
+    skipped = {}
+    for relative in csv_files:
+        source = os.path.join(data_dir, relative)
+        st = os.stat(source)
+        old = old_assets.get(relative) or old_skipped.get(relative)
+        sha256 = None
+        if old is not None and old['size'] == st.st_size:
+            if old['mtime_ns'] == st.st_mtime_ns:
+                sha256 = old['sha256']
+            else:
+                sha256 = file_sha256(source)
+            if sha256 == old['sha256']:
+                feather_path = os.path.join(columnar_dir, old.get('feather', ''))
+                if relative in old_skipped or os.path.isfile(feather_path):
+                    target = skipped if relative in old_skipped else assets
+                    target[relative] = dict(old, mtime_ns=st.st_mtime_ns)
+                    continue
+        if sha256 is None:
+            sha256 = file_sha256(source)
+        entry = {'sha256': sha256, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        feather_name = sha256[:16] + '.feather'
+        try:
+            rows, schema = _convert(source, os.path.join(columnar_dir, feather_name))
+        except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+            skipped[relative] = dict(entry, reason=str(e).splitlines()[0])
+            if log:
+                print(f"Skipped {relative}: {skipped[relative]['reason']}", file=log)
+            continue
+        assets[relative] = dict(entry, feather=feather_name, rows=rows, schema=schema)
+        if log:
+            print(f"Converted {relative}: {rows} rows, {len(schema)} columns", file=log)
+    # Feather files no asset points at any more are removed
+    wanted = {entry['feather'] for entry in assets.values()} | {MANIFEST_FILENAME}
+    for name in os.listdir(columnar_dir):
+        if name.endswith('.feather') and name not in wanted:
+            os.unlink(os.path.join(columnar_dir, name))
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'pandas': pd.__version__,
+        'assets': assets,
+        'skipped': skipped,
+        'listings': listings,
+    }
+    _write_json_atomic(manifest_path(data_dir), manifest)
+    return manifest
+
+class ColumnarLoader:
+    """Serve pd.read_csv(path) from the Feather copy when the CSV is unchanged.
+
+    Only calls the copy can answer exactly are served: a path and nothing
+    else, or a path and a usecols list of column names. Anything else, a CSV
+    that is not in a manifest, or one whose size or mtime no longer match,
+    goes to the original read_csv.
+    """
+
+    def __init__(self, read_csv):
+        self.read_csv = read_csv
+        self.manifests = {}
+        self.served = 0
+
+    def _manifest_for(self, path):
+        """Return (data dir, manifest) for the nearest data dir above path with a manifest."""
+        directory = os.path.dirname(path)
+        while True:
+            if directory not in self.manifests:
+                self.manifests[directory] = load_manifest(directory)
+            if self.manifests[directory] is not None:
+                return directory, self.manifests[directory]
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None, None
+            directory = parent
+
+    def _columnar(self, path, usecols):
+        import pandas as pd
+        from pyarrow import feather
+
+        path = os.path.abspath(os.fspath(path))
+        data_dir, manifest = self._manifest_for(path)
+        if manifest is None or manifest.get('pandas') != pd.__version__:
+            return None
+        asset = manifest['assets'].get(os.path.relpath(path, data_dir))
+        if asset is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if (st.st_size, st.st_mtime_ns) != (asset['size'], asset['mtime_ns']):
+            return None
+        columns = None
+        if usecols is not None:
+            names = [name for name, _ in asset['schema']]
+            if not set(usecols) <= set(names):
+                return None
+            # read_csv keeps the file's column order, whatever the order of usecols
+            columns = [name for name in names if name in usecols]
+        table = feather.read_table(os.path.join(data_dir, COLUMNAR_DIRNAME, asset['feather']),
+                                   columns=columns, memory_map=True)
+        self.served += 1
+        return table.to_pandas()
+
+    def __call__(self, filepath_or_buffer, *args, **kwargs):
+        usecols = kwargs.get('usecols')
+        plain = not args and set(kwargs) <= {'usecols'}
+        if plain and usecols is not None:
+            plain = isinstance(usecols, (list, tuple)) and all(isinstance(name, str) for name in usecols)
+        if plain and isinstance(filepath_or_buffer, (str, os.PathLike)):
+            frame = self._columnar(filepath_or_buffer, usecols)
+            if frame is not None:
+                return frame
+        return self.read_csv(filepath_or_buffer, *args, **kwargs)
+
+def install():
+    """Route pandas.read_csv through a ColumnarLoader; return the loader."""
+    import pandas as pd
+
+    if isinstance(pd.read_csv, ColumnarLoader):
+        return pd.read_csv
+    loader = ColumnarLoader(pd.read_csv)
+    pd.read_csv = loader
+    return loader
@@ -0,0 +1,658 @@
+#!/usr/bin/env python
+"""
+Shared rule engine for check_notebooks.py, advanced_notebook_checker.py and
+fix_notebooks.py: each notebook is loaded once and each cell scanned once,
+whichever of the three tools are run over it.
+"""
+
+import argparse
+import functools
+import json
+import os
+import re
+import sys
+import time
+
+import notebook_profile
+from notebook_pipeline import (add_discovery_arguments, add_early_exit_arguments, discover_notebooks, early_exit,
+                               filters_applied, record)
+from notebook_pool import add_pool_arguments, iter_notebook_results
+from notebook_reader import CODE_CELLS, iter_cells
+from notebook_rules import (
+    DEPRECATED_METHODS,
+    FILE_PATH_PATTERNS,
+    LIST_LITERAL_PATTERN,
+    LIST_SUBTRACTION_PATTERN,
+    SET_OPTION_FIRST_VALUE_PATTERN,
+    SET_OPTION_MULTIPLE_PATTERN,
+    SET_OPTION_NO_PREFIX_PATTERN,
+    SET_OPTION_PAIR_CALL_PATTERN,
+    SET_OPTION_PAIR_PATTERN,
+    SET_OPTION_PATTERN,
+    SET_OPTION_SECOND_OPTION_PATTERN,
+    SET_OPTION_SECOND_VALUE_PATTERN,
+    get_rule_matcher,
+)
+
+TOOLS = ('check', 'advanced', 'fix')
+
+# The rule set the advanced checker runs for each --analysis mode
+ANALYSES = {'regex': 'advanced', 'ast': 'advanced-ast'}
+
+# Rule functions registered for each tool, run in registration order
+RULES = {tool: [] for tool in TOOLS + tuple(ANALYSES.values())}
+
+def rule(tool):
+    """Register the decorated function as a rule of one tool."""
+    def register(func):
+        RULES[tool].append(func)
+        return func
+    return register
+
+class CellContext:
+    """The source of one code cell plus every match computed on it so far.
+
+    Rules ask the context for matches instead of running regexes themselves,
+    so a pattern used by several rules or tools is searched once per cell.
+    Fixers pass the cell's current text; the memo is only used while that
+    text is still the original source.
+    """
+
+    def __init__(self, index, source):
+        self.index = index
+        self.source = source
+        self._searches = {}
+        self._deprecated = None
+        self._file_paths = None
+        self._syntax = False
+
+    def search(self, pattern, text=None):
+        """Return re.search(pattern, text), memoized for the original source."""
+        if text is not None and text is not self.source:
+            return re.search(pattern, text)
+        if pattern not in self._searches:
+            self._searches[pattern] = re.search(pattern, self.source)
+        return self._searches[pattern]
+
+    def deprecated(self):
+        """Return the deprecated-method (old, new) pairs found in the source."""
+        if self._deprecated is None:
+            self._deprecated = get_rule_matcher().deprecated(self.source)
+        return self._deprecated
+
+    def file_paths(self):
+        """Return the file path arguments found in the source."""
+        if self._file_paths is None:
+            self._file_paths = get_rule_matcher().file_paths(self.source)
+        return self._file_paths
+
+    def syntax(self):
+        """Return the cell's CellSyntax, or None if it does not parse as Python."""
+        if self._syntax is False:
+            from notebook_ast import analyze_source
+            self._syntax = analyze_source(self.source)
+        return self._syntax
+
+class LoadedNotebook:
+    """A notebook loaded at most once and shared between tools.
+
+    The full JSON document is only parsed when a tool needs to rewrite it
+    (or need_document is set up front); otherwise code cells are streamed
+    with iter_cells and outputs are never built. With cell_indices, only
+    the code cells at those notebook indices are given to the rules. With
+    text, that JSON (a staged version, say) stands in for the file's;
+    otherwise the file's (size, mtime_ns) before any read is kept in
+    file_stat, so a caller can tell whether it changed since.
+    """
+
+    def __init__(self, notebook_path, need_document=False, cell_indices=None, text=None):
+        self.path = notebook_path
+        self.need_document = need_document or text is not None
+        self.cell_indices = cell_indices
+        self.file_stat = None
+        if text is None:
+            stat = os.stat(notebook_path)
+            self.file_stat = (stat.st_size, stat.st_mtime_ns)
+        self._text = text
+        self._document = None
+        self._cells = None
+
+    @property
+    def text(self):
+        """Return the notebook file's text, as read when the document was parsed."""
+        if self._text is None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._text = f.read()
+        return self._text
+
+    @property
+    def document(self):
+        """Return the parsed notebook JSON."""
+        if self._document is None:
+            self._document = json.loads(self.text)
+        return self._document
+
+    @property
+    def cells(self):
+        """Return a CellContext for every code cell, in notebook order."""
+        if self._cells is None:
+            profile = notebook_profile.active
+            if profile is not None:
+                start = time.perf_counter()
+            if self.need_document or self._document is not None:
+                self._cells = [
+                    CellContext(i, ''.join(cell['source']))
+                    for i, cell in enumerate(self.document['cells'])
+                    if cell['cell_type'] == 'code'
+                ]
+            else:
+                self._cells = [
+                    CellContext(i, source)
+                    for i, cell_type, source in iter_cells(self.path, CODE_CELLS)
+                    if cell_type == 'code'
+                ]
+            if self.cell_indices is not None:
+                self._cells = [cell for cell in self._cells if cell.index in self.cell_indices]
+            if profile is not None:
+                profile.phase('load', time.perf_counter() - start, nbytes=os.path.getsize(self.path))
+        return self._cells
+
+def run_cell_rules(tool, cell):
+    """Run one tool's detector rules over a cell and return its issues."""
+    issues = []
+    profile = notebook_profile.active
+    if profile is None:
+        for func in RULES[tool]:
+            issues.extend(func(cell))
+        return issues
+    size = len(cell.source)
+    for func in RULES[tool]:
+        start = time.perf_counter()
+        found = func(cell)
+        profile.rule(func.__name__, time.perf_counter() - start, len(found), size)
+        issues.extend(found)
+    return issues
+
+def run_rules(tool, notebook):
+    """Run one tool's detector rules over every code cell of a LoadedNotebook."""
+    issues = []
+    cells = notebook.cells
+    with notebook_profile.timed_phase(f'scan:{tool}', sum(len(cell.source) for cell in cells)
+                                      if notebook_profile.active else 0):
+        for cell in cells:
+            issues.extend(run_cell_rules(tool, cell))
+    return issues
+
+def apply_fixes(cell):
+    """Run the fixers over a cell in turn, each seeing the previous one's output.
+
+    Returns the fixed source and one message per fix applied.
+    """
+    source = cell.source
+    messages = []
+    state = {}
+    for func in RULES['fix']:
+        fixed = func(cell, source, state)
+        # A fixer that matched but could not rewrite the source has made no fix
+        if fixed is not None and fixed[0] != source:
+            source, message = fixed
+            messages.append(message)
+    return source, messages
+
+@functools.lru_cache(maxsize=None)
+def pandas_version():
+    """Return the installed pandas version without importing pandas.
+
+    The version is read from the name of the pandas-<version>.dist-info
+    directory next to the package that `import pandas` would find, which
+    costs a directory listing instead of the few hundred milliseconds pandas
+    takes to import. Installs without such metadata (a source checkout on
+    sys.path, an egg) fall back to importing pandas.
+    """
+    for entry in sys.path:
+        try:
+            names = os.listdir(entry or '.')
+        except OSError:
+            continue
+        versions = [
+            name[len('pandas-'):-len('.dist-info')]
+            for name in names
+            if name.startswith('pandas-') and name.endswith('.dist-info')
+        ]
+        if len(versions) == 1:
+            return versions[0]
+        if versions or 'pandas' in names or 'pandas.py' in names:
+            break
+    import pandas as pd
+    return pd.__version__
+
+def split_list_subtraction(match):
+    """Split a list-subtraction match such as '[1, 2] - 1' into its list and number."""
+    list_part = re.search(LIST_LITERAL_PATTERN, match).group(0)
+    num_part = re.search(r'\d+', match.split('-')[1]).group(0)
+    return list_part, num_part
+
+def with_display_prefix(option):
+    """Return a pandas option name with the 'display.' prefix added if missing."""
+    return option if option.startswith('display.') else f'display.{option}'
+
+def add_display_prefix(source, option):
+    """Return source with every quoted use of an option name given the 'display.' prefix."""
+    for quote in ("'", '"'):
+        source = source.replace(f'{quote}{option}{quote}', f'{quote}display.{option}{quote}')
+    return source
+
+# Rules for advanced_notebook_checker.py
+
+@rule('advanced')
+def deprecated_methods(cell):
+    """Deprecated pandas methods."""
+    return [{
+        'cell_index': cell.index,
+        'issue': f'Deprecated method: {old}',
+        'fix': f'Replace with: {new}',
+        'code': cell.source,
+        'severity': 'high'
+    } for old, new in cell.deprecated()]
+
+def file_path_issue(cell, file_path):
+    """Return a file path candidate issue, or None for URLs and variable-like names."""
+    # Skip URLs and variable references
+    if file_path.startswith(('http://', 'https://', 'ftp://', '{', '$')):
+        return None
+
+    # Skip paths that are clearly variables
+    if not any(char in file_path for char in ['/', '\\', '.']):
+        return None
+
+    return {
+        'cell_index': cell.index,
+        'issue': f'File path may not exist: {file_path}',
+        'fix': 'Update path or create the file',
+        'code': cell.source,
+        'severity': 'medium',
+        'file_path': file_path
+    }
+
+@rule('advanced')
+def file_paths(cell):
+    """File paths that may not exist; existence is resolved by the caller."""
+    issues = []
+    for file_path in cell.file_paths():
+        issue = file_path_issue(cell, file_path)
+        if issue is not None:
+            issues.append(issue)
+    return issues
+
+@rule('advanced')
+def set_option_prefix(cell):
+    """pd.set_option with an option name missing the 'display.' prefix."""
+    set_option_match = cell.search(SET_OPTION_PATTERN)
+    if set_option_match:
+        option = set_option_match.group(1)
+        if not option.startswith('display.'):
+            return [{
+                'cell_index': cell.index,
+                'issue': f"Missing 'display.' prefix in option: {option}",
+                'fix': f"Add 'display.' prefix: 'display.{option}'",
+                'code': cell.source,
+                'severity': 'medium'
+            }]
+    return []
+
+@rule('advanced')
+def set_option_multiple(cell):
+    """pd.set_option called with more than one option."""
+    if cell.search(SET_OPTION_MULTIPLE_PATTERN):
+        return [{
+            'cell_index': cell.index,
+            'issue': 'Multiple options in pd.set_option()',
+            'fix': 'Split into separate calls',
+            'code': cell.source,
+            'severity': 'high'
+        }]
+    return []
+
+@rule('advanced')
+def list_subtraction(cell):
+    """Subtracting a number from a list literal."""
+    list_subtraction = cell.search(LIST_SUBTRACTION_PATTERN)
+    if list_subtraction:
+        match = list_subtraction.group(0)
+        return [{
+            'cell_index': cell.index,
+            'issue': f'Unsupported operation: {match}',
+            'fix': 'Use list comprehension or numpy array',
+            'code': cell.source,
+            'severity': 'high'
+        }]
+    return []
+
+@rule('advanced')
+def version_specific(cell):
+    """Code that depends on the pandas version."""
+    if 'pd.__version__' in cell.source or 'pandas.__version__' in cell.source:
+        return [{
+            'cell_index': cell.index,
+            'issue': 'Version-specific code detected',
+            'fix': f'Current pandas version: {pandas_version()}. May need updates.',
+            'code': cell.source,
+            'severity': 'low'
+        }]
+    return []
+
+# Rules for advanced_notebook_checker.py --analysis ast: the same checks
+# made on the parsed cell, so comments, strings and unrelated methods of
+# the same name do not match. Cells that do not parse fall back to the
+# regex rules above. notebook_ast is imported on first use so the regex
+# rules start without loading the ast module.
+
+@functools.lru_cache(maxsize=None)
+def _deprecated_checks():
+    """Return (old, new, check) for each deprecated method, checks compiled once."""
+    from notebook_ast import compile_literal
+    return [(old, new, compile_literal(old)) for old, new in DEPRECATED_METHODS]
+
+@functools.lru_cache(maxsize=None)
+def _file_path_calls():
+    """Return the call names whose first argument is a file path."""
+    from notebook_ast import file_path_call_names
+    return frozenset(file_path_call_names(FILE_PATH_PATTERNS))
+
+@rule('advanced-ast')
+def ast_deprecated_methods(cell):
+    """Calls and attribute accesses of deprecated pandas methods."""
+    syntax = cell.syntax()
+    if syntax is None:
+        return deprecated_methods(cell)
+    return [{
+        'cell_index': cell.index,
+        'issue': f'Deprecated method: {old}',
+        'fix': f'Replace with: {new}',
+        'code': cell.source,
+        'severity': 'high'
+    } for old, new, check in _deprecated_checks() if check(syntax, cell.source)]
+
+@rule('advanced-ast')
+def ast_file_paths(cell):
+    """String literal paths passed to file-reading calls."""
+    syntax = cell.syntax()
+    if syntax is None:
+        return file_paths(cell)
+    issues = []
+    calls = _file_path_calls()
+    for call in syntax.calls:
+        if call.name in calls and call.first_string:
+            issue = file_path_issue(cell, call.first_string)
+            if issue is not None:
+                issues.append(issue)
+    return issues
+
+@rule('advanced-ast')
+def ast_set_option_prefix(cell):
+    """pd.set_option calls whose option name lacks the 'display.' prefix."""
+    syntax = cell.syntax()
+    if syntax is None:
+        return set_option_prefix(cell)
+    issues = []
+    for call in syntax.calls:
+        option = call.first_string
+        if call.name == 'pd.set_option' and option and not option.startswith('display.'):
+            issues.append({
+                'cell_index': cell.index,
+                'issue': f"Missing 'display.' prefix in option: {option}",
+                'fix': f"Add 'display.' prefix: 'display.{option}'",
+                'code': cell.source,
+                'severity': 'medium'
+            })
+    return issues
+
+@rule('advanced-ast')
+def ast_set_option_multiple(cell):
+    """pd.set_option calls given more than one option/value pair."""
+    syntax = cell.syntax()
+    if syntax is None:
+        return set_option_multiple(cell)
+    return [{
+        'cell_index': cell.index,
+        'issue': 'Multiple options in pd.set_option()',
+        'fix': 'Split into separate calls',
+        'code': cell.source,
+        'severity': 'high'
+    } for call in syntax.calls if call.name == 'pd.set_option' and call.args > 2]
+
+@rule('advanced-ast')
+def ast_list_subtraction(cell):
+    """A number subtracted from a list literal."""
+    syntax = cell.syntax()
+    if syntax is None:
+        return list_subtraction(cell)
+    return [{
+        'cell_index': cell.index,
+        'issue': f'Unsupported operation: {match}',
+        'fix': 'Use list comprehension or numpy array',
+        'code': cell.source,
+        'severity': 'high'
+    } for match in syntax.list_subtractions]
+
+@rule('advanced-ast')
+def ast_version_specific(cell):
+    """Reads of pd.__version__."""
+    syntax = cell.syntax()
+    if syntax is None:
+        return version_specific(cell)
+    return version_specific(cell) if 'pd.__version__' in syntax.pandas_attributes else []
+
+# Rules for check_notebooks.py
+
+@rule('check')
+def check_get_dtype_counts(cell):
+    """Deprecated get_dtype_counts()."""
+    if 'get_dtype_counts()' in cell.source:
+        return [{
+            'cell_index': cell.index,
+            'issue': 'Deprecated method: get_dtype_counts()',
+            'fix': 'Replace with: dtypes.value_counts()',
+            'code': cell.source,
+            'fixed_code': cell.source.replace('get_dtype_counts()', 'dtypes.value_counts()')
+        }]
+    return []
+
+@rule('check')
+def check_list_subtraction(cell):
+    """Subtracting a number from a list literal."""
+    list_subtraction = cell.search(LIST_SUBTRACTION_PATTERN)
+    if list_subtraction:
+        match = list_subtraction.group(0)
+        list_part, num_part = split_list_subtraction(match)
+        return [{
+            'cell_index': cell.index,
+            'issue': f'Unsupported operation: {match}',
+            'fix': f'Replace with: [x - {num_part} for x in {list_part}] or np.array({list_part}) - {num_part}',
+            'code': cell.source,
+            'fixed_code': cell.source.replace(match, f'[x - {num_part} for x in {list_part}]')
+        }]
+    return []
+
+@rule('check')
+def check_set_option_multiple(cell):
+    """pd.set_option with two option/value pairs."""
+    set_option_match = cell.search(SET_OPTION_PAIR_PATTERN)
+    if set_option_match:
+        opt1 = with_display_prefix(set_option_match.group(1))
+        opt2 = with_display_prefix(cell.search(SET_OPTION_SECOND_OPTION_PATTERN).group(1))
+        val1 = cell.search(SET_OPTION_FIRST_VALUE_PATTERN).group(1)
+        val2 = cell.search(SET_OPTION_SECOND_VALUE_PATTERN).group(1)
+        fix = f"pd.set_option('{opt1}', {val1})\npd.set_option('{opt2}', {val2})"
+        return [{
+            'cell_index': cell.index,
+            'issue': 'Multiple options in pd.set_option()',
+            'fix': 'Split into separate calls',
+            'code': cell.source,
+            'fixed_code': cell.source.replace(set_option_match.group(0), fix)
+        }]
+    return []
+
+@rule('check')
+def check_set_option_prefix(cell):
+    """pd.set_option with an option name missing the 'display.' prefix."""
+    set_option_single = cell.search(SET_OPTION_NO_PREFIX_PATTERN)
+    if set_option_single and not cell.search(SET_OPTION_PAIR_PATTERN):
+        opt = set_option_single.group(1)
+        return [{
+            'cell_index': cell.index,
+            'issue': f"Missing 'display.' prefix in option: {opt}",
+            'fix': f"Add 'display.' prefix: 'display.{opt}'",
+            'code': cell.source,
+            'fixed_code': add_display_prefix(cell.source, opt)
+        }]
+    return []
+
+# Fixers for fix_notebooks.py: each takes the cell, its current source and a
+# dict shared by the fixers of that cell, and returns (source, message) or None
+
+@rule('fix')
+def fix_get_dtype_counts(cell, source, state):
+    """Replace get_dtype_counts() with dtypes.value_counts()."""
+    if 'get_dtype_counts()' in source:
+        return (source.replace('get_dtype_counts()', 'dtypes.value_counts()'),
+                f"Replaced 'get_dtype_counts()' with 'dtypes.value_counts()' in cell {cell.index}")
+    return None
+
+@rule('fix')
+def fix_list_subtraction(cell, source, state):
+    """Turn list-literal subtraction into numpy array subtraction."""
+    list_subtraction = cell.search(LIST_SUBTRACTION_PATTERN, source)
+    if list_subtraction:
+        match = list_subtraction.group(0)
+        list_part, num_part = split_list_subtraction(match)
+        replacement = f'np.array({list_part}) - {num_part}'
+        return source.replace(match, replacement), f"Replaced '{match}' with '{replacement}' in cell {cell.index}"
+    return None
+
+@rule('fix')
+def fix_set_option_multiple(cell, source, state):
+    """Split a pd.set_option call with two option/value pairs."""
+    set_option_match = cell.search(SET_OPTION_PAIR_CALL_PATTERN, source)
+    state['set_option_split'] = bool(set_option_match)
+    if set_option_match:
+        opt1 = with_display_prefix(set_option_match.group(1))
+        val1 = set_option_match.group(2)
+        opt2 = with_display_prefix(set_option_match.group(3))
+        val2 = set_option_match.group(4)
+        replacement = f"pd.set_option('{opt1}', {val1})\npd.set_option('{opt2}', {val2})"
+        return (source.replace(set_option_match.group(0), replacement),
+                f"Split multiple pd.set_option calls in cell {cell.index}")
+    return None
+
+@rule('fix')
+def fix_set_option_prefix(cell, source, state):
+    """Add the 'display.' prefix to a pd.set_option option name."""
+    set_option_single = cell.search(SET_OPTION_NO_PREFIX_PATTERN, source)
+    if set_option_single and not state.get('set_option_split'):
+        opt = set_option_single.group(1)
+        return (add_display_prefix(source, opt),
+                f"Added 'display.' prefix to '{opt}' in cell {cell.index}")
+    return None
+
+def run_tools(notebook_path, tools=TOOLS, cache_directory=None, analysis='regex'):
+    """Run several tools over one notebook, loading and scanning it only once.
+
+    Returns {tool: result}, where each result is what the tool's own
+    per-notebook function returns. The fixer always runs last, since it
+    rewrites the file the others read.
+    """
+    from advanced_notebook_checker import check_notebook_for_issues
+    from check_notebooks import check_notebook
+    from fix_notebooks import fix_notebook
+
+    notebook = LoadedNotebook(notebook_path, need_document='fix' in tools)
+    results = {}
+    if 'check' in tools:
+        results['check'] = check_notebook(notebook_path, notebook)
+    if 'advanced' in tools:
+        results['advanced'] = check_notebook_for_issues(notebook_path, cache_directory, notebook, analysis)
+    if 'fix' in tools:
+        results['fix'] = fix_notebook(notebook_path, notebook)
+    return results
+
+def main():
+    """Run any combination of the checkers and the fixer in a single pass."""
+    from advanced_notebook_checker import print_advanced_summary, rules_version
+    from check_notebooks import print_check_summary
+    from fix_notebooks import print_fix_summary
+    from notebook_cache import open_cache
+
+    parser = argparse.ArgumentParser(description='Run the notebook checkers and fixer in one pass.')
+    parser.add_argument('directory', help='Directory containing .ipynb files')
+    parser.add_argument('--tools', default=','.join(TOOLS),
+                        help='Comma-separated tools to run: check, advanced, fix (default: all)')
+    add_pool_arguments(parser)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Rescan every notebook instead of using the advanced checker cache')
+    parser.add_argument('--analysis', choices=sorted(ANALYSES), default='regex',
+                        help='How the advanced checker finds issues (default: regex)')
+    add_discovery_arguments(parser)
+    add_early_exit_arguments(parser, 'an issue (high severity, for the advanced checker)')
+    args = parser.parse_args()
+
+    tools = tuple(tool for tool in TOOLS if tool in args.tools.split(','))
+    unknown = set(args.tools.split(',')) - set(TOOLS)
+    if unknown or not tools:
+        parser.error(f"--tools must name some of: {', '.join(TOOLS)}")
+
+    directory = args.directory
+
+    if not os.path.isdir(directory):
+        print(f"Error: {directory} is not a directory")
+        sys.exit(1)
+
+    print(f"Processing notebooks in {directory}")
+
+    use_cache = 'advanced' in tools and not args.no_cache
+    tool_results = {tool: {} for tool in tools}
+    failed_notebooks = {}
+    seen = []
+
+    run = functools.partial(run_tools, tools=tools, cache_directory=directory if use_cache else None,
+                            analysis=args.analysis)
+    # discover -> run the tools -> report, one notebook at a time
+    results = iter_notebook_results(run, record(discover_notebooks(args), seen), args.jobs, args.timeout)
+    # The checkers' issues count towards --fail-fast and --max-issues; the fixer's counts do not
+    stop = early_exit(args, lambda issue: issue.get('severity', 'high') == 'high',
+                      lambda result: result.get('check', []) + result.get('advanced', []))
+    if stop is not None:
+        results = stop.apply(results)
+    for notebook, result, error in results:
+        if error:
+            print(f"\nError processing notebook {notebook}: {error}")
+            failed_notebooks[notebook] = error
+            continue
+        for tool in tools:
+            tool_results[tool][notebook] = result[tool]
+
+    if not seen:
+        print(f"No notebooks found in {directory}")
+        sys.exit(0)
+
+    if 'check' in tools:
+        print_check_summary({notebook: issues for notebook, issues in tool_results['check'].items() if issues})
+    if 'advanced' in tools:
+        print_advanced_summary({notebook: issues for notebook, issues in tool_results['advanced'].items() if issues})
+    if 'fix' in tools:
+        print_fix_summary(tool_results['fix'])
+
+    if failed_notebooks:
+        print(f"\n{len(failed_notebooks)} notebooks could not be processed:")
+        for notebook, error in failed_notebooks.items():
+            print(f"  {notebook}: {error}")
+
+    if stop is not None and stop.reason:
+        print(f"\nStopped early ({stop.reason})")
+        sys.exit(1)
+    # Only a complete, unfiltered run knows which notebooks are gone
+    if use_cache and not filters_applied(args):
+        open_cache(directory, rules_version(args.analysis)).evict_missing(seen)
+
+if __name__ == "__main__":
+    main()
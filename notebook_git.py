@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Git-aware notebook discovery for the --since and --staged modes.
+"""
+
+import functools
+import json
+import os
+from collections import Counter
+
+from notebook_engine import LoadedNotebook
+from notebook_pipeline import discovery_filter
+from notebook_reader import CODE_CELLS, iter_cells
+
+class GitError(RuntimeError):
+    """Raised when a git command fails."""
+
+def _git(directory, *args):
+    """Run a git command in directory and return its standard output as text."""
+    # Imported here so runs without --since or --staged do not pay for subprocess
+    import subprocess
+    try:
+        result = subprocess.run(['git', '-C', directory, *args], capture_output=True)
+    except OSError as e:
+        raise GitError(f'cannot run git: {e}') from e
+    if result.returncode != 0:
+        raise GitError(result.stderr.decode('utf-8', 'replace').strip() or f'git {args[0]} failed')
+    return result.stdout.decode('utf-8')
+
+def add_git_arguments(parser):
+    """Add the mutually exclusive --since and --staged options to an argument parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--since', metavar='REF',
+                       help='Only notebooks changed since a git ref, and only their new or edited cells')
+    group.add_argument('--staged', action='store_true',
+                       help='Only staged notebooks, and only cells new or edited since HEAD')
+
+def changed_notebooks(directory, since=None, staged=False, matches=None):
+    """Return {notebook path: (base version, checked version)} for the notebooks of directory that changed.
+
+    With since, a notebook changed if the working tree differs from that
+    ref, including untracked notebooks, and the working-tree file is
+    checked. With staged, a notebook changed if it is staged for commit;
+    its base is HEAD and the staged version is what gets checked, so a
+    pre-commit hook sees exactly what is being committed. Versions are
+    "<ref>:<path>" blob names for git show, with paths from the top of the
+    repository; the base is None for a notebook the base does not have, and
+    the checked version None for the working-tree file. matches, a
+    predicate on the path relative to directory, picks the notebooks as
+    discovery would; by default every .ipynb file counts.
+    """
+    if matches is None:
+        matches = lambda path: path.endswith('.ipynb')
+    base = 'HEAD' if staged else since
+    # --relative paths are below directory; blob names need them from the top of the repository
+    prefix = _git(directory, 'rev-parse', '--show-prefix').strip()
+    output = _git(directory, 'diff', '--cached' if staged else since, '--name-status', '-z',
+                  '--diff-filter=AMR', '--relative', '--', '.')
+    fields = output.split('\0')
+    notebooks = {}
+    i = 0
+    while i < len(fields) - 1:
+        status = fields[i]
+        if status.startswith('R'):
+            old_path, path = fields[i + 1], fields[i + 2]
+            i += 3
+        else:
+            old_path = path = fields[i + 1]
+            i += 2
+        if matches(path):
+            notebooks[os.path.join(directory, path)] = (
+                None if status == 'A' else f'{base}:{prefix}{old_path}',
+                f':{prefix}{path}' if staged else None,
+            )
+    if not staged:
+        untracked = _git(directory, 'ls-files', '--others', '--exclude-standard', '-z', '--', '*.ipynb')
+        for path in untracked.split('\0'):
+            if path and matches(path):
+                notebooks[os.path.join(directory, path)] = (None, None)
+    return notebooks
+
+def _show(notebook_path, blob):
+    """Return the text of a blob of the repository notebook_path is in."""
+    return _git(os.path.dirname(notebook_path) or '.', 'show', blob)
+
+def changed_cell_indices(notebook_path, base, text=None):
+    """Return the indices of the code cells that are new or edited since the base version.
+
+    The cells compared are those of text, the checked version's JSON, or of
+    the notebook file when text is None. Cells are matched on their source
+    regardless of position, so moving a cell does not make it new; a
+    source that now occurs more often than in the base counts its extra
+    copies as new. Returns None, meaning every cell, when there is no base
+    version to compare with.
+    """
+    if base is None:
+        return None
+    try:
+        base_notebook = json.loads(_show(notebook_path, base))
+    except (GitError, ValueError):
+        return None
+    base_sources = Counter(
+        ''.join(cell['source']) for cell in base_notebook.get('cells', [])
+        if cell.get('cell_type') == 'code'
+    )
+    if text is None:
+        cells = iter_cells(notebook_path, CODE_CELLS)
+    else:
+        cells = ((i, cell.get('cell_type'), ''.join(cell.get('source', [])))
+                 for i, cell in enumerate(json.loads(text).get('cells', [])))
+    indices = set()
+    for i, cell_type, source in cells:
+        if cell_type != 'code':
+            continue
+        if base_sources[source] > 0:
+            base_sources[source] -= 1
+        else:
+            indices.add(i)
+    return indices
+
+def run_on_changed_cells(func, bases, notebook_path, need_document=False):
+    """Call func(notebook_path, notebook=...) with only the notebook's new or edited cells.
+
+    With --staged the staged version is what func sees. A tool that
+    rewrites the notebook (need_document) would write it over the
+    working-tree file, so a notebook with unstaged edits is refused.
+    Module-level so it can be sent to a worker process with functools.partial.
+    """
+    base, checked = bases[notebook_path]
+    text = None
+    if checked is not None:
+        text = _show(notebook_path, checked)
+        if need_document:
+            with open(notebook_path, encoding='utf-8') as f:
+                if f.read() != text:
+                    raise GitError(f'{notebook_path} has unstaged changes; stage or stash them first')
+    indices = changed_cell_indices(notebook_path, base, text)
+    notebook = LoadedNotebook(notebook_path, need_document, cell_indices=indices, text=text)
+    return func(notebook_path, notebook=notebook)
+
+def git_notebooks(parser, args, func, need_document=False):
+    """Return the changed notebooks and func wrapped to see only their changed cells.
+
+    Returns (None, func) when neither --since nor --staged was given.
+    Exits through the parser if git cannot list the changes.
+    """
+    if not args.since and not args.staged:
+        return None, func
+    try:
+        bases = changed_notebooks(args.directory, args.since, args.staged, discovery_filter(args))
+    except GitError as e:
+        parser.error(f'cannot list changed notebooks: {e}')
+    return list(bases), functools.partial(run_on_changed_cells, func, bases, need_document=need_document)
+
+def describe_changes(args):
+    """Return how the notebooks were chosen, as a suffix for the "Found" line."""
+    if args.staged:
+        return ' (staged)'
+    if args.since:
+        return f' (changed since {args.since})'
+    return ''
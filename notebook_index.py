@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+"""
+Persistent inverted index from pandas symbols to the notebook cells that use them.
+"""
+
+import json
+import os
+import re
+from collections import Counter
+
+from notebook_cache import file_sha256
+from notebook_reader import CODE_CELLS, iter_cells
+from notebook_rules import DEPRECATED_METHODS, rules_fingerprint
+
+INDEX_FILENAME = '.notebook_symbol_index.sqlite'
+INDEX_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notebooks (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS occurrences (
+    symbol TEXT NOT NULL,
+    path TEXT NOT NULL,
+    cell_index INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (symbol, path, cell_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS occurrences_by_path ON occurrences (path);
+"""
+
+# Roots whose attributes are never pandas API, even when the name matches (np.mean, plt.plot)
+NON_PANDAS_ROOTS = frozenset({
+    'np', 'numpy', 'plt', 'matplotlib', 'sns', 'seaborn', 'scipy', 'sklearn', 'math',
+    'os', 'sys', 're', 'json', 'random', 'time', 'datetime', 'itertools', 'collections',
+})
+
+# Strings and comments are matched so they can be skipped; then attribute chains,
+# with or without a root name (the .sum of df.groupby('a').sum() has none)
+_TOKEN = re.compile(
+    r'(?P<skip>#[^\n]*'
+    r"|[rRbBuUfF]{0,2}(?:'''(?:\\.|[^\\])*?'''" r'|"""(?:\\.|[^\\])*?""")'
+    r"""|[rRbBuUfF]{0,2}(?:'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*"))"""
+    r'|(?<![\w.])(?P<root>[A-Za-z_]\w*)?(?P<attributes>(?:\s*\.\s*[A-Za-z_]\w*)+)'
+)
+_PANDAS_IMPORT = re.compile(r'\bimport\s+pandas\s+as\s+(\w+)')
+_NAME = re.compile(r'[A-Za-z_]\w*')
+
+def pandas_vocabulary():
+    """Return the public method and attribute names of the main pandas objects.
+
+    Imports pandas; the result is stored in the index so later updates do
+    not need to. Names the deprecation rules know are added, since they are
+    the ones most often searched for and current pandas may not have them.
+    """
+    import pandas as pd
+    from pandas.core import groupby, resample, window
+
+    objects = [
+        pd.DataFrame, pd.Series, pd.Index, pd.MultiIndex, pd.DatetimeIndex, pd.Timestamp, pd.Timedelta,
+        groupby.DataFrameGroupBy, groupby.SeriesGroupBy, resample.Resampler,
+        window.Rolling, window.Expanding, window.ExponentialMovingWindow,
+        pd.Series.str, pd.Series.dt, pd.Series.cat, pd.DataFrame.plot,
+    ]
+    names = set()
+    for obj in objects:
+        names.update(name for name in dir(obj) if not name.startswith('_'))
+    for old, _ in DEPRECATED_METHODS:
+        match = _NAME.match(old[len('pd.'):] if old.startswith('pd.') else old)
+        if match and not old.startswith('pd.'):
+            names.add(match.group(0))
+    return sorted(names)
+
+def extract_symbols(source, vocabulary, aliases=frozenset({'pd', 'pandas'})):
+    """Return a Counter of the pandas symbols a cell source uses.
+
+    Module attributes are recorded as their whole chain spelled with 'pd'
+    ('pd.read_csv', 'pd.api.types.is_numeric_dtype'). Attributes of anything
+    else are recorded as '.name' when name is in the vocabulary ('.groupby',
+    '.ix'). Strings and comments are ignored.
+    """
+    symbols = Counter()
+    for match in _TOKEN.finditer(source):
+        if match.group('skip') is not None:
+            continue
+        root = match.group('root')
+        attributes = [name.strip() for name in match.group('attributes').split('.')[1:]]
+        if root in aliases:
+            symbols['pd.' + '.'.join(attributes)] += 1
+        elif root not in NON_PANDAS_ROOTS:
+            for name in attributes:
+                if name in vocabulary:
+                    symbols['.' + name] += 1
+    return symbols
+
+def normalize_query(term):
+    """Return a query term as it is stored: 'ix[' -> 'ix', 'pandas.concat(' -> 'pd.concat'."""
+    term = term.strip().rstrip('([').rstrip('.')
+    if term.startswith('pandas.'):
+        term = 'pd.' + term[len('pandas.'):]
+    return term
+
+class SymbolIndex:
+    """Symbol occurrences for the notebooks of one directory, in SQLite.
+
+    A notebook is re-read only if its size or mtime changed and, when only
+    the mtime moved, its content hash did too. The vocabulary of method
+    names is stored with the index and rebuilt, together with every entry,
+    when pandas or the deprecation rules change.
+    """
+
+    def __init__(self, directory, filename=INDEX_FILENAME):
+        import sqlite3
+        self.directory = os.path.abspath(directory)
+        self.path = os.path.join(self.directory, filename)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(_SCHEMA)
+        self.connection.commit()
+        self._vocabulary = None
+
+    def _key(self, notebook_path):
+        return os.path.relpath(os.path.abspath(notebook_path), self.directory)
+
+    def _meta(self, key):
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _check_fingerprint(self, fingerprint):
+        """Empty the index and rebuild the vocabulary if it was made with other rules or pandas."""
+        if self._meta('fingerprint') == fingerprint:
+            return
+        vocabulary = pandas_vocabulary()
+        with self.connection:
+            self.connection.execute('DELETE FROM occurrences')
+            self.connection.execute('DELETE FROM notebooks')
+            self.connection.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [
+                ('fingerprint', fingerprint), ('vocabulary', json.dumps(vocabulary)),
+            ])
+        self._vocabulary = frozenset(vocabulary)
+
+    def vocabulary(self):
+        """Return the method and attribute names stored with the index."""
+        if self._vocabulary is None:
+            self._vocabulary = frozenset(json.loads(self._meta('vocabulary')))
+        return self._vocabulary
+
+    def _unchanged(self, notebook_path, stat):
+        row = self.connection.execute(
+            'SELECT size, mtime_ns, sha256 FROM notebooks WHERE path = ?', (self._key(notebook_path),)
+        ).fetchone()
+        if row is None or row[0] != stat.st_size:
+            return False, None
+        if row[1] == stat.st_mtime_ns:
+            return True, None
+        sha256 = file_sha256(notebook_path)
+        return sha256 == row[2], sha256
+
+    def update(self, notebook_paths, fingerprint):
+        """Bring the index up to date with notebook_paths; return (reindexed, removed, failed).
+
+        A notebook that cannot be read or parsed is left out of the index,
+        with any entries from an earlier version removed, and reported in
+        failed as {path: message}; it is tried again on the next update.
+        """
+        notebook_paths = list(notebook_paths)
+        self._check_fingerprint(fingerprint)
+        keep = {self._key(path) for path in notebook_paths}
+        stale = [path for (path,) in self.connection.execute('SELECT path FROM notebooks') if path not in keep]
+        with self.connection:
+            for path in stale:
+                self.connection.execute('DELETE FROM occurrences WHERE path = ?', (path,))
+                self.connection.execute('DELETE FROM notebooks WHERE path = ?', (path,))
+        reindexed = 0
+        failed = {}
+        for notebook_path in notebook_paths:
+            key = self._key(notebook_path)
+            try:
+                stat = os.stat(notebook_path)
+                unchanged, sha256 = self._unchanged(notebook_path, stat)
+                if unchanged:
+                    if sha256 is not None:
+                        self.connection.execute('UPDATE notebooks SET mtime_ns = ? WHERE path = ?',
+                                                (stat.st_mtime_ns, key))
+                    continue
+                vocabulary = self.vocabulary()
+                sha256 = sha256 or file_sha256(notebook_path)
+                cells = [(i, source) for i, cell_type, source in iter_cells(notebook_path, CODE_CELLS)
+                         if cell_type == 'code' and source]
+            except (OSError, ValueError) as e:
+                failed[notebook_path] = f"{type(e).__name__}: {e}"
+                with self.connection:
+                    self.connection.execute('DELETE FROM occurrences WHERE path = ?', (key,))
+                    self.connection.execute('DELETE FROM notebooks WHERE path = ?', (key,))
+                continue
+            # An alias imported in one cell is used in the cells after it
+            aliases = {'pd', 'pandas'}
+            for _, source in cells:
+                aliases.update(_PANDAS_IMPORT.findall(source))
+            rows = []
+            for i, source in cells:
+                rows.extend((symbol, key, i, count)
+                            for symbol, count in extract_symbols(source, vocabulary, aliases).items())
+            with self.connection:
+                self.connection.execute('DELETE FROM occurrences WHERE path = ?', (key,))
+                self.connection.executemany('INSERT INTO occurrences VALUES (?, ?, ?, ?)', rows)
+                self.connection.execute('INSERT OR REPLACE INTO notebooks VALUES (?, ?, ?, ?)', (
+                    key, stat.st_size, stat.st_mtime_ns, sha256))
+            reindexed += 1
+        self.connection.commit()
+        return reindexed, len(stale), failed
+
+    def query(self, term):
+        """Return [(symbol, notebook path, cell index, count)] for a query term.
+
+        A bare name ('groupby', 'ix[') matches it as a method or attribute of
+        anything and as a pandas function; a dotted name ('pd.read_excel')
+        matches that symbol and everything under it ('pd.api' finds
+        'pd.api.types.is_numeric_dtype').
+        """
+        term = normalize_query(term)
+        if '.' in term.lstrip('.'):
+            rows = self.connection.execute(
+                'SELECT symbol, path, cell_index, count FROM occurrences '
+                'WHERE symbol = ? OR (symbol > ? AND symbol < ?) ORDER BY path, cell_index, symbol',
+                (term, term + '.', term + '/'))
+        else:
+            name = term.lstrip('.')
+            rows = self.connection.execute(
+                'SELECT symbol, path, cell_index, count FROM occurrences '
+                'WHERE symbol IN (?, ?) ORDER BY path, cell_index, symbol', ('.' + name, 'pd.' + name))
+        return [(symbol, os.path.join(self.directory, path), cell_index, count)
+                for symbol, path, cell_index, count in rows]
+
+    def top(self, limit=20):
+        """Return the most used symbols as [(symbol, occurrences, notebooks)]."""
+        return self.connection.execute(
+            'SELECT symbol, SUM(count), COUNT(DISTINCT path) FROM occurrences '
+            'GROUP BY symbol ORDER BY SUM(count) DESC, symbol LIMIT ?', (limit,)).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+def index_fingerprint(pandas_version):
+    """Return the fingerprint an index must match: pandas, the deprecation rules and this module."""
+    return rules_fingerprint(pandas_version, 'symbols', INDEX_VERSION)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+In-memory index of the files next to notebooks, for the file path rule.
+"""
+
+import os
+
+from notebook_data import COLUMNAR_DIRNAME, load_manifest
+
+DATA_DIRS = ('data',)
+
+class PathIndex:
+    """Answer "does this path exist?" from directory listings held in memory.
+
+    Each directory is listed once with os.scandir, and the notebook
+    directory's data/ tree is walked up front, so a notebook that reads
+    data/flights.csv in dozens of cells costs no stat calls at all. Paths
+    whose meaning depends on the filesystem beyond a plain listing (".."
+    components, trailing separators, symlinks, the empty path) fall back to
+    os.path.exists, memoized. Only names found in a listing are answered
+    from it; a miss is confirmed with a memoized os.path.exists, since on a
+    case-insensitive filesystem Data/Flights.csv exists when the listing
+    says data/flights.csv.
+    A data directory with a columnar manifest (see notebook_data) supplies
+    its listings from the manifest, each trusted while the directory's
+    mtime is unchanged. The index is a snapshot: build a new one for each run.
+    """
+
+    def __init__(self):
+        self._listings = {}
+        self._exists = {}
+        self._prepared = set()
+        self.syscalls = 0
+        self.lookups = 0
+
+    def _listing(self, directory):
+        """Return {name: kind} for a directory, or None if it cannot be listed."""
+        if directory not in self._listings:
+            self.syscalls += 1
+            try:
+                with os.scandir(directory) as entries:
+                    listing = {}
+                    for entry in entries:
+                        if entry.is_symlink():
+                            listing[entry.name] = 'symlink'
+                        elif entry.is_dir(follow_symlinks=False):
+                            listing[entry.name] = 'dir'
+                        else:
+                            listing[entry.name] = 'file'
+            except OSError:
+                listing = None
+            self._listings[directory] = listing
+        return self._listings[directory]
+
+    def _load_manifest_listings(self, data_dir):
+        """Take the listings of a data directory from its manifest where they are current."""
+        self.syscalls += 1
+        manifest = load_manifest(data_dir)
+        if manifest is None:
+            return
+        for relative, listing in manifest.get('listings', {}).items():
+            directory = os.path.normpath(os.path.join(data_dir, relative))
+            if directory in self._listings:
+                continue
+            self.syscalls += 1
+            try:
+                current = os.stat(directory).st_mtime_ns == listing['mtime_ns']
+            except OSError:
+                current = False
+            if current:
+                self._listings[directory] = listing['entries']
+
+    def prepare(self, notebook_dir, data_dirs=DATA_DIRS):
+        """List a notebook directory and walk its data directories once."""
+        notebook_dir = os.path.abspath(notebook_dir)
+        if notebook_dir in self._prepared:
+            return
+        self._prepared.add(notebook_dir)
+        self._listing(notebook_dir)
+        pending = [os.path.join(notebook_dir, data_dir) for data_dir in data_dirs]
+        for data_dir in pending:
+            if data_dir not in self._listings and (self._listing(notebook_dir) or {}).get(
+                    os.path.basename(data_dir)) == 'dir':
+                self._load_manifest_listings(data_dir)
+        while pending:
+            directory = pending.pop()
+            for name, kind in (self._listing(directory) or {}).items():
+                # The columnar copies are listed only if a notebook names one
+                if kind == 'dir' and name != COLUMNAR_DIRNAME:
+                    pending.append(os.path.join(directory, name))
+
+    def exists(self, path):
+        """Return os.path.exists(path), answered from the index where possible."""
+        self.lookups += 1
+        if path in self._exists:
+            return self._exists[path]
+        absolute = os.path.abspath(path)
+        parts = path.replace(os.sep, '/').split('/')
+        if not path or '..' in parts or path.endswith(('/', os.sep)):
+            self.syscalls += 1
+            result = os.path.exists(path)
+        else:
+            directory, name = os.path.split(absolute)
+            listing = self._listing(directory)
+            if listing is None or name not in listing:
+                self.syscalls += 1
+                result = os.path.exists(absolute)
+            elif listing[name] == 'symlink':
+                self.syscalls += 1
+                result = os.path.exists(absolute)
+            else:
+                result = True
+        self._exists[path] = result
+        return result
+
+_path_index = None
+
+def get_path_index():
+    """Return the path index for this run, creating it on first use."""
+    global _path_index
+    if _path_index is None:
+        _path_index = PathIndex()
+    return _path_index
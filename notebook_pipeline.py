@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Streaming notebook discovery and early exit for the discover, check and report pipeline.
+"""
+
+import fnmatch
+import functools
+import os
+import re
+
+# Directories never searched: Jupyter's autosave copies and hidden trees
+# such as .git or the output store of compact_notebooks.py
+SKIPPED_DIRS = ('.ipynb_checkpoints',)
+SKIPPED_FILES = ('*.bak',)
+DEFAULT_INCLUDE = ('*.ipynb',)
+
+def add_discovery_arguments(parser):
+    """Add the --include, --exclude and --no-recursive options to an argument parser."""
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='Only notebooks whose path below the directory matches GLOB '
+                             '(repeatable; default: *.ipynb)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Skip notebooks and directories whose path below the directory matches GLOB '
+                             '(repeatable)')
+    parser.add_argument('--no-recursive', action='store_true',
+                        help='Only look at notebooks directly in the directory')
+
+def add_early_exit_arguments(parser, failure='an issue'):
+    """Add the --fail-fast and --max-issues options to an argument parser."""
+    parser.add_argument('--fail-fast', action='store_true',
+                        help=f'Stop after the first notebook with {failure}, and exit with status 1')
+    parser.add_argument('--max-issues', type=int, metavar='N',
+                        help='Stop once N issues have been found, and exit with status 1')
+
+@functools.lru_cache(maxsize=None)
+def _glob_matcher(patterns):
+    """Return one compiled regex matching any of a tuple of globs, or None for no globs."""
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{fnmatch.translate(pattern)})' for pattern in patterns)).match
+
+def _matches_any(path, patterns):
+    match = _glob_matcher(tuple(patterns))
+    return match is not None and match(path) is not None
+
+def notebook_matches(relative_path, include=DEFAULT_INCLUDE, exclude=()):
+    """Return whether a path relative to the searched directory names a notebook to check.
+
+    Globs are matched against the whole relative path with '/' separators,
+    and '*' also matches '/', so '*.ipynb' finds notebooks at any depth.
+    """
+    relative_path = relative_path.replace(os.sep, '/')
+    name = relative_path.rsplit('/', 1)[-1]
+    if _matches_any(name, SKIPPED_FILES):
+        return False
+    parts = relative_path.split('/')[:-1]
+    if any(part.startswith('.') or part in SKIPPED_DIRS for part in parts):
+        return False
+    return not _matches_any(relative_path, exclude) and _matches_any(relative_path, include)
+
+def iter_notebooks(directory, include=DEFAULT_INCLUDE, exclude=(), recursive=True):
+    """Yield the paths of the notebooks under directory as they are found.
+
+    Each directory is read once with os.scandir and its notebooks are
+    yielded before any subdirectory is entered, so the first notebook is
+    available after a single listing whatever the size of the tree. Within
+    a directory the order is the filesystem's, as with Path.glob. Hidden
+    directories, .ipynb_checkpoints, *.bak files and excluded directories
+    are skipped without being read.
+    """
+    pending = ['']
+    while pending:
+        relative = pending.pop(0)
+        subdirectories = []
+        try:
+            with os.scandir(os.path.join(directory, relative)) as entries:
+                for entry in entries:
+                    entry_path = os.path.join(relative, entry.name) if relative else entry.name
+                    # Symlinked directories are not followed, so a link cannot make a loop
+                    if entry.is_dir(follow_symlinks=False):
+                        if (recursive and not entry.name.startswith('.') and entry.name not in SKIPPED_DIRS
+                                and not _matches_any(entry_path.replace(os.sep, '/'), exclude)):
+                            subdirectories.append(entry_path)
+                    elif notebook_matches(entry_path, include, exclude):
+                        yield os.path.join(directory, entry_path)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            # Removed, replaced or locked since it was listed
+            continue
+        pending[:0] = subdirectories
+
+def discover_notebooks(args):
+    """Return the notebook generator for a tool's --include, --exclude and --no-recursive options."""
+    return iter_notebooks(args.directory, args.include or DEFAULT_INCLUDE, args.exclude,
+                          not args.no_recursive)
+
+def discovery_filter(args):
+    """Return a predicate on relative paths that applies the same options, for other notebook sources."""
+    include = args.include or DEFAULT_INCLUDE
+
+    def matches(relative_path):
+        if args.no_recursive and ('/' in relative_path or os.sep in relative_path):
+            return False
+        return notebook_matches(relative_path, include, args.exclude)
+
+    return matches
+
+def record(notebooks, seen):
+    """Yield notebooks, appending each to the list seen as it passes."""
+    for notebook in notebooks:
+        seen.append(notebook)
+        yield notebook
+
+def filters_applied(args):
+    """Return whether the discovery options leave out notebooks a default search would find."""
+    return bool(args.include or args.exclude or args.no_recursive)
+
+class EarlyExit:
+    """Pass (notebook, issues, error) results through until a stop condition is met.
+
+    With fail_fast, the stream ends after the first notebook with an issue
+    for which is_failure is true; with max_issues, after the notebook that
+    brings the total to N. The notebook that triggered the stop is still
+    passed on, so it is reported. Ending the stream closes the generators
+    upstream, which stops discovery and shuts down any worker pool. When
+    the results are not issue lists themselves, issues_of extracts one.
+    """
+
+    def __init__(self, fail_fast=False, max_issues=None, is_failure=None, issues_of=None):
+        self.fail_fast = fail_fast
+        self.max_issues = max_issues
+        self.is_failure = is_failure or (lambda issue: True)
+        self.issues_of = issues_of or (lambda result: result)
+        self.issues = 0
+        self.notebooks = 0
+        self.reason = None
+
+    def apply(self, results):
+        """Yield results until the stop condition; the reason is left in self.reason."""
+        try:
+            for notebook, result, error in results:
+                self.notebooks += 1
+                yield notebook, result, error
+                issues = None if error else self.issues_of(result)
+                if not issues:
+                    continue
+                self.issues += len(issues)
+                if self.fail_fast and any(self.is_failure(issue) for issue in issues):
+                    self.reason = f'--fail-fast: stopped after {notebook}'
+                elif self.max_issues is not None and self.issues >= self.max_issues:
+                    self.reason = f'--max-issues: stopped after {self.issues} issues'
+                if self.reason:
+                    return
+        finally:
+            if hasattr(results, 'close'):
+                results.close()
+
+def early_exit(args, is_failure=None, issues_of=None):
+    """Return an EarlyExit for a tool's --fail-fast and --max-issues options, or None if neither is set."""
+    if not args.fail_fast and args.max_issues is None:
+        return None
+    return EarlyExit(args.fail_fast, args.max_issues, is_failure, issues_of)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Process-pool helpers for running a notebook function over many notebooks.
+"""
+
+import contextlib
+import io
+import sys
+
+# concurrent.futures pulls in multiprocessing, which a serial run never
+# needs; it is imported by the functions below that start a pool
+
+def add_pool_arguments(parser):
+    """Add the --jobs and --timeout options to an argument parser."""
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Number of worker processes (default: 1, no pool)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Seconds allowed per notebook when --jobs is above 1')
+
+def _run_captured(func, notebook_path):
+    """Run func on a notebook in a worker, returning its result and printed output."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = func(notebook_path)
+    return result, output.getvalue()
+
+def _kill_pool(executor):
+    """Stop a pool without waiting for hung or crashed workers."""
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+def _run_isolated(func, notebook_path, timeout):
+    """Run one notebook in its own single-worker pool to see whether it fails alone."""
+    from concurrent.futures import ProcessPoolExecutor, TimeoutError
+    from concurrent.futures.process import BrokenProcessPool
+
+    executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(_run_captured, func, notebook_path).result(timeout=timeout), None
+    except TimeoutError:
+        return None, f'timed out after {timeout} seconds'
+    except BrokenProcessPool:
+        return None, 'worker process crashed'
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+    finally:
+        _kill_pool(executor)
+
+def _succeeded(future):
+    """Return whether a future has finished without raising."""
+    return future.done() and not future.cancelled() and future.exception() is None
+
+def iter_notebook_results(func, notebooks, jobs=1, timeout=None):
+    """Yield (notebook, result, error) for each notebook, in input order.
+
+    notebooks may be a generator: it is consumed as the run goes, so the
+    first result does not wait for the whole list. With one job, func runs
+    in this process as a serial loop would. With more, notebooks
+    are sent to a process pool, at most two per worker ahead of the one
+    being yielded; the output each worker prints is replayed in input order
+    so it matches a serial run. A notebook that raises is reported with an
+    error message and a result of None, in either mode; so is one that
+    hangs past the timeout or kills its worker, and the rest of the run
+    carries on in a fresh pool.
+    Closing the generator early shuts the pool down.
+    """
+    notebooks = (str(notebook) for notebook in notebooks)
+    if jobs <= 1:
+        for notebook in notebooks:
+            try:
+                result, error = func(notebook), None
+            except Exception as e:
+                result, error = None, f'{type(e).__name__}: {e}'
+            yield notebook, result, error
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor, TimeoutError
+    from concurrent.futures.process import BrokenProcessPool
+
+    window = jobs * 2
+    # (notebook, future) pairs left over from a broken pool, to go first into
+    # the next one; the future is None for a notebook that has to be run again
+    carried = deque()
+    while True:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        in_flight = deque()
+        broken = False
+        try:
+            while True:
+                while len(in_flight) < window:
+                    notebook, future = carried.popleft() if carried else (next(notebooks, None), None)
+                    if notebook is None:
+                        break
+                    if future is None:
+                        try:
+                            future = executor.submit(_run_captured, func, notebook)
+                        except BrokenProcessPool:
+                            # A worker died since the last result: the notebooks in
+                            # flight say which, and this one waits for the next pool
+                            carried.appendleft((notebook, None))
+                            break
+                    in_flight.append((notebook, future))
+                if not in_flight:
+                    if not carried:
+                        return
+                    break
+                notebook, future = in_flight.popleft()
+                try:
+                    (result, output), error = future.result(timeout=timeout), None
+                except TimeoutError:
+                    (result, output), error = (None, ''), f'timed out after {timeout} seconds'
+                    broken = True
+                except BrokenProcessPool:
+                    # Any pending future fails when one worker dies, so rerun
+                    # this notebook alone to find out whether it is the culprit
+                    captured, error = _run_isolated(func, notebook, timeout)
+                    result, output = captured if captured is not None else (None, '')
+                    broken = True
+                except Exception as e:
+                    (result, output), error = (None, ''), f'{type(e).__name__}: {e}'
+                sys.stdout.write(output)
+                yield notebook, result, error
+                if broken:
+                    # Notebooks that already finished keep their results; only
+                    # the ones still running or failed with the pool run again
+                    carried.extendleft(reversed([
+                        (pending, future if _succeeded(future) else None) for pending, future in in_flight
+                    ]))
+                    break
+        finally:
+            _kill_pool(executor)
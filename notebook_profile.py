@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+"""
+Per-rule and per-phase profiling for the checkers' --profile mode.
+"""
+
+import contextlib
+import json
+import time
+
+FIELDS = ('seconds', 'calls', 'matches', 'bytes', 'syscalls')
+
+# Profile of the notebook being checked in this process, or None when not profiling.
+# The engine reads it once per cell, so a disabled profiler costs one global lookup.
+active = None
+
+class Profile:
+    """Counters for each rule and phase, for one notebook or merged over a run.
+
+    Each entry holds wall seconds, calls, matches (issues found or paths
+    missing), bytes scanned and filesystem calls. Entries are plain lists so
+    a Profile pickles cheaply back from a worker process.
+    """
+
+    def __init__(self):
+        self.rules = {}
+        self.phases = {}
+
+    def _add(self, table, name, seconds, calls, matches, nbytes, syscalls):
+        entry = table.get(name)
+        if entry is None:
+            entry = table[name] = [0.0, 0, 0, 0, 0]
+        entry[0] += seconds
+        entry[1] += calls
+        entry[2] += matches
+        entry[3] += nbytes
+        entry[4] += syscalls
+
+    def rule(self, name, seconds, matches=0, nbytes=0):
+        """Record one call of a rule."""
+        self._add(self.rules, name, seconds, 1, matches, nbytes, 0)
+
+    def phase(self, name, seconds, calls=1, matches=0, nbytes=0, syscalls=0):
+        """Record time spent in a phase: load, scan, cache or paths."""
+        self._add(self.phases, name, seconds, calls, matches, nbytes, syscalls)
+
+    def merge(self, other):
+        """Add another profile's counters to this one."""
+        for table, other_table in ((self.rules, other.rules), (self.phases, other.phases)):
+            for name, entry in other_table.items():
+                self._add(table, name, *entry)
+
+    def seconds(self):
+        """Return the time spent in all phases."""
+        return sum(entry[0] for entry in self.phases.values())
+
+    def to_dict(self):
+        return {
+            table_name: {name: dict(zip(FIELDS, entry)) for name, entry in table.items()}
+            for table_name, table in (('rules', self.rules), ('phases', self.phases))
+        }
+
+@contextlib.contextmanager
+def timed_phase(name, nbytes=0):
+    """Time the enclosed block as a phase of the active profile, if any."""
+    profile = active
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phase(name, time.perf_counter() - start, nbytes=nbytes)
+
+def profile_call(func, notebook_path):
+    """Call func(notebook_path) with profiling on and return (result, Profile).
+
+    Module-level so it can be sent to a worker process with functools.partial.
+    """
+    global active
+    active = Profile()
+    try:
+        result = func(notebook_path)
+    finally:
+        profile, active = active, None
+    return result, profile
+
+def add_profile_arguments(parser):
+    """Add the --profile and --profile-output options to an argument parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='Record time, calls, matches and bytes scanned per rule and phase')
+    parser.add_argument('--profile-output',
+                        help='Also write the profile to this file: Prometheus text if it ends in .prom, '
+                             'JSON otherwise (implies --profile)')
+
+def profiling_enabled(args):
+    return args.profile or bool(args.profile_output)
+
+class RunProfile:
+    """The profiles of every notebook in a run and their total."""
+
+    def __init__(self):
+        self.total = Profile()
+        self.notebooks = {}
+
+    def add(self, notebook, profile):
+        self.notebooks[str(notebook)] = profile
+        self.total.merge(profile)
+
+    def collect(self, results):
+        """Take the profiles out of (notebook, (result, profile), error) results as they pass."""
+        for notebook, profiled, error in results:
+            if error:
+                yield notebook, None, error
+                continue
+            result, profile = profiled
+            self.add(notebook, profile)
+            yield notebook, result, error
+
+    def finish(self, output=None, file=None):
+        """Print the table and write the profile file, if one was asked for."""
+        self.print_table(file)
+        if output:
+            self.write(output)
+            print(f"Profile written to {output}", file=file)
+
+    def print_table(self, file=None, slowest=5):
+        """Print the rules and phases across the run, then the slowest notebooks."""
+        print("\n\n===== PROFILE =====", file=file)
+        header = f"{'seconds':>9} {'calls':>8} {'matches':>8} {'MB':>8} {'syscalls':>9} {'us/call':>9}"
+        for title, table in (('phase', self.total.phases), ('rule', self.total.rules)):
+            print(f"{title:<28} {header}", file=file)
+            for name, (seconds, calls, matches, nbytes, syscalls) in sorted(
+                    table.items(), key=lambda item: -item[1][0]):
+                per_call = seconds / calls * 1e6 if calls else 0.0
+                print(f"{name:<28} {seconds:>9.4f} {calls:>8} {matches:>8} {nbytes / 1e6:>8.2f} "
+                      f"{syscalls:>9} {per_call:>9.1f}", file=file)
+            print(file=file)
+        ranked = sorted(self.notebooks.items(), key=lambda item: -item[1].seconds())[:slowest]
+        if ranked:
+            print("Slowest notebooks:", file=file)
+            for notebook, profile in ranked:
+                print(f"  {profile.seconds():.4f}s {notebook}", file=file)
+
+    def to_dict(self):
+        return {
+            'total': self.total.to_dict(),
+            'notebooks': {notebook: profile.to_dict() for notebook, profile in self.notebooks.items()},
+        }
+
+    def to_prometheus(self, prefix='notebook_checker'):
+        """Return the run totals in the Prometheus text exposition format.
+
+        Per-notebook counters are left out to keep label cardinality bounded;
+        they are in the JSON output.
+        """
+        lines = []
+        for table_name, label, table in (('rule', 'rule', self.total.rules),
+                                         ('phase', 'phase', self.total.phases)):
+            for i, field in enumerate(FIELDS):
+                metric = f"{prefix}_{table_name}_{field}_total"
+                lines.append(f"# HELP {metric} {field.capitalize()} per {table_name}, summed over the run")
+                lines.append(f"# TYPE {metric} counter")
+                for name, entry in sorted(table.items()):
+                    lines.append(f'{metric}{{{label}="{name}"}} {entry[i]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the profile as Prometheus text (.prom) or JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=1)
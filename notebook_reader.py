@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+"""
+Streaming notebook reader that yields cell sources without loading outputs.
+"""
+
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+CODE_CELLS = ('code',)
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_SCALAR = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|true|false|null')
+_SCALAR_LOOKAHEAD = 64
+
+class NotebookFormatError(ValueError):
+    """Raised when a notebook file is not valid notebook JSON."""
+
+class _Scanner:
+    """Pull parser over a text stream that keeps only a small window in memory."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.offset = 0
+        self.eof = False
+
+    def _fill(self, keep_from=None):
+        """Read another chunk, dropping buffered text before keep_from (default pos)."""
+        if keep_from is None:
+            keep_from = self.pos
+        self.offset += keep_from
+        self.buf = self.buf[keep_from:]
+        self.pos -= keep_from
+        chunk = self.f.read(self.chunk_size)
+        if chunk:
+            self.buf += chunk
+        else:
+            self.eof = True
+        return bool(chunk)
+
+    def error(self, message):
+        raise NotebookFormatError(f'{message} at offset {self.offset + self.pos}')
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            self.error(f'Expected {char!r}')
+        self.pos += 1
+
+    def _string_end(self, keep):
+        """Find the quote closing the string whose content starts at pos.
+        
+        Quotes are found with str.find and only count when preceded by an
+        even run of backslashes. Returns (start, end): the buffer indices of
+        the string content and its closing quote. With keep, the content is
+        held in the buffer across refills; otherwise it is dropped as the
+        scan moves on and start is meaningless.
+        """
+        start = pos = self.pos
+        while True:
+            quote = self.buf.find('"', pos)
+            if quote != -1:
+                backslashes = 0
+                while quote - backslashes > pos and self.buf[quote - backslashes - 1] == '\\':
+                    backslashes += 1
+                if backslashes % 2 == 0:
+                    return start, quote
+                pos = quote + 1
+                continue
+            # Hold back a trailing run of backslashes so its parity survives the refill
+            tail = len(self.buf) - len(self.buf.rstrip('\\'))
+            self.pos = max(pos, len(self.buf) - tail)
+            if not self._fill(keep_from=start if keep else None):
+                self.error('Unterminated string')
+            if keep:
+                start = 0
+            pos = self.pos
+
+    def read_string(self):
+        """Read and decode a JSON string."""
+        self.expect('"')
+        start, _ = self._string_end(keep=True)
+        value, self.pos = json.decoder.scanstring(self.buf, start)
+        return value
+
+    def skip_string(self):
+        """Move past a JSON string without building it, however long it is."""
+        self.expect('"')
+        _, end = self._string_end(keep=False)
+        self.pos = end + 1
+
+    def read_scalar(self):
+        """Read a number, true, false or null."""
+        self.peek()
+        while len(self.buf) - self.pos < _SCALAR_LOOKAHEAD and not self.eof:
+            self._fill()
+        match = _SCALAR.match(self.buf, self.pos)
+        if match is None:
+            self.error('Unexpected character')
+        self.pos = match.end()
+        return json.loads(match.group())
+
+    def read_value(self):
+        """Read and build any JSON value; only used for small values."""
+        char = self.peek()
+        if char == '"':
+            return self.read_string()
+        if char == '[':
+            return list(self.iter_array(self.read_value))
+        if char == '{':
+            return {key: value for key, value in self.iter_object(lambda key: self.read_value())}
+        return self.read_scalar()
+
+    def skip_value(self):
+        """Move past any JSON value without building it."""
+        char = self.peek()
+        if char == '"':
+            self.skip_string()
+            return
+        if char not in '[{':
+            self.read_scalar()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    self.error('Unterminated container')
+                continue
+            char = match.group()
+            if char == '"':
+                self.pos = match.start()
+                self.skip_string()
+                continue
+            self.pos = match.end()
+            depth += 1 if char in '[{' else -1
+            if depth == 0:
+                return
+
+    def iter_array(self, read_item):
+        """Yield read_item() for each element of a JSON array."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield read_item()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                self.error("Expected ',' or ']'")
+
+    def iter_object(self, read_member):
+        """Yield (key, read_member(key)) for each member of a JSON object."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(':')
+            yield key, read_member(key)
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                self.error("Expected ',' or '}'")
+
+def iter_cells(notebook_path, cell_types=None, chunk_size=CHUNK_SIZE):
+    """Yield (index, cell_type, source) for each cell of a notebook, streaming.
+
+    The file is read in chunks and parsed incrementally. Cell outputs,
+    attachments and metadata are skipped without ever being built, so
+    memory use is bounded by the chunk size and the largest cell source
+    rather than by the size of the outputs. With cell_types, cells of other
+    types are yielded with a source of None.
+    """
+    with open(notebook_path, 'r', encoding='utf-8') as f:
+        scanner = _Scanner(f, chunk_size)
+
+        def read_cell(index):
+            cell = {'cell_type': None, 'source': None}
+
+            def read_member(key):
+                if key == 'cell_type':
+                    cell['cell_type'] = scanner.read_string()
+                elif key == 'source' and (cell_types is None or cell['cell_type'] in cell_types
+                                          or cell['cell_type'] is None):
+                    source = scanner.read_value()
+                    cell['source'] = ''.join(source) if isinstance(source, list) else source
+                else:
+                    scanner.skip_value()
+
+            for _ in scanner.iter_object(read_member):
+                pass
+            if cell_types is not None and cell['cell_type'] not in cell_types:
+                cell['source'] = None
+            return index, cell['cell_type'], cell['source']
+
+        found_cells = False
+        for key, _ in scanner.iter_object(lambda key: None if key == 'cells' else scanner.skip_value()):
+            if key != 'cells':
+                continue
+            found_cells = True
+            index = 0
+            # iter_object has stopped just after the colon; stream the cells array
+            for cell in scanner.iter_array(lambda: read_cell(index)):
+                yield cell
+                index += 1
+        if not found_cells:
+            raise NotebookFormatError(f"No 'cells' array in {notebook_path}")
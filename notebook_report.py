@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Streaming JSONL and SARIF reports for the advanced notebook checker.
+"""
+
+import json
+
+from notebook_cache import source_hash
+
+SEVERITIES = ('high', 'medium', 'low')
+
+# Rule ids for SARIF and JSONL, keyed by the start of the issue message
+RULE_IDS = [
+    ('Deprecated method:', 'deprecated-method', 'Deprecated pandas method'),
+    ('File path may not exist:', 'missing-file-path', 'Referenced file may not exist'),
+    ("Missing 'display.' prefix", 'set-option-prefix', "pd.set_option option without 'display.' prefix"),
+    ('Multiple options in pd.set_option()', 'set-option-multiple', 'Multiple options in one pd.set_option call'),
+    ('Unsupported operation:', 'list-subtraction', 'Number subtracted from a list'),
+    ('Version-specific code', 'version-specific', 'Code that depends on the pandas version'),
+    ('Execution failed:', 'execution-error', 'Cell raised an error when run'),
+    ('Execution timed out', 'execution-timeout', 'Cell did not finish within the timeout'),
+]
+
+SARIF_LEVELS = {'high': 'error', 'medium': 'warning', 'low': 'note'}
+
+def rule_id(issue):
+    """Return the rule id of an issue from its message."""
+    for prefix, rule, _ in RULE_IDS:
+        if issue['issue'].startswith(prefix):
+            return rule
+    return 'other'
+
+def issue_records(notebook, issues):
+    """Yield a compact record per issue: the cell by index and hash, not its source."""
+    hashes = {}
+    for issue in issues:
+        code = issue.get('code')
+        if code is not None and id(code) not in hashes:
+            hashes[id(code)] = source_hash(code)
+        yield {
+            'notebook': notebook,
+            'cell_index': issue['cell_index'],
+            'cell_sha1': hashes.get(id(code)),
+            'rule': rule_id(issue),
+            'severity': issue['severity'],
+            'issue': issue['issue'],
+            'fix': issue['fix'],
+        }
+
+class StreamingReport:
+    """Base for reports written as results arrive, keeping only severity counts."""
+
+    def __init__(self, out):
+        self.out = out
+        self.counts = dict.fromkeys(SEVERITIES, 0)
+        self.notebooks = 0
+        self.notebooks_with_issues = 0
+        self.errors = 0
+
+    def begin(self):
+        pass
+
+    def add(self, notebook, issues):
+        """Write the issues of one notebook."""
+        self.notebooks += 1
+        if issues:
+            self.notebooks_with_issues += 1
+        for record in issue_records(notebook, issues):
+            self.counts[record['severity']] += 1
+            self.write_issue(record)
+        self.out.flush()
+
+    def error(self, notebook, message):
+        """Record a notebook that could not be checked."""
+        self.notebooks += 1
+        self.errors += 1
+        self.write_error(notebook, message)
+        self.out.flush()
+
+    def summary(self):
+        """Return the running totals."""
+        return {
+            'notebooks': self.notebooks,
+            'notebooks_with_issues': self.notebooks_with_issues,
+            'notebooks_failed': self.errors,
+            'total': sum(self.counts.values()),
+            **self.counts,
+        }
+
+class JsonlReport(StreamingReport):
+    """One JSON object per line: issues, errors, then a summary line."""
+
+    def write_issue(self, record):
+        self.out.write(json.dumps({'type': 'issue', **record}) + '\n')
+
+    def write_error(self, notebook, message):
+        self.out.write(json.dumps({'type': 'error', 'notebook': notebook, 'error': message}) + '\n')
+
+    def end(self):
+        self.out.write(json.dumps({'type': 'summary', **self.summary()}) + '\n')
+        self.out.flush()
+
+class SarifReport(StreamingReport):
+    """A SARIF 2.1.0 log whose results array is written one result at a time.
+
+    Failed notebooks are reported as tool execution notifications after the
+    results, and the totals go in the run's properties.
+    """
+
+    def __init__(self, out, tool_name):
+        super().__init__(out)
+        self.tool_name = tool_name
+        self.first_result = True
+        self.notifications = []
+
+    def begin(self):
+        driver = {
+            'name': self.tool_name,
+            'rules': [
+                {'id': rule, 'shortDescription': {'text': description}}
+                for _, rule, description in RULE_IDS
+            ],
+        }
+        header = json.dumps({
+            '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+            'version': '2.1.0',
+        })
+        # Leave the log open after "results": [ so results can be streamed in
+        self.out.write(header[:-1] + ', "runs": [{"tool": ' + json.dumps({'driver': driver}) + ', "results": [\n')
+        self.out.flush()
+
+    def write_issue(self, record):
+        result = {
+            'ruleId': record['rule'],
+            'level': SARIF_LEVELS.get(record['severity'], 'warning'),
+            'message': {'text': f"{record['issue']}. {record['fix']}"},
+            'locations': [{
+                'physicalLocation': {'artifactLocation': {'uri': record['notebook']}},
+                'logicalLocations': [{'name': f"cell {record['cell_index']}", 'kind': 'element'}],
+            }],
+            'properties': {
+                'cellIndex': record['cell_index'],
+                'cellSha1': record['cell_sha1'],
+                'severity': record['severity'],
+            },
+        }
+        self.out.write(('' if self.first_result else ',\n') + json.dumps(result))
+        self.first_result = False
+
+    def write_error(self, notebook, message):
+        self.notifications.append({
+            'level': 'error',
+            'message': {'text': message},
+            'locations': [{'physicalLocation': {'artifactLocation': {'uri': notebook}}}],
+        })
+
+    def end(self):
+        invocation = {
+            'executionSuccessful': not self.notifications,
+            'toolExecutionNotifications': self.notifications,
+        }
+        self.out.write('\n], "invocations": ' + json.dumps([invocation])
+                       + ', "properties": ' + json.dumps({'summary': self.summary()}) + '}]}\n')
+        self.out.flush()
+
+def make_report(report_format, out, tool_name):
+    """Return the streaming report for a --format value."""
+    if report_format == 'jsonl':
+        return JsonlReport(out)
+    if report_format == 'sarif':
+        return SarifReport(out, tool_name)
+    raise ValueError(f'Unknown report format: {report_format}')
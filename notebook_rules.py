@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""
+Rule tables and a compiled single-pass matcher for the notebook checkers.
+"""
+
+import hashlib
+import json
+import re
+
+# Deprecated pandas methods and their replacements, checked in this order
+DEPRECATED_METHODS = [
+    ('get_dtype_counts()', 'dtypes.value_counts()'),
+    ('append(', 'concat([df1, df2], ignore_index=True)'),
+    ('ix[', 'loc[ or iloc['),
+    ('as_matrix()', 'to_numpy()'),
+    ('read_table(', 'read_csv('),
+    ('convert_objects(', 'astype()'),
+    ('pd.TimeGrouper(', 'pd.Grouper(freq='),
+    ('pd.SparseDataFrame(', 'pd.DataFrame(...).sparse.from_spmatrix('),
+    ('pd.SparseSeries(', 'pd.Series(..., dtype="Sparse")'),
+    ('pd.Panel(', 'Use MultiIndex DataFrame instead'),
+    ('pd.scatter_matrix(', 'pd.plotting.scatter_matrix('),
+    ('pd.tools.plotting.', 'pd.plotting.'),
+    ('pd.tseries.plotting.', 'pd.plotting.'),
+    ('pd.stats.', 'Use statsmodels instead'),
+    ('pd.rolling_', 'df.rolling().'),
+    ('pd.expanding_', 'df.expanding().'),
+    ('pd.ewma(', 'df.ewm().mean()'),
+    ('pd.ewmstd(', 'df.ewm().std()'),
+    ('pd.ewmvar(', 'df.ewm().var()'),
+    ('pd.ewmcorr(', 'df.ewm().corr()'),
+    ('pd.ewmcov(', 'df.ewm().cov()'),
+    ('isnull()', 'isna()'),
+    ('notnull()', 'notna()'),
+    ('pd.TimeGrouper(', 'pd.Grouper(freq='),
+    ('sort(', 'sort_values('),
+    ('sort_index(inplace=True)', 'sort_index()'),
+    ('sort_values(inplace=True)', 'sort_values()'),
+    ('reset_index(inplace=True)', 'reset_index()'),
+    ('set_index(inplace=True)', 'set_index()'),
+    ('fillna(inplace=True)', 'fillna()'),
+    ('dropna(inplace=True)', 'dropna()'),
+    ('drop(inplace=True)', 'drop()'),
+    ('rename(inplace=True)', 'rename()'),
+    ('replace(inplace=True)', 'replace()'),
+]
+
+# Calls whose first string argument is a file path, checked in this order
+FILE_PATH_PATTERNS = [
+    r"pd\.read_csv\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_excel\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_parquet\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_hdf\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_pickle\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_json\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_html\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_sas\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_stata\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_feather\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_spss\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_orc\(['\"]([^'\"]+)['\"]",
+    r"pd\.read_sql\(['\"]([^'\"]+)['\"]",
+    r"open\(['\"]([^'\"]+)['\"]",
+    r"with open\(['\"]([^'\"]+)['\"]",
+    r"os\.path\.join\(['\"]([^'\"]+)['\"]",
+    r"Path\(['\"]([^'\"]+)['\"]",
+]
+
+# pd.set_option checks: first option name, and more than one option/value pair
+SET_OPTION_PATTERN = r"pd\.set_option\(['\"]([^'\"]+)['\"]"
+SET_OPTION_MULTIPLE_PATTERN = r"pd\.set_option\([^,]+,[^,]+,[^,]+"
+
+# pd.set_option checks shared by check_notebooks.py and fix_notebooks.py:
+# an option without the 'display.' prefix, two option/value pairs in one
+# call, and the pieces needed to split such a call
+SET_OPTION_NO_PREFIX_PATTERN = r"pd\.set_option\(['\"](?!display\.)([^'\"]+)['\"]"
+SET_OPTION_PAIR_PATTERN = r"pd\.set_option\(['\"]([^'\"]+)['\"],\s*[^,]+,\s*['\"]([^'\"]+)['\"]"
+SET_OPTION_SECOND_OPTION_PATTERN = r"pd\.set_option\([^,]+,\s*[^,]+,\s*['\"]([^'\"]+)['\"]"
+SET_OPTION_FIRST_VALUE_PATTERN = r"pd\.set_option\([^,]+,\s*([^,]+),"
+SET_OPTION_SECOND_VALUE_PATTERN = r"pd\.set_option\([^,]+,\s*[^,]+,\s*[^,]+,\s*([^)]+)"
+SET_OPTION_PAIR_CALL_PATTERN = r"pd\.set_option\(['\"]([^'\"]+)['\"],\s*([^,]+),\s*['\"]([^'\"]+)['\"],\s*([^)]+)\)"
+
+# Arithmetic on a list literal, e.g. [1, 2, 3] - 1, and its list part
+LIST_SUBTRACTION_PATTERN = r'\[[^\]]*\]\s*-\s*\d+'
+LIST_LITERAL_PATTERN = r'\[[^\]]*\]'
+
+# Bump when the check logic changes in a way the tables above do not show
+RULES_VERSION = 2
+
+def rules_fingerprint(*extra):
+    """Return a hash of the active rule tables, plus any extra values."""
+    tables = [
+        RULES_VERSION,
+        DEPRECATED_METHODS,
+        FILE_PATH_PATTERNS,
+        SET_OPTION_PATTERN,
+        SET_OPTION_MULTIPLE_PATTERN,
+        LIST_SUBTRACTION_PATTERN,
+        list(extra),
+    ]
+    return hashlib.sha256(json.dumps(tables).encode('utf-8')).hexdigest()
+
+def _trie_regex(node):
+    """Turn a character trie into a regex that prefers the longest literal."""
+    branches = []
+    for char in sorted(node):
+        if char == '':
+            continue
+        branches.append(re.escape(char) + _trie_regex(node[char]))
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # A literal ends here: the longer continuations are optional
+        return '(?:' + body + ')?'
+    return body
+
+class LiteralMatcher:
+    """Find which of a set of literals occur in a text in one scan.
+
+    The literals are stored in an Aho-Corasick style trie which is compiled
+    into a single regex, so the scan itself runs in the regex engine instead
+    of a Python loop over characters. Each hit reports the longest literal
+    starting at that position; every shorter literal that is a prefix of it
+    is looked up from a precomputed table, and the scan resumes one character
+    later so that overlapping literals are never missed.
+    """
+
+    def __init__(self, literals):
+        self.literals = list(dict.fromkeys(literals))
+        trie = {}
+        for literal in self.literals:
+            node = trie
+            for char in literal:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self.regex = re.compile(_trie_regex(trie)) if self.literals else None
+        self.prefixes = {
+            literal: frozenset(other for other in self.literals if literal.startswith(other))
+            for literal in self.literals
+        }
+
+    def find(self, text):
+        """Return the set of literals that occur anywhere in text."""
+        found = set()
+        if self.regex is None:
+            return found
+        search = self.regex.search
+        pos = 0
+        while True:
+            match = search(text, pos)
+            if match is None:
+                return found
+            found |= self.prefixes[match.group()]
+            pos = match.start() + 1
+
+class PatternMatcher:
+    """Run a list of regexes over a text with one combined alternation.
+
+    The result is identical to calling ``re.finditer`` with each pattern in
+    turn: a list of ``(pattern_index, match)`` pairs ordered by pattern and
+    then by position, with the matches of each pattern not overlapping.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        combined = '|'.join(f'(?:{pattern.pattern})' for pattern in self.patterns)
+        self.regex = re.compile(combined) if self.patterns else None
+
+    def finditer(self, text):
+        """Return every match of every pattern in text, in serial order."""
+        if self.regex is None:
+            return []
+        hits = []
+        last_end = [0] * len(self.patterns)
+        search = self.regex.search
+        pos = 0
+        while True:
+            candidate = search(text, pos)
+            if candidate is None:
+                break
+            start = candidate.start()
+            for index, pattern in enumerate(self.patterns):
+                if start < last_end[index]:
+                    continue
+                match = pattern.match(text, start)
+                if match is not None:
+                    hits.append((index, match))
+                    last_end[index] = max(match.end(), start + 1)
+            pos = start + 1
+        hits.sort(key=lambda hit: (hit[0], hit[1].start()))
+        return hits
+
+class RuleMatcher:
+    """Compiled form of the deprecated-method and file-path rule tables."""
+
+    def __init__(self, deprecated_methods=DEPRECATED_METHODS, file_path_patterns=FILE_PATH_PATTERNS):
+        self.deprecated_methods = list(deprecated_methods)
+        self.file_path_patterns = list(file_path_patterns)
+        self.literals = LiteralMatcher(old for old, _ in self.deprecated_methods)
+        self.paths = PatternMatcher(self.file_path_patterns)
+
+    def deprecated(self, source):
+        """Return the (old, new) pairs found in source, in table order."""
+        found = self.literals.find(source)
+        return [(old, new) for old, new in self.deprecated_methods if old in found]
+
+    def file_paths(self, source):
+        """Return the file path argument of every path-pattern match in source."""
+        return [match.group(1) for _, match in self.paths.finditer(source)]
+
+_RULE_MATCHER = None
+
+def get_rule_matcher():
+    """Return the process-wide matcher for the default rule tables."""
+    global _RULE_MATCHER
+    if _RULE_MATCHER is None:
+        _RULE_MATCHER = RuleMatcher()
+    return _RULE_MATCHER
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Script to find the notebook cells that use given pandas functions and methods.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from notebook_engine import pandas_version
+from notebook_index import SymbolIndex, index_fingerprint
+from notebook_pipeline import add_discovery_arguments, discover_notebooks
+
+def print_matches(term, matches):
+    """Print the notebooks and cells a term was found in."""
+    cells = {}
+    for symbol, notebook, cell_index, count in matches:
+        cells.setdefault(notebook, {}).setdefault(cell_index, 0)
+        cells[notebook][cell_index] += count
+    total = sum(count for *_, count in matches)
+    cell_count = sum(len(notebook_cells) for notebook_cells in cells.values())
+    symbols = sorted({symbol for symbol, *_ in matches})
+    print(f"\n{term}: {total} uses in {cell_count} cells of {len(cells)} notebooks"
+          + (f" ({', '.join(symbols)})" if symbols else ''))
+    for notebook, notebook_cells in cells.items():
+        print(f"  {notebook}: cells {', '.join(str(cell_index) for cell_index in notebook_cells)}")
+
+def print_failures(failed_notebooks, file=None):
+    """Print the notebooks that could not be indexed, if any."""
+    if failed_notebooks:
+        print(f"\n{len(failed_notebooks)} notebooks could not be indexed:", file=file)
+        for notebook, error in failed_notebooks.items():
+            print(f"  {notebook}: {error}", file=file)
+
+def main():
+    """Main function to query the symbol index of a directory of notebooks."""
+    parser = argparse.ArgumentParser(description='Find the notebook cells that use pandas functions and methods.')
+    parser.add_argument('directory', help='Directory containing .ipynb files')
+    parser.add_argument('symbols', nargs='*',
+                        help="Names to look up: a method ('groupby', 'ix['), or a pandas function "
+                             "('pd.read_excel', 'pd.api' for everything under it)")
+    parser.add_argument('--top', type=int, metavar='N',
+                        help='List the N most used symbols (the default when no names are given: 20)')
+    parser.add_argument('--no-update', action='store_true',
+                        help='Query the index as it is, without checking for changed notebooks')
+    parser.add_argument('--format', choices=('text', 'json'), default='text',
+                        help='Output format (default: text)')
+    add_discovery_arguments(parser)
+    args = parser.parse_args()
+    
+    directory = args.directory
+    
+    if not os.path.isdir(directory):
+        print(f"Error: {directory} is not a directory")
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    index = SymbolIndex(directory)
+    reindexed = removed = 0
+    failed_notebooks = {}
+    if not args.no_update:
+        notebooks = sorted(discover_notebooks(args))
+        reindexed, removed, failed_notebooks = index.update(notebooks, index_fingerprint(pandas_version()))
+    
+    top = args.top if args.top is not None else (20 if not args.symbols else None)
+    results = {term: index.query(term) for term in args.symbols}
+    ranked = index.top(top) if top else []
+    index.close()
+    elapsed = time.perf_counter() - start
+    
+    if args.format == 'json':
+        json.dump({
+            'matches': {
+                term: [dict(zip(('symbol', 'notebook', 'cell_index', 'count'), match)) for match in matches]
+                for term, matches in results.items()
+            },
+            'top': [dict(zip(('symbol', 'uses', 'notebooks'), row)) for row in ranked],
+        }, sys.stdout, indent=1)
+        print()
+        # stdout carries only the JSON document
+        print_failures(failed_notebooks, sys.stderr)
+        return
+    
+    if reindexed or removed:
+        print(f"Indexed {reindexed} changed notebooks, dropped {removed}")
+    for term, matches in results.items():
+        print_matches(term, matches)
+    if ranked:
+        print(f"\n{'symbol':<40} {'uses':>7} {'notebooks':>10}")
+        for symbol, uses, notebook_count in ranked:
+            print(f"{symbol:<40} {uses:>7} {notebook_count:>10}")
+    print_failures(failed_notebooks)
+    print(f"\nAnswered in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Tests for benchmark_notebooks.py on a small synthetic corpus.
+
+The timing tests compare against the benchmark history and the cold-start
+budget, so they depend on the machine; they run only when NOTEBOOK_BENCHMARKS
+is set, e.g. NOTEBOOK_BENCHMARKS=1 python -m pytest test_benchmark_notebooks.py
+"""
+
+import os
+
+import pytest
+
+import benchmark_notebooks
+from advanced_notebook_checker import check_notebook_for_issues
+from fix_notebooks import fix_notebook
+
+SMALL_CORPUS = {'notebooks': 4, 'cells': 10, 'cell_lines': 6, 'output_kb': 1, 'density': 0.3, 'seed': 0}
+
+timing = pytest.mark.skipif(not os.environ.get('NOTEBOOK_BENCHMARKS'),
+                            reason='timing benchmarks run only with NOTEBOOK_BENCHMARKS set')
+
+def test_corpus_is_reproducible(tmp_path):
+    first = benchmark_notebooks.write_corpus(str(tmp_path / 'first'), **SMALL_CORPUS)
+    second = benchmark_notebooks.write_corpus(str(tmp_path / 'second'), **SMALL_CORPUS)
+    assert len(first) == SMALL_CORPUS['notebooks']
+    for a, b in zip(first, second):
+        with open(a, 'rb') as f, open(b, 'rb') as g:
+            assert f.read() == g.read()
+
+def test_corpus_has_issues_to_find(tmp_path):
+    paths = benchmark_notebooks.write_corpus(str(tmp_path), **SMALL_CORPUS)
+    assert sum(len(check_notebook_for_issues(path)) for path in paths) > 0
+    # Otherwise the fixer's write phase would time nothing
+    assert all(fix_notebook(path, dry_run=True) > 0 for path in paths)
+
+def test_bench_tools_times_every_phase(capsys):
+    timings = benchmark_notebooks.bench_tools(SMALL_CORPUS, repeat=1)
+    assert set(timings) == {'advanced', 'check', 'fix'}
+    assert set(timings['advanced']) == {'load', 'scan', 'paths', 'total'}
+    assert set(timings['check']) == {'load', 'scan', 'total'}
+    assert set(timings['fix']) == {'load', 'scan', 'write', 'total'}
+    for tool_phases in timings.values():
+        assert all(seconds >= 0 for seconds in tool_phases.values())
+        assert tool_phases['total'] > 0
+    assert timings['fix']['write'] > 0
+    assert 'Synthetic corpus: 4 notebooks' in capsys.readouterr().out
+
+def test_compare_history_flags_slower_phases(tmp_path, capsys):
+    history = str(tmp_path / benchmark_notebooks.HISTORY_FILENAME)
+    fast = {'fix': {'write': 0.010, 'total': 0.100}}
+    slow = {'fix': {'write': 0.011, 'total': 0.200}}
+    assert benchmark_notebooks.record_history(history, SMALL_CORPUS, fast) == []
+    regressions = benchmark_notebooks.record_history(history, SMALL_CORPUS, slow)
+    assert regressions == [('fix', 'total', 0.100, 0.200)]
+    # Runs on another corpus are not compared
+    other = dict(SMALL_CORPUS, seed=1)
+    assert benchmark_notebooks.record_history(history, other, slow) == []
+
+@timing
+def test_no_regression_against_history(capsys):
+    history = os.environ.get('NOTEBOOK_BENCHMARK_HISTORY', benchmark_notebooks.HISTORY_FILENAME)
+    timings = benchmark_notebooks.bench_tools(SMALL_CORPUS)
+    regressions = benchmark_notebooks.record_history(history, SMALL_CORPUS, timings)
+    assert not regressions, capsys.readouterr().out
+
+@timing
+def test_cold_start_within_budget(capsys):
+    assert benchmark_notebooks.bench_cold_start(), capsys.readouterr().out
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Tests for compact_notebooks.py: compacting and rehydrating must round-trip exactly.
+"""
+
+import json
+import os
+
+import pytest
+
+from compact_notebooks import OutputStore, compact_notebook
+
+IMAGE = 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+LARGE_HTML = '<table>' + '<tr><td>ü</td></tr>' * 200 + '</table>'
+MEDIUM_HTML = '<p>' + 'x' * 2000 + '</p>'
+
+def output(data):
+    return {'output_type': 'display_data', 'metadata': {'isolated': True}, 'data': data}
+
+def write_notebook(path, unique, **dump_options):
+    """Write a notebook of rich outputs, some shared with every notebook and some unique to this one."""
+    cells = [
+        {'cell_type': 'code', 'execution_count': 1, 'metadata': {}, 'source': ['plot()'], 'outputs': [
+            output({'image/png': IMAGE, 'text/plain': ['<Figure>']}),
+            {'output_type': 'stream', 'name': 'stdout', 'text': ['done\n']},
+        ]},
+        {'cell_type': 'code', 'execution_count': 2, 'metadata': {}, 'source': ['df'], 'outputs': [
+            {'output_type': 'execute_result', 'execution_count': 2, 'metadata': {},
+             'data': {'text/html': [LARGE_HTML], 'text/plain': ['   a'], 'text/markdown': ['small']}},
+        ]},
+        {'cell_type': 'code', 'execution_count': 3, 'metadata': {}, 'source': ['show()'], 'outputs': [
+            output({'text/plain': [unique], 'text/html': [MEDIUM_HTML + unique], 'image/png': IMAGE}),
+        ]},
+        {'cell_type': 'markdown', 'metadata': {}, 'source': ['# Notes']},
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'cells': cells, 'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5}, f, **dump_options)
+        f.write('\n')
+    return str(path)
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+@pytest.fixture
+def notebooks(tmp_path):
+    return [
+        write_notebook(tmp_path / 'a.ipynb', 'a', indent=1),
+        # Its only non-ASCII text is moved out, so the compacted file alone does not show ensure_ascii
+        write_notebook(tmp_path / 'b.ipynb', 'b', indent=1, ensure_ascii=False),
+        write_notebook(tmp_path / 'c.ipynb', 'c', separators=(',', ':')),
+    ]
+
+def test_compact_then_rehydrate_restores_the_bytes(tmp_path, notebooks):
+    originals = [read_bytes(path) for path in notebooks]
+    store = OutputStore(str(tmp_path))
+    for path in notebooks:
+        before, after, count = compact_notebook(path, store, 1024)
+        assert count == 4 and after < before
+    # The image is stored once and LARGE_HTML once; MEDIUM_HTML differs per notebook
+    assert (store.written, store.reused) == (5, 7)
+    for path in notebooks:
+        compacted = read_bytes(path)
+        before, after, count = compact_notebook(path, store, 1024)
+        assert count == 0 and before == after and read_bytes(path) == compacted
+    for path, original in zip(notebooks, originals):
+        assert compact_notebook(path, OutputStore(str(tmp_path)), 1024, rehydrate=True)[2] == 4
+        assert read_bytes(path) == original
+
+def test_lower_threshold_adds_to_an_earlier_compaction(tmp_path, notebooks):
+    store = OutputStore(str(tmp_path))
+    for path in notebooks:
+        original = read_bytes(path)
+        assert compact_notebook(path, store, 4096)[2] == 2
+        assert compact_notebook(path, store, 1024)[2] == 2
+        assert compact_notebook(path, store, 1024, rehydrate=True)[2] == 4
+        assert read_bytes(path) == original
+
+def test_dry_run_writes_nothing_and_counts_like_a_real_run(tmp_path, notebooks):
+    originals = [read_bytes(path) for path in notebooks]
+    dry = OutputStore(str(tmp_path))
+    dry_results = [compact_notebook(path, dry, 1024, dry_run=True) for path in notebooks]
+    assert [read_bytes(path) for path in notebooks] == originals
+    assert not os.path.exists(dry.root)
+    real = OutputStore(str(tmp_path))
+    assert [compact_notebook(path, real, 1024) for path in notebooks] == dry_results
+    assert (dry.written, dry.reused, dry.bytes_written) == (real.written, real.reused, real.bytes_written)
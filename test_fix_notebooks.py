@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Tests for fix_notebooks.py.
+"""
+
+import json
+import os
+import stat
+
+import pytest
+
+from fix_notebooks import fix_notebook
+
+def write_notebook(path, sources, **dump_options):
+    """Write a notebook with one code cell per source and return its path as a string."""
+    notebook = {
+        'cells': [{'cell_type': 'code', 'execution_count': None, 'metadata': {}, 'outputs': [],
+                   'source': source.splitlines(keepends=True)} for source in sources],
+        'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(notebook, f, **dump_options)
+    return str(path)
+
+def cell_sources(path):
+    with open(path, encoding='utf-8') as f:
+        return [''.join(cell['source']) for cell in json.load(f)['cells']]
+
+def test_double_quoted_option_gets_prefix(tmp_path):
+    path = write_notebook(tmp_path / 'quotes.ipynb', ['pd.set_option("max_rows", 10)'], indent=1)
+    assert fix_notebook(path) == 1
+    assert cell_sources(path) == ['pd.set_option("display.max_rows", 10)']
+    assert os.path.exists(f'{path}.bak')
+
+def test_dry_run_diff_names_file_relative_to_root(tmp_path, capsys):
+    os.mkdir(tmp_path / 'sub')
+    path = write_notebook(tmp_path / 'sub' / 'quotes.ipynb', ["pd.set_option('max_rows', 10)"], indent=1)
+    with open(path, 'rb') as f:
+        before = f.read()
+    assert fix_notebook(path, dry_run=True, root=str(tmp_path)) == 1
+    out = capsys.readouterr().out
+    assert '--- a/sub/quotes.ipynb\n' in out and '+++ b/sub/quotes.ipynb\n' in out
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    assert not os.path.exists(f'{path}.bak')
+
+LAYOUTS = [
+    ({'indent': 1}, '\n'), ({'indent': 2}, ''), ({'indent': '\t'}, '\n'),
+    ({'separators': (',', ':')}, ''), ({'indent': 1, 'ensure_ascii': False}, '\n'),
+]
+
+@pytest.mark.parametrize('dump_options, trailing', LAYOUTS)
+def test_layout_is_kept_apart_from_the_fixed_lines(tmp_path, dump_options, trailing):
+    sources = ["pd.set_option('max_rows', 10)\nx = 1", "name = 'café ✓'\nprint(name)"]
+    path = write_notebook(tmp_path / 'layout.ipynb', sources, **dump_options)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(trailing)
+    expected = tmp_path / 'expected.ipynb'
+    write_notebook(expected, ["pd.set_option('display.max_rows', 10)\nx = 1", sources[1]], **dump_options)
+    assert fix_notebook(path, backup=False) == 1
+    with open(path, 'rb') as f, open(expected, 'rb') as g:
+        assert f.read() == g.read() + trailing.encode()
+
+def test_write_is_atomic_and_keeps_permissions(tmp_path):
+    path = write_notebook(tmp_path / 'mode.ipynb', ["pd.set_option('max_rows', 10)"], indent=1)
+    os.chmod(path, 0o640)
+    with open(path, 'rb') as f:
+        original = f.read()
+    assert fix_notebook(path) == 1
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert stat.S_IMODE(os.stat(f'{path}.bak').st_mode) == 0o640
+    with open(f'{path}.bak', 'rb') as f:
+        assert f.read() == original
+    assert sorted(os.listdir(tmp_path)) == ['mode.ipynb', 'mode.ipynb.bak']
+
+def test_clean_notebook_is_not_written(tmp_path):
+    path = write_notebook(tmp_path / 'clean.ipynb', ["pd.set_option('display.max_rows', 10)"], indent=1)
+    before = os.stat(path)
+    assert fix_notebook(path) == 0
+    assert os.stat(path).st_mtime_ns == before.st_mtime_ns
+    assert os.stat(path).st_ino == before.st_ino
+    assert os.listdir(tmp_path) == ['clean.ipynb']
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+"""
+Tests for the AST analysis of notebook cells.
+"""
+
+import ast
+
+import pytest
+
+from notebook_ast import _CellVisitor, analyze_source, strip_magics
+
+@pytest.mark.parametrize('source', [
+    "x = [1, 2] - 1",
+    "é = 'ü'; y = [1,\n  2] - 3\r\nz = [ 'ä' ] - 2",
+    "\x0ca = 1\nq = [1] - 1  # \x0c\rr = [2] - 2",
+])
+def test_list_subtractions_match_get_source_segment(source):
+    tree = ast.parse(source)
+    visitor = _CellVisitor(source)
+    visitor.visit(tree)
+    expected = [ast.get_source_segment(source, node) for node in ast.walk(tree) if isinstance(node, ast.BinOp)]
+    assert sorted(visitor.syntax.list_subtractions) == sorted(expected)
+
+def test_version_reads_through_method_calls():
+    syntax = analyze_source("import pandas as pd\nmajor = pd.__version__.split('.')[0]")
+    assert 'pd.__version__' in syntax.pandas_attributes
+
+def test_timed_statements_are_kept():
+    assert strip_magics('%timeit -n 10 -r 3 df.sort()') == 'df.sort()'
+    assert strip_magics('  %time x = df.sort()') == '  x = df.sort()'
+    assert strip_magics('%%time\ndf.sort()') == 'pass\ndf.sort()'
+    assert strip_magics('%%bash\nls') is None
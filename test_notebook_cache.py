@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Tests for the on-disk result cache in notebook_cache.py.
+"""
+
+import os
+
+import pytest
+
+from notebook_cache import ResultCache
+
+ISSUES = [{'cell_index': 1, 'issue': 'Deprecated method: ix[', 'severity': 'high'}]
+
+@pytest.fixture
+def notebook(tmp_path):
+    path = tmp_path / 'a.ipynb'
+    path.write_text('{"cells": []}\n', encoding='utf-8')
+    return str(path)
+
+def open_cache(tmp_path, fingerprint='rules-1'):
+    return ResultCache(str(tmp_path), fingerprint)
+
+def test_miss_then_hit(tmp_path, notebook):
+    cache = open_cache(tmp_path)
+    assert cache.get(notebook) is None
+    cache.put(notebook, ISSUES, cache.file_state(notebook))
+    assert cache.get(notebook) == ISSUES
+    cache.close()
+    assert open_cache(tmp_path).get(notebook) == ISSUES
+
+def test_edit_invalidates(tmp_path, notebook):
+    cache = open_cache(tmp_path)
+    cache.put(notebook, ISSUES, cache.file_state(notebook))
+    with open(notebook, 'a', encoding='utf-8') as f:
+        f.write(' ')
+    assert cache.get(notebook) is None
+
+def test_touch_without_edit_still_hits(tmp_path, notebook):
+    cache = open_cache(tmp_path)
+    cache.put(notebook, ISSUES, cache.file_state(notebook))
+    stat = os.stat(notebook)
+    os.utime(notebook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.get(notebook) == ISSUES
+
+def test_edit_during_scan_is_not_served(tmp_path, notebook):
+    cache = open_cache(tmp_path)
+    state = cache.file_state(notebook)
+    # The notebook changes between the state being taken and the result being stored
+    with open(notebook, 'w', encoding='utf-8') as f:
+        f.write('{"cells": [], "metadata": {}}\n')
+    cache.put(notebook, ISSUES, state)
+    assert cache.get(notebook) is None
+
+def test_fingerprints_keep_separate_entries(tmp_path, notebook):
+    regex = open_cache(tmp_path, 'regex')
+    regex.put(notebook, ISSUES, regex.file_state(notebook))
+    ast = open_cache(tmp_path, 'ast')
+    assert ast.get(notebook) is None
+    ast.put(notebook, [], ast.file_state(notebook))
+    assert regex.get(notebook) == ISSUES
+    assert ast.get(notebook) == []
+
+def test_evict_missing(tmp_path, notebook):
+    other = tmp_path / 'b.ipynb'
+    other.write_text('{"cells": []}\n', encoding='utf-8')
+    cache = open_cache(tmp_path)
+    for path in (notebook, str(other)):
+        cache.put(path, ISSUES, cache.file_state(path))
+    assert cache.evict_missing([notebook]) == 1
+    assert cache.get(notebook) == ISSUES
+    assert cache.get(str(other)) is None
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Tests for the --since and --staged helpers in notebook_git.py, against a scratch repository.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from notebook_git import changed_cell_indices, changed_notebooks
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+SOURCES = ['import pandas as pd', "df = pd.read_csv('data/a.csv')", 'df.head()']
+
+def git(repo, *args):
+    return subprocess.run(['git', '-C', str(repo), *args], check=True, capture_output=True, text=True).stdout
+
+def write_notebook(path, sources):
+    """Write a notebook with a markdown cell followed by one code cell per source."""
+    cells = [{'cell_type': 'markdown', 'metadata': {}, 'source': ['# Title']}] + [
+        {'cell_type': 'code', 'execution_count': None, 'metadata': {}, 'outputs': [], 'source': [source]}
+        for source in sources
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'cells': cells, 'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5}, f, indent=1)
+
+@pytest.fixture
+def notebooks(tmp_path):
+    """A repository with two committed notebooks in its nbs/ directory; returns that directory."""
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'config', 'user.email', 'test@example.com')
+    git(tmp_path, 'config', 'user.name', 'Test')
+    directory = tmp_path / 'nbs'
+    directory.mkdir()
+    write_notebook(directory / 'a.ipynb', SOURCES)
+    write_notebook(directory / 'same.ipynb', SOURCES)
+    git(tmp_path, 'add', '.')
+    git(tmp_path, 'commit', '-q', '-m', 'Add notebooks')
+    return directory
+
+def test_since_lists_edited_and_untracked_notebooks(notebooks):
+    path = str(notebooks / 'a.ipynb')
+    write_notebook(path, [SOURCES[0], 'df = pd.read_csv("data/b.csv")', SOURCES[2]])
+    write_notebook(notebooks / 'new.ipynb', SOURCES)
+    (notebooks / 'notes.txt').write_text('not a notebook\n', encoding='utf-8')
+    changed = changed_notebooks(str(notebooks), since='HEAD')
+    assert changed == {path: ('HEAD:nbs/a.ipynb', None), str(notebooks / 'new.ipynb'): (None, None)}
+    assert changed_cell_indices(path, changed[path][0]) == {2}
+
+def test_moved_cells_are_not_new_but_extra_copies_are(notebooks):
+    path = str(notebooks / 'a.ipynb')
+    write_notebook(path, [SOURCES[2], SOURCES[0], SOURCES[1], SOURCES[2]])
+    assert changed_cell_indices(path, 'HEAD:nbs/a.ipynb') == {4}
+
+def test_staged_checks_the_staged_version(notebooks):
+    path = str(notebooks / 'a.ipynb')
+    write_notebook(path, [SOURCES[0], SOURCES[1], 'df.tail()'])
+    git(notebooks, 'add', 'a.ipynb')
+    # An unstaged edit on top must not be what the hook sees
+    write_notebook(path, ['import numpy as np', SOURCES[1], 'df.tail()'])
+    changed = changed_notebooks(str(notebooks), staged=True)
+    assert changed == {path: ('HEAD:nbs/a.ipynb', ':nbs/a.ipynb')}
+    staged_text = git(notebooks, 'show', ':nbs/a.ipynb')
+    assert changed_cell_indices(path, 'HEAD:nbs/a.ipynb', staged_text) == {3}
+    assert changed_cell_indices(path, 'HEAD:nbs/a.ipynb') == {1, 3}
+
+def test_matches_filters_and_renames_keep_their_base(notebooks):
+    git(notebooks, 'mv', 'a.ipynb', 'b.ipynb')
+    changed = changed_notebooks(str(notebooks), staged=True, matches=lambda path: path.startswith('b'))
+    assert changed == {str(notebooks / 'b.ipynb'): ('HEAD:nbs/a.ipynb', ':nbs/b.ipynb')}
+
+def test_no_base_means_every_cell(notebooks):
+    assert changed_cell_indices(str(notebooks / 'a.ipynb'), None) is None
+    assert changed_cell_indices(str(notebooks / 'a.ipynb'), 'HEAD:nbs/missing.ipynb') is None
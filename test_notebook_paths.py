@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Tests for the in-memory path index in notebook_paths.py.
+"""
+
+import os
+
+import pytest
+
+from notebook_paths import PathIndex
+
+@pytest.fixture
+def tree(tmp_path):
+    """A notebook directory with a nested data tree, a symlink and a dangling one."""
+    (tmp_path / 'data' / 'raw').mkdir(parents=True)
+    (tmp_path / 'data' / 'flights.csv').write_text('a\n', encoding='utf-8')
+    (tmp_path / 'data' / 'raw' / 'tips.csv').write_text('a\n', encoding='utf-8')
+    (tmp_path / 'other').mkdir()
+    (tmp_path / 'other' / 'notes.txt').write_text('a\n', encoding='utf-8')
+    os.symlink('flights.csv', tmp_path / 'data' / 'link.csv')
+    os.symlink('missing.csv', tmp_path / 'data' / 'dangling.csv')
+    return tmp_path
+
+CANDIDATES = [
+    'data/flights.csv', 'data/raw/tips.csv', 'data/raw', 'data/raw/', 'data/missing.csv', 'data/link.csv',
+    'data/dangling.csv', 'data/../data/flights.csv', 'other/notes.txt', 'other/missing.txt',
+    'nothere/x.csv', 'Data/flights.csv', 'data/FLIGHTS.csv', '',
+]
+
+def test_exists_matches_os_path_exists(tree, monkeypatch):
+    monkeypatch.chdir(tree)
+    index = PathIndex()
+    index.prepare(str(tree))
+    for candidate in CANDIDATES + [str(tree / candidate) for candidate in CANDIDATES]:
+        assert index.exists(candidate) == os.path.exists(candidate), candidate
+
+def test_hits_cost_no_syscalls_after_prepare(tree, monkeypatch):
+    monkeypatch.chdir(tree)
+    index = PathIndex()
+    index.prepare(str(tree))
+    before = index.syscalls
+    for _ in range(10):
+        assert index.exists('data/flights.csv')
+        assert index.exists('data/raw/tips.csv')
+    assert index.syscalls == before
+
+def test_misses_are_confirmed_once(tree, monkeypatch):
+    monkeypatch.chdir(tree)
+    index = PathIndex()
+    index.prepare(str(tree))
+    before = index.syscalls
+    for _ in range(10):
+        assert not index.exists('data/missing.csv')
+    assert index.syscalls == before + 1
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Tests for notebook discovery and early exit in notebook_pipeline.py.
+"""
+
+import argparse
+import os
+
+import pytest
+
+from notebook_pipeline import EarlyExit, add_discovery_arguments, discovery_filter, iter_notebooks
+
+FILES = [
+    'a.ipynb', 'a.ipynb.bak', 'notes.txt', 'sub/b.ipynb', 'sub/deep/c.ipynb', 'sub/deep/d.ipynb',
+    'drafts/e.ipynb', '.hidden/f.ipynb', '.ipynb_checkpoints/a-checkpoint.ipynb',
+    'sub/.ipynb_checkpoints/b-checkpoint.ipynb',
+]
+
+@pytest.fixture
+def tree(tmp_path):
+    for name in FILES:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('{"cells": []}\n', encoding='utf-8')
+    return tmp_path
+
+def found(directory, **options):
+    return sorted(os.path.relpath(path, directory).replace(os.sep, '/')
+                  for path in iter_notebooks(str(directory), **options))
+
+def parse(directory, *argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directory')
+    add_discovery_arguments(parser)
+    return parser.parse_args([str(directory), *argv])
+
+def test_skips_checkpoints_hidden_directories_and_backups(tree):
+    assert found(tree) == ['a.ipynb', 'drafts/e.ipynb', 'sub/b.ipynb', 'sub/deep/c.ipynb', 'sub/deep/d.ipynb']
+
+def test_include_exclude_and_no_recursive(tree):
+    assert found(tree, include=['sub/*']) == ['sub/b.ipynb', 'sub/deep/c.ipynb', 'sub/deep/d.ipynb']
+    assert found(tree, exclude=['*/c.ipynb', 'drafts']) == ['a.ipynb', 'sub/b.ipynb', 'sub/deep/d.ipynb']
+    assert found(tree, recursive=False) == ['a.ipynb']
+
+def test_excluded_and_skipped_directories_are_not_read(tree, monkeypatch):
+    listed = []
+    scandir = os.scandir
+
+    def recording_scandir(path):
+        listed.append(os.path.relpath(path, tree).replace(os.sep, '/'))
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', recording_scandir)
+    found(tree, exclude=['sub/deep'])
+    assert sorted(listed) == ['.', 'drafts', 'sub']
+
+def test_first_notebook_needs_one_listing(tree, monkeypatch):
+    listed = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda path: listed.append(path) or scandir(path))
+    notebooks = iter_notebooks(str(tree))
+    assert next(notebooks) == os.path.join(str(tree), 'a.ipynb')
+    assert len(listed) == 1
+    notebooks.close()
+
+@pytest.mark.parametrize('argv', [[], ['--include', 'sub/*'], ['--exclude', '*/c.ipynb'], ['--no-recursive']])
+def test_discovery_filter_agrees_with_discovery(tree, argv):
+    args = parse(tree, *argv)
+    matches = discovery_filter(args)
+    candidates = [name for name in FILES if matches(name)]
+    assert sorted(candidates) == found(tree, include=args.include or ['*.ipynb'], exclude=args.exclude,
+                                       recursive=not args.no_recursive)
+
+def results(closed):
+    """Stand-in for a checking pipeline; records in closed whether it was shut down."""
+    try:
+        yield 'a', [], None
+        yield 'b', ['low'], None
+        yield 'c', None, 'ValueError: bad notebook'
+        yield 'd', ['low', 'high'], None
+        yield 'e', ['high'], None
+    finally:
+        closed.append(True)
+
+def test_fail_fast_stops_after_the_first_failure():
+    closed = []
+    early = EarlyExit(fail_fast=True, is_failure=lambda issue: issue == 'high')
+    assert [notebook for notebook, _, _ in early.apply(results(closed))] == ['a', 'b', 'c', 'd']
+    assert early.reason == '--fail-fast: stopped after d'
+    assert (early.notebooks, early.issues, closed) == (4, 3, [True])
+
+def test_max_issues_stops_at_the_limit():
+    closed = []
+    early = EarlyExit(max_issues=2)
+    assert [notebook for notebook, _, _ in early.apply(results(closed))] == ['a', 'b', 'c', 'd']
+    assert early.reason == '--max-issues: stopped after 3 issues'
+    assert closed == [True]
+
+def test_issues_of_and_no_stop():
+    wrapped = ((notebook, {'issues': issues}, error) for notebook, issues, error in results([]))
+    early = EarlyExit(max_issues=10, issues_of=lambda result: result['issues'])
+    assert len(list(early.apply(wrapped))) == 5
+    assert (early.reason, early.issues) == (None, 4)
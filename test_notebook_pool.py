@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Tests for notebook_pool.py: results in input order whatever the workers do.
+"""
+
+import functools
+import os
+import time
+
+from notebook_pool import iter_notebook_results
+
+def run(log_path, notebook):
+    """Stand-in for a notebook check, driven by the notebook's name."""
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(notebook + '\n')
+    if notebook == 'slow':
+        time.sleep(30)
+    elif notebook == 'crash':
+        os._exit(1)
+    elif notebook == 'raise':
+        raise KeyError(notebook)
+    print(f'checked {notebook}')
+    return notebook.upper()
+
+def runs(log_path):
+    with open(log_path, encoding='utf-8') as f:
+        return f.read().split()
+
+def test_serial_results_in_order_with_errors(tmp_path):
+    log = str(tmp_path / 'log')
+    results = list(iter_notebook_results(functools.partial(run, log), ['a', 'raise', 'b']))
+    assert results == [('a', 'A', None), ('raise', None, "KeyError: 'raise'"), ('b', 'B', None)]
+
+def test_timeout_keeps_order_and_runs_others_once(tmp_path, capsys):
+    log = str(tmp_path / 'log')
+    notebooks = ['a', 'slow', 'b', 'c', 'd', 'e']
+    results = list(iter_notebook_results(functools.partial(run, log), notebooks, jobs=2, timeout=2))
+    assert [notebook for notebook, _, _ in results] == notebooks
+    assert results[1] == ('slow', None, 'timed out after 2 seconds')
+    assert all(result == notebook.upper() and error is None
+               for notebook, result, error in results if notebook != 'slow')
+    assert sorted(runs(log)) == sorted(notebooks)
+    # Printed output is replayed in input order
+    out = capsys.readouterr().out
+    assert out == ''.join(f'checked {notebook}\n' for notebook in notebooks if notebook != 'slow')
+
+def test_crash_keeps_order_and_reports_the_culprit(tmp_path):
+    log = str(tmp_path / 'log')
+    notebooks = ['a', 'b', 'crash', 'c', 'd', 'e']
+    results = list(iter_notebook_results(functools.partial(run, log), notebooks, jobs=2, timeout=10))
+    assert [notebook for notebook, _, _ in results] == notebooks
+    assert results[2] == ('crash', None, 'worker process crashed')
+    assert all(result == notebook.upper() and error is None
+               for notebook, result, error in results if notebook != 'crash')
+
+def test_closing_early_stops_the_run(tmp_path):
+    log = str(tmp_path / 'log')
+    results = iter_notebook_results(functools.partial(run, log), (str(n) for n in range(100)), jobs=2)
+    assert next(results) == ('0', '0', None)
+    results.close()
+    # At most the window of two notebooks per worker was sent ahead
+    assert len(runs(log)) <= 5
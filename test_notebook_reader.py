@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Tests for the streaming notebook reader in notebook_reader.py.
+"""
+
+import json
+import os
+
+import pytest
+
+from notebook_reader import CODE_CELLS, NotebookFormatError, iter_cells
+
+NOTEBOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'notebooks')
+
+# Escapes, surrogate pairs, non-ASCII text and nested outputs that the reader must skip
+TRICKY_NOTEBOOK = {
+    'cells': [
+        {'cell_type': 'markdown', 'metadata': {'tags': ['a"b', '\\']}, 'source': ['# Tëst ✓\n', 'ünïcode']},
+        {'cell_type': 'code', 'execution_count': 1, 'metadata': {}, 'source': [
+            'print("tab\\there")\n', "s = '\\u00e9 \\\\n \"quoted\"'\n", 'emoji = "😀"\n', 'x = [1, {"a": null}]',
+        ], 'outputs': [
+            {'output_type': 'stream', 'name': 'stdout', 'text': ['{not json]\n', ' \n']},
+            {'output_type': 'execute_result', 'execution_count': 1, 'metadata': {},
+             'data': {'text/plain': ['1.5e-3'], 'image/png': 'iVBORw0KGgo' * 500}},
+        ]},
+        {'cell_type': 'code', 'execution_count': None, 'metadata': {}, 'outputs': [], 'source': ''},
+        {'source': 'type after source', 'metadata': {}, 'cell_type': 'code', 'outputs': [], 'execution_count': 2},
+        {'cell_type': 'raw', 'metadata': {}, 'source': 'raw\r\ntext'},
+    ],
+    'metadata': {'kernelspec': {'name': 'python3'}, 'numbers': [0, -1, 2.5, True, False, None]},
+    'nbformat': 4,
+    'nbformat_minor': 5,
+}
+
+def expected_cells(path, cell_types=None):
+    with open(path, encoding='utf-8') as f:
+        cells = json.load(f)['cells']
+    result = []
+    for index, cell in enumerate(cells):
+        source = cell.get('source')
+        if isinstance(source, list):
+            source = ''.join(source)
+        if cell_types is not None and cell['cell_type'] not in cell_types:
+            source = None
+        result.append((index, cell['cell_type'], source))
+    return result
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize('dump_options', [{'indent': 1}, {'ensure_ascii': False}, {'separators': (',', ':')}])
+def test_matches_json_load(tmp_path, chunk_size, dump_options):
+    path = tmp_path / 'tricky.ipynb'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(TRICKY_NOTEBOOK, f, **dump_options)
+    assert list(iter_cells(str(path), chunk_size=chunk_size)) == expected_cells(path)
+    assert list(iter_cells(str(path), CODE_CELLS, chunk_size)) == expected_cells(path, CODE_CELLS)
+
+SAMPLE_NOTEBOOKS = sorted(name for name in os.listdir(NOTEBOOKS_DIR) if name.endswith('.ipynb'))[:5]
+
+@pytest.mark.parametrize('name', SAMPLE_NOTEBOOKS)
+def test_matches_json_load_on_sample_notebooks(name):
+    path = os.path.join(NOTEBOOKS_DIR, name)
+    assert list(iter_cells(path, chunk_size=97)) == expected_cells(path)
+
+@pytest.mark.parametrize('text', ['{"cells": [', '[]', '{"cells": [{"source": "a"]}', ''])
+def test_malformed_notebooks_raise(tmp_path, text):
+    path = tmp_path / 'bad.ipynb'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(NotebookFormatError):
+        list(iter_cells(str(path)))
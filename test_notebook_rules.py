@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""
+Tests for the compiled rule matcher in notebook_rules.py.
+"""
+
+import os
+
+import pytest
+
+from benchmark_notebooks import grow_rules, load_code_cells, scan_compiled, scan_serial
+from notebook_rules import DEPRECATED_METHODS, RuleMatcher
+
+NOTEBOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'notebooks')
+
+# Overlapping literals, both quote styles, several matches of one pattern and none at all
+TRICKY_SOURCES = [
+    '',
+    "df.isnull().sum()\ndf.isnull()",
+    "pd.read_csv('a.csv'); pd.read_csv(\"b.csv\")\npd.read_excel('c.xlsx')",
+    "x = df.ix[0]\ny = df.ix[1]\npd.rolling_mean(df['v'], 3)",
+    "s = 'pd.read_csv(' + name\n# df.append(other)",
+    "pd.read_json('ü.json')\nresult = pd.legacy_3(df)",
+] + [f"result = df.{old}other)" for old, _ in DEPRECATED_METHODS]
+
+@pytest.mark.parametrize('extra', [0, 50])
+def test_matcher_agrees_with_serial_scan(extra):
+    deprecated_methods, file_path_patterns = grow_rules(extra)
+    matcher = RuleMatcher(deprecated_methods, file_path_patterns)
+    sources = TRICKY_SOURCES + load_code_cells(NOTEBOOKS_DIR)
+    assert scan_compiled(sources, matcher) == scan_serial(sources, deprecated_methods, file_path_patterns)
+
+def test_matcher_reports_overlapping_literals():
+    matcher = RuleMatcher()
+    found = [old for old, _ in matcher.deprecated("df.isnull().sum()")]
+    assert found == [old for old, _ in DEPRECATED_METHODS if old in "df.isnull().sum()"]